@@ -1,5 +1,6 @@
 from flask import Flask, request
 from proxy.proxy_subject import ProxySubject
+from proxy.revalidator import Revalidator
 from ui.mediator import UIMediator
 
 # 1. Configuración de Flask
@@ -7,9 +8,14 @@ from ui.mediator import UIMediator
 app = Flask(__name__, template_folder="ui/templates")
 
 # 2. Inicialización del Sistema (Composition Root)
-# Creamos el Sujeto Real (Proxy) que tiene acceso a DB, Repo y Métricas
+# Creamos el Sujeto Real (Proxy) que tiene acceso a DB, Repo y Métricas.
+# Es barato: los subsistemas se crean en la primera petición que los necesite.
 subject = ProxySubject()
 
+# Los aciertos de caché se revalidan en segundo plano (stale-while-revalidate).
+# Los hilos arrancan con la primera revalidación (o ya, si hay ronda periódica).
+subject.revalidator = Revalidator(subject).start()
+
 # Creamos el Mediador que conectará la Vista con el Sujeto
 mediator = UIMediator(subject)
 
@@ -23,7 +29,38 @@ def index():
 def analyze():
     """Ruta de acción: Procesa el formulario de análisis."""
     # Pasamos request.form (diccionario inmutable) al mediador
-    return mediator.handle_analyze(request.form)
+    return mediator.handle_analyze(request.form, requester=request.remote_addr)
+
+@app.route("/analysis/<int:analysis_id>", methods=["GET"])
+def analysis(analysis_id):
+    """Ruta de consulta: Muestra un análisis guardado (tabla paginada con ?page=&sort=&order=&q=)."""
+    return mediator.show_analysis(analysis_id, request.args)
+
+@app.route("/analysis/<int:analysis_id>/file", methods=["GET"])
+def analysis_file(analysis_id):
+    """Ruta de consulta: Detalle de un archivo (funciones) en JSON, se carga bajo demanda."""
+    return mediator.handle_file_detail(analysis_id, request.args)
+
+@app.route("/analysis/<int:analysis_id>/profile", methods=["GET"])
+@app.route("/analysis/<int:analysis_id>/profile/<name>", methods=["GET"])
+def analysis_profile(analysis_id, name=None):
+    """Ruta de consulta: Perfil de CPU y memoria de un análisis perfilado (resumen o descarga de un artefacto)."""
+    return mediator.handle_profile(analysis_id, name)
+
+@app.route("/trend", methods=["GET"])
+def trend():
+    """Ruta de consulta: Evolución temporal del resumen (o de un archivo con ?path=)."""
+    return mediator.handle_trend(request.args)
+
+@app.route("/export", methods=["GET"])
+def export():
+    """Ruta de consulta: Exportación en streaming (NDJSON o CSV) de análisis, archivos o funciones."""
+    return mediator.handle_export(request.args)
+
+@app.route("/scheduler", methods=["GET"])
+def scheduler():
+    """Ruta de consulta: Colas y esperas del planificador (pools de E/S y CPU) en JSON."""
+    return mediator.handle_scheduler_stats()
 
 if __name__ == "__main__":
     # Ejecutamos en modo debug para desarrollo
@@ -0,0 +1,287 @@
+"""
+Prueba de carga de la aplicación web de extremo a extremo.
+
+Genera repositorios git sintéticos, los publica como repos bare por HTTP "tonto"
+(un servidor de ficheros estático, en lugar de GitHub) y lanza contra la
+aplicación una mezcla configurable de peticiones concurrentes:
+
+    cached    POST /analyze de un repo ya analizado (acierto de caché)
+    uncached  POST /analyze con "Forzar recálculo" (fetch + análisis completo)
+    index     GET /  (formulario + historial)
+
+Por defecto la aplicación se sirve en este mismo proceso (servidor WSGI con
+hilos) con REPO_ANALYZER_HOME en un directorio temporal, así que también se
+mide la contención de SQLite (esperas por el lock de escritura). Con --url se
+ataca un despliegue ya arrancado (ej. gunicorn); entonces no hay datos de la BD.
+
+El resultado es JSON (throughput, p50/p95/p99, errores, contención de la BD y
+colas del planificador) para comparar versiones de ProxySubject, DBManager o
+MetricsFacade.
+
+Uso:
+    python bench/loadtest.py --repos 3 --files 40 --requests 200 --concurrency 8
+    python bench/loadtest.py --mix cached=70,uncached=10,index=20 --output carga.json
+    python bench/loadtest.py --url http://127.0.0.1:5000 --concurrency 32
+"""
+import argparse
+import contextlib
+import datetime
+import functools
+import http.server
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+KINDS = ("cached", "uncached", "index")
+
+# Marca de error de la plantilla (el mediador devuelve 200 con el mensaje)
+ERROR_MARKER = b'class="error-msg"'
+
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=loadtest", "-c", "user.email=loadtest@example.com", *args],
+        cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def make_repos(root: Path, count: int, files: int, seed: int) -> list:
+    """
+    Crea 'count' repos bare en root/served con 'files' módulos Python cada uno.
+    Devuelve sus nombres ("repo0.git"...).
+    """
+    rng = random.Random(seed)
+    served = root / "served"
+    served.mkdir()
+    names = []
+    for r in range(count):
+        work = root / "work" / f"repo{r}"
+        (work / "pkg").mkdir(parents=True)
+        (work / "pkg" / "__init__.py").write_text("")
+        for f in range(files):
+            body = []
+            for g in range(rng.randint(2, 8)):
+                branches = "".join(
+                    f"    if x > {i}:\n        x -= {rng.randint(1, 9)}\n"
+                    for i in range(rng.randint(0, 6))
+                )
+                body.append(f"def f{g}(x):\n{branches}    return x\n")
+            imports = f"from pkg import mod{rng.randrange(files)}\n" if f else "import os\n"
+            (work / "pkg" / f"mod{f}.py").write_text(imports + "\n\n".join(body))
+        _git(work, "init", "-q")
+        _git(work, "add", ".")
+        _git(work, "commit", "-q", "-m", "inicial")
+        name = f"repo{r}.git"
+        _git(root, "clone", "-q", "--bare", str(work), str(served / name))
+        # El protocolo HTTP "tonto" necesita info/refs y objects/info/packs
+        _git(served / name, "update-server-info")
+        names.append(name)
+    return names
+
+class _QuietFiles(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def serve_git(directory: Path):
+    """
+    Sirve 'directory' por HTTP en un puerto libre. Devuelve (servidor, url base).
+    """
+    handler = functools.partial(_QuietFiles, directory=str(directory))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def serve_app(home: Path):
+    """
+    Arranca la aplicación en este proceso (servidor con hilos, como un worker
+    de gunicorn con --threads). Devuelve (servidor, url base, subject).
+    """
+    os.environ["REPO_ANALYZER_HOME"] = str(home)
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    import app as app_module
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True,
+                         request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", app_module.subject
+
+def fire(base_url: str, kind: str, repo_url: str, timeout: float):
+    """
+    Lanza una petición. Devuelve (latencia en segundos, error o None).
+    """
+    if kind == "index":
+        req = urllib.request.Request(base_url + "/")
+    else:
+        form = {"repo_url": repo_url}
+        if kind == "uncached":
+            form["force"] = "on"
+        req = urllib.request.Request(base_url + "/analyze",
+                                     data=urllib.parse.urlencode(form).encode())
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            body = resp.read()
+        error = "app_error" if ERROR_MARKER in body else None
+    except urllib.error.HTTPError as e:
+        error = f"http_{e.code}"
+    except Exception as e:
+        error = type(e).__name__
+    return time.perf_counter() - started, error
+
+def summarize(samples: list, wall: float) -> dict:
+    """
+    Throughput, latencias (ms) y errores de una lista de (latencia, error).
+    """
+    latencies = sorted(lat * 1000 for lat, _ in samples)
+    errors = {}
+    for _, error in samples:
+        if error:
+            errors[error] = errors.get(error, 0) + 1
+    stats = {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / wall, 2) if wall > 0 else None,
+        "errors": sum(errors.values()),
+        "error_rate": round(sum(errors.values()) / len(samples), 4) if samples else 0.0,
+        "error_kinds": errors,
+    }
+    if latencies:
+        # Percentiles con interpolación lineal (como metrics/aggregation.py)
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 \
+            else [latencies[0]] * 99
+        stats.update({
+            "mean_ms": round(statistics.fmean(latencies), 2),
+            "p50_ms": round(cuts[49], 2),
+            "p95_ms": round(cuts[94], 2),
+            "p99_ms": round(cuts[98], 2),
+            "max_ms": round(latencies[-1], 2),
+        })
+    return stats
+
+def parse_mix(text: str) -> dict:
+    """
+    "cached=70,uncached=10,index=20" -> pesos por tipo de petición.
+    """
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(f"Tipo desconocido '{kind}' (válidos: {', '.join(KINDS)})")
+        mix[kind] = float(weight)
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("La mezcla debe tener algún peso positivo")
+    return mix
+
+def _project_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        names = make_repos(root, args.repos, args.files, args.seed)
+        git_server, git_url = serve_git(root / "served")
+        repo_urls = [f"{git_url}/{name}" for name in names]
+
+        subject = None
+        if args.url:
+            app_server, base_url = None, args.url.rstrip("/")
+        else:
+            app_server, base_url, subject = serve_app(root / "home")
+
+        try:
+            # Calentamiento: un análisis de cada repo para que 'cached' acierte
+            warmup = [fire(base_url, "cached", url, args.timeout) for url in repo_urls]
+
+            db_before = subject.db_manager.contention_stats() if subject else None
+            rng = random.Random(args.seed)
+            kinds = list(args.mix)
+            plan = [(k, rng.choice(repo_urls))
+                    for k in rng.choices(kinds, weights=[args.mix[k] for k in kinds], k=args.requests)]
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                samples = list(pool.map(lambda p: (p[0], fire(base_url, p[0], p[1], args.timeout)), plan))
+            wall = time.perf_counter() - started
+            db_after = subject.db_manager.contention_stats() if subject else None
+            scheduler = subject.scheduler_stats() if subject else None
+        finally:
+            git_server.shutdown()
+            if app_server is not None:
+                app_server.shutdown()
+
+    db = None
+    if db_after is not None:
+        db = {key: round(db_after[key] - db_before[key], 2) for key in db_after}
+        db["write_wait_ms_max"] = db_after["write_wait_ms_max"]
+
+    return {
+        "meta": {
+            "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "project_commit": _project_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": "external" if args.url else "in-process",
+        },
+        "params": {
+            "repos": args.repos, "files": args.files, "requests": args.requests,
+            "concurrency": args.concurrency, "mix": args.mix, "seed": args.seed,
+        },
+        "wall_seconds": round(wall, 3),
+        "warmup": summarize(warmup, sum(lat for lat, _ in warmup)),
+        "total": summarize([s for _, s in samples], wall),
+        "by_kind": {
+            kind: summarize([s for k, s in samples if k == kind], wall)
+            for kind in kinds
+        },
+        "db": db,
+        "scheduler": scheduler,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=3, help="Repos sintéticos a servir")
+    parser.add_argument("--files", type=int, default=40, help="Módulos por repo")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones a lanzar (sin calentamiento)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Peticiones simultáneas")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("cached=70,uncached=10,index=20"),
+                        help="Pesos por tipo: cached=..,uncached=..,index=..")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Timeout por petición (s)")
+    parser.add_argument("--url", help="Atacar una aplicación ya arrancada en vez de una en proceso")
+    parser.add_argument("--output", type=Path, help="Fichero JSON de salida (por defecto stdout)")
+    args = parser.parse_args()
+
+    # Los logs de la aplicación van a stderr: stdout queda solo para el JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(args)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Memoria del detalle por archivo de un informe: registros compactos
+(metrics/records.py) frente a los dicts anidados equivalentes.
+
+Genera un repositorio sintético grande (muchos archivos y funciones), lo
+analiza una vez y materializa el detalle de dos formas a partir del mismo JSON
+(como al leerlo de la BD): con json.loads (dicts) y con FileRecord.from_json.
+Con tracemalloc mide lo que queda retenido por cada una.
+
+Uso:
+    python bench/memory.py --files 2000 --functions 50
+    python bench/memory.py --files 5000 --functions 20 --output memoria.json
+"""
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+def make_repo(root: Path, files: int, functions: int, seed: int) -> None:
+    """
+    Crea 'files' módulos con 'functions' funciones cada uno.
+    """
+    rng = random.Random(seed)
+    for f in range(files):
+        package = root / f"pkg{f % 20}"
+        package.mkdir(exist_ok=True)
+        body = []
+        for g in range(functions):
+            branches = "".join(
+                f"    if x > {i}:\n        x -= {rng.randint(1, 9)}\n"
+                for i in range(rng.randint(0, 4))
+            )
+            body.append(f"def f{g}(x, y):\n{branches}    return x + y\n")
+        (package / f"mod{f}.py").write_text("import os\n\n" + "\n\n".join(body))
+
+def retained(build):
+    """
+    Bytes que siguen reservados tras construir (y conservar) build().
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return value, size
+
+def run(args) -> dict:
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from metrics.facade import MetricsFacade
+    from metrics.records import FileRecord, json_default
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_repo(root, args.files, args.functions, args.seed)
+        started = time.perf_counter()
+        result = MetricsFacade().compute_all(root, {"metrics": args.metrics})
+        analysis = time.perf_counter() - started
+
+    rows = [json.dumps(f, sort_keys=True, default=json_default) for f in result["files"]]
+    del result
+    num_functions = sum(len(json.loads(row).get("functions") or {}) for row in rows)
+
+    dicts, dict_bytes = retained(lambda: [json.loads(row) for row in rows])
+    del dicts
+    records, record_bytes = retained(lambda: [FileRecord.from_json(row) for row in rows])
+    del records
+
+    return {
+        "meta": {
+            "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "params": {"files": args.files, "functions": args.functions,
+                   "metrics": args.metrics, "seed": args.seed},
+        "analysis_seconds": round(analysis, 3),
+        "num_functions": num_functions,
+        "dicts_bytes": dict_bytes,
+        "records_bytes": record_bytes,
+        "bytes_per_function": {
+            "dicts": round(dict_bytes / max(1, num_functions), 1),
+            "records": round(record_bytes / max(1, num_functions), 1),
+        },
+        "savings": round(1 - record_bytes / dict_bytes, 3) if dict_bytes else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--functions", type=int, default=50, help="Funciones por archivo")
+    parser.add_argument("--metrics", type=lambda v: [m for m in v.split(",") if m],
+                        default=["lines", "todos", "imports", "functions"],
+                        help="Métricas a calcular (separadas por comas)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Fichero JSON de salida (por defecto stdout)")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(args)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Mide el tiempo de importación/arranque de la aplicación en procesos limpios.
+
+Cada medición lanza un intérprete nuevo (como haría un worker pre-fork o una
+invocación corta de la CLI) y cronometra el import de cada módulo de entrada.
+Se ejecuta en un directorio temporal con REPO_ANALYZER_HOME apuntando a él,
+y comprueba que el import no deja ficheros creados (arranque sin efectos secundarios).
+
+Uso:
+    python bench/startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Módulo de entrada -> sentencia a cronometrar
+TARGETS = {
+    "config": "import config",
+    "proxy": "from proxy.proxy_subject import ProxySubject; ProxySubject()",
+    "app": "import app",
+    "cli": "import cli",
+}
+
+SNIPPET = """
+import time
+t0 = time.perf_counter()
+{stmt}
+print((time.perf_counter() - t0) * 1000)
+"""
+
+def measure(stmt: str, runs: int, workdir: Path) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(PROJECT_ROOT)
+    env["REPO_ANALYZER_HOME"] = str(workdir)
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(stmt=stmt)],
+            cwd=workdir, env=env, capture_output=True, text=True, check=True
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    samples.sort()
+    return {
+        "runs": runs,
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(samples[0], 2),
+        "max_ms": round(samples[-1], 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        results = {name: measure(stmt, args.runs, workdir) for name, stmt in TARGETS.items()}
+        results["side_effects"] = sorted(p.name for p in workdir.iterdir())
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
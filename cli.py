@@ -0,0 +1,190 @@
+"""
+Interfaz de línea de comandos del analizador.
+Usa el mismo ProxySubject que la web (caché en SQLite incluida), pero sin Flask.
+
+Ejemplos:
+    python cli.py analyze https://github.com/usuario/repo.git --force
+    python cli.py analyze https://github.com/usuario/repo.git --metrics lines,imports
+    python cli.py analyze https://github.com/usuario/repo.git --ref v1.2
+    python cli.py analyze https://github.com/usuario/repo.git --approximate --sample-seconds 5
+    python cli.py analyze ./dist/paquete-1.0.tar.gz      (también directorios y .zip, sin clonar)
+    python cli.py analyze https://github.com/usuario/repo.git --profile --summary-only
+    python cli.py sweep https://github.com/usuario/repo.git --every 20 --workers 4
+    python cli.py rollout --metrics duplication,maintainability
+    python cli.py export --level functions --format csv --where "cc>=10" --output funciones.csv
+    python cli.py metrics
+    python cli.py history --limit 10
+    python cli.py trend https://github.com/usuario/repo.git --path src/main.py
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+# Marca de tiempo al inicio del proceso, para medir el arranque con --timing
+_T0 = time.perf_counter()
+
+def _csv(value: str):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+class Export:
+    """
+    Salida de 'export': texto (NDJSON o CSV) que se escribe según se genera,
+    en vez del JSON del resto de comandos.
+    """
+
+    def __init__(self, chunks, path=None):
+        self.chunks = chunks
+        self.path = path
+
+    def write(self, stdout) -> None:
+        with (open(self.path, "w", encoding="utf-8", newline="") if self.path
+              else contextlib.nullcontext(stdout)) as out:
+            for chunk in self.chunks:
+                out.write(chunk)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="repo-analyzer", description="Analizador de calidad de repositorios Python")
+    parser.add_argument("--timing", action="store_true", help="Muestra en stderr el tiempo de arranque y de ejecución")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_analyze = sub.add_parser("analyze", help="Analiza un repositorio (usa la caché si existe)")
+    p_analyze.add_argument("repo_url", help="URL git, directorio local o archivo .tar(.gz)/.zip")
+    p_analyze.add_argument("--force", action="store_true", help="Ignora la caché y recalcula")
+    p_analyze.add_argument("--ref", default=None,
+                           help="Rama, tag o commit a analizar (por defecto la rama principal)")
+    p_analyze.add_argument("--summary-only", action="store_true", help="Imprime solo el resumen")
+    p_analyze.add_argument("--metrics", type=_csv, default=None,
+                           help="Subconjunto de métricas separadas por comas (por defecto todas)")
+    p_analyze.add_argument("--dup-window", type=int, default=None,
+                           help="Ventana de duplicación (por defecto la de la configuración)")
+    p_analyze.add_argument("--approximate", action="store_true",
+                           help="Estima el resumen con una muestra estratificada (no se guarda en la caché)")
+    p_analyze.add_argument("--sample-seconds", type=float, default=None,
+                           help="Presupuesto de tiempo del modo aproximado")
+    p_analyze.add_argument("--sample-fraction", type=float, default=None,
+                           help="Fracción máxima de archivos del modo aproximado")
+    p_analyze.add_argument("--seed", type=int, default=None, help="Semilla del muestreo")
+    p_analyze.add_argument("--stream", action="store_true",
+                           help="Escribe cada archivo en la BD según se calcula (la salida no incluye files)")
+    p_analyze.add_argument("--deadline", type=float, default=None,
+                           help="Tiempo máximo (s); si se agota devuelve un informe parcial reanudable")
+    p_analyze.add_argument("--profile", action="store_true",
+                           help="Perfila CPU y memoria (recalcula; artefactos en profiles_dir/<id>)")
+
+    p_sweep = sub.add_parser("sweep", help="Analiza varios commits del historial (tendencias)")
+    p_sweep.add_argument("repo_url")
+    p_sweep.add_argument("--range", dest="revision", default=None,
+                         help="Rango o ref a recorrer (ej. v1.0..main); por defecto la rama principal")
+    p_sweep.add_argument("--ref", default=None, help="Rama cuya historia se recorre (y serie donde se guarda)")
+    p_sweep.add_argument("--every", type=int, default=1, help="Uno de cada N commits")
+    p_sweep.add_argument("--tags", action="store_true", help="Analiza cada tag en vez de cada commit")
+    p_sweep.add_argument("--limit", type=int, default=None, help="Solo los N commits más recientes")
+    p_sweep.add_argument("--workers", type=int, default=None,
+                         help="Procesos para los archivos nuevos (por defecto uno por CPU)")
+    p_sweep.add_argument("--force", action="store_true", help="Actualiza el mirror y recalcula todo")
+    p_sweep.add_argument("--metrics", type=_csv, default=None)
+    p_sweep.add_argument("--dup-window", type=int, default=None)
+
+    p_rollout = sub.add_parser("rollout",
+                               help="Añade métricas a los análisis guardados desde el IR (sin clonar ni parsear)")
+    p_rollout.add_argument("--metrics", type=_csv, required=True)
+    p_rollout.add_argument("--repo", dest="repo_url", default=None, help="Solo este repositorio")
+
+    p_export = sub.add_parser("export", help="Exporta en streaming los análisis guardados (NDJSON o CSV)")
+    p_export.add_argument("--level", choices=("analyses", "files", "functions"), default="analyses")
+    p_export.add_argument("--format", dest="fmt", choices=("ndjson", "csv"), default="ndjson")
+    p_export.add_argument("--repo", dest="repo_url", default=None, help="Solo este repositorio")
+    p_export.add_argument("--since", default=None, help="Desde esta fecha ISO (ej. 2026-01-01)")
+    p_export.add_argument("--until", default=None, help="Hasta esta fecha ISO, inclusiva (ej. 2026-03)")
+    p_export.add_argument("--where", action="append", default=[],
+                          help="Umbral 'columna op valor' (repetible, ej. --where 'cc>=10')")
+    p_export.add_argument("--output", default=None, help="Fichero de salida (por defecto stdout)")
+
+    sub.add_parser("metrics", help="Lista las métricas disponibles con sus entradas y coste")
+
+    p_history = sub.add_parser("history", help="Lista los últimos análisis")
+    p_history.add_argument("--limit", type=int, default=50)
+
+    p_trend = sub.add_parser("trend", help="Evolución temporal de un repositorio o archivo")
+    p_trend.add_argument("repo_url")
+    p_trend.add_argument("--path", default=None)
+    p_trend.add_argument("--metrics", type=_csv, default=None)
+    p_trend.add_argument("--ref", default=None, help="Serie de una rama o tag (por defecto la principal)")
+
+    return parser
+
+def run(args: argparse.Namespace) -> object:
+    """
+    Ejecuta el subcomando y devuelve el objeto a imprimir como JSON.
+    """
+    # Import diferido: '--help' o un error de argumentos no cargan el backend
+    if args.command == "metrics":
+        from metrics.registry import describe_metrics
+        return describe_metrics()
+
+    from proxy.proxy_subject import ProxySubject
+    subject = ProxySubject()
+
+    if args.command == "analyze":
+        result = subject.peticion(args.repo_url, force=args.force, metrics=args.metrics,
+                                  options={"dup_window": args.dup_window,
+                                           "approximate": args.approximate,
+                                           "sample_seconds": args.sample_seconds,
+                                           "sample_fraction": args.sample_fraction,
+                                           "seed": args.seed,
+                                           "deadline": args.deadline,
+                                           "stream": args.stream,
+                                           "profile": args.profile,
+                                           "ref": args.ref})
+        if args.summary_only:
+            return {k: v for k, v in result.items() if k != "files"}
+        return result
+    if args.command == "sweep":
+        return subject.sweep(args.repo_url, args.revision, every=args.every, tags=args.tags,
+                             limit=args.limit, force=args.force, metrics=args.metrics,
+                             options={"dup_window": args.dup_window, "ref": args.ref,
+                                      "workers": args.workers})
+    if args.command == "export":
+        from repo.export import render
+        rows = subject.export(args.level, args.repo_url, args.since, args.until, args.where)
+        return Export(render(rows, args.level, args.fmt), args.output)
+    if args.command == "rollout":
+        return subject.rollout(args.metrics, args.repo_url)
+    if args.command == "history":
+        return subject.db_manager.list_analyses(limit=args.limit)
+    if args.command == "trend":
+        return subject.trend(args.repo_url, args.path, args.metrics, args.ref)
+    raise ValueError(f"Comando desconocido: {args.command}")
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    t_start = time.perf_counter()
+    try:
+        # Los mensajes de diagnóstico ([Proxy], [RepoManager]...) van a stderr
+        # para que stdout contenga solo el JSON
+        stdout = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            output = run(args)
+            if isinstance(output, Export):
+                output.write(stdout)
+    except Exception as e:
+        print(f"[CLI] Error: {e}", file=sys.stderr)
+        return 1
+
+    if not isinstance(output, Export):
+        from metrics.records import json_default
+        json.dump(output, sys.stdout, indent=2, ensure_ascii=False, default=json_default)
+        sys.stdout.write("\n")
+
+    if args.timing:
+        print(
+            f"[CLI] arranque: {(t_start - _T0) * 1000:.1f} ms | "
+            f"ejecución: {(time.perf_counter() - t_start) * 1000:.1f} ms",
+            file=sys.stderr
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,47 @@
 import os
+import threading
 from pathlib import Path
 
+# Prefijo de las variables de entorno que sobrescriben la configuración
+ENV_PREFIX = "REPO_ANALYZER_"
+
+# Raíz del proyecto: carpeta donde vive este fichero (independiente del cwd)
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+def _env(name: str, default=None):
+    """
+    Lee una variable de entorno con el prefijo de la aplicación.
+    """
+    return os.environ.get(ENV_PREFIX + name, default)
+
+def _env_int(name: str, default: int) -> int:
+    """
+    Lee una variable de entorno entera. Si no es válida se usa el valor por defecto.
+    """
+    try:
+        return int(_env(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def _env_float(name: str, default: float) -> float:
+    """
+    Lee una variable de entorno decimal. Si no es válida se usa el valor por defecto.
+    """
+    try:
+        return float(_env(name, default))
+    except (TypeError, ValueError):
+        return default
+
 class ConfigSingleton:
     """
     Clase Singleton para gestionar la configuración global de la aplicación.
     Almacena rutas y parámetros por defecto.
+    Los valores se pueden sobrescribir con variables de entorno REPO_ANALYZER_*.
+    Construirla no tiene efectos secundarios (no crea carpetas ni escribe en consola).
     """
     _instance = None
+    # Protege la creación de la instancia cuando varios hilos la piden a la vez
+    _lock = threading.Lock()
 
     def __init__(self):
         """
@@ -15,38 +50,97 @@ class ConfigSingleton:
         """
         if ConfigSingleton._instance is not None:
             raise Exception("Esta clase es un Singleton. Usa ConfigSIngleton.get_instance().")
-        
-        # Obtiene el directorio de trabajo actual (root del proyecto) 
-        self.base_dir = Path(os.getcwd())
+
+        # Directorio base de datos y caché: REPO_ANALYZER_HOME o la raíz del proyecto
+        self.base_dir = Path(_env("HOME", PROJECT_ROOT))
 
         # 1. Directorio donde descargaremos los repositorios (ignorando en .gitignore)
-        self.repo_cache_dir = self.base_dir / "repo_cache"
+        self.repo_cache_dir = Path(_env("CACHE_DIR", self.base_dir / "repo_cache"))
 
         # 2. Ruta del fichero de Base de Datos SQLite
-        self.db_path = self.base_dir / "analysis_v2.db"
+        self.db_path = Path(_env("DB_PATH", self.base_dir / "analysis_v2.db"))
 
         # 3. Ventana por defecto para detección de duplicados
-        self.duplication_window = 4
+        self.duplication_window = _env_int("DUP_WINDOW", 4)
+
+        # 4. Parámetros de las estadísticas agregadas del repositorio
+        self.hotspots_top_n = _env_int("HOTSPOTS_TOP_N", 10)
+        self.histogram_bins = _env_int("HISTOGRAM_BINS", 10)
 
-        # Crear el directorio de caché automáticamente si no existe
-        self._ensure_directories()
+        # 5. Cada cuántos análisis de un mismo repo se guarda un keyframe completo
+        #    (el resto se guardan como deltas por archivo)
+        self.trend_keyframe_interval = _env_int("TREND_KEYFRAME_INTERVAL", 10)
+
+        # 6. Concurrencia: espera máxima (s) por el lock de SQLite y por el de un repo
+        self.db_timeout = _env_int("DB_TIMEOUT", 30)
+        self.repo_lock_timeout = _env_int("REPO_LOCK_TIMEOUT", 600)
+
+        # 7. Tamaño de página de la tabla de archivos en la UI
+        self.page_size = _env_int("PAGE_SIZE", 50)
+
+        # 8. Clones estructurales: tamaño mínimo (nodos AST) de un fragmento
+        #    y número de clases de clones que se muestran
+        self.clone_min_nodes = _env_int("CLONE_MIN_NODES", 25)
+        self.clones_top_n = _env_int("CLONES_TOP_N", 10)
+
+        # 9. Modo aproximado (muestreo): presupuesto de tiempo (s), precisión
+        #    objetivo (semiamplitud relativa del IC 95%) y archivos por lote
+        self.sample_seconds = _env_int("SAMPLE_SECONDS", 10)
+        self.sample_precision = _env_float("SAMPLE_PRECISION", 0.02)
+        self.sample_batch = _env_int("SAMPLE_BATCH", 50)
+
+        # 10. Tiempo máximo (s) de un análisis (clonado + búsqueda + métricas).
+        #     0 = sin límite. Al agotarse se guarda un informe parcial que se continúa después.
+        self.analysis_deadline = _env_int("ANALYSIS_DEADLINE", 0)
+
+        # 11. Streaming: escribir cada archivo en la BD según se calcula en vez de
+        #     acumular el informe en memoria (recomendado en monorepos). 0/1.
+        self.stream_results = bool(_env_int("STREAM_RESULTS", 0))
+
+        # 12. Barrido del historial: procesos que calculan los blobs nuevos.
+        #     0 = uno por CPU; 1 = en el propio proceso (sin pool).
+        self.sweep_workers = _env_int("SWEEP_WORKERS", 0)
+
+        # 13. Revalidación en segundo plano (solo la web): un acierto de caché más
+        #     antiguo que 'freshness_ttl' (s) comprueba el remoto con git ls-remote sin
+        #     hacer esperar a la petición; cada 'revalidate_interval' (s) se comprueban
+        #     todos los repos ya analizados (0 = desactivado).
+        self.freshness_ttl = _env_int("FRESHNESS_TTL", 300)
+        self.revalidate_interval = _env_int("REVALIDATE_INTERVAL", 0)
+
+        # 14. Planificador (proxy/scheduler.py): clonados/fetch simultáneos
+        #     (0 = sin límite) y análisis simultáneos (0 = uno por CPU), por proceso
+        self.io_slots = _env_int("IO_SLOTS", 4)
+        self.cpu_slots = _env_int("CPU_SLOTS", 0)
+
+        # 15. Representación intermedia por contenido (metrics/ir.py): se guarda al
+        #     analizar y permite calcular métricas nuevas sin releer ni parsear
+        self.persist_ir = bool(_env_int("PERSIST_IR", 1))
+
+        # 16. Carpeta de los perfiles de CPU y memoria de los análisis perfilados
+        #     (una subcarpeta por id de análisis)
+        self.profiles_dir = Path(_env("PROFILES_DIR", self.base_dir / "profiles"))
 
     @staticmethod
     def get_instance():
         """
         Método estático de acceso a la instancia única
         """
+        # Double-checked locking: el caso común (ya creada) no toma el lock
         if ConfigSingleton._instance is None:
-            ConfigSingleton._instance = ConfigSingleton()
+            with ConfigSingleton._lock:
+                if ConfigSingleton._instance is None:
+                    ConfigSingleton._instance = ConfigSingleton()
         return ConfigSingleton._instance
-    
-    def _ensure_directories(self):
+
+    def ensure_directories(self):
         """
         Asegurar que los directorios necesarios existan.
+        Se llama bajo demanda (antes de clonar o de abrir la BD), no al arrancar.
         """
-        self.repo_cache_dir.mkdir(exist_ok=True)
-        print(f"[Config] Directorio de caché asegurado en: {self.repo_cache_dir}")
-    
+        self.repo_cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
     def as_dict(self) -> dict:
         """
         Devuelve la configuración actual como diccionario
@@ -54,5 +148,25 @@ class ConfigSingleton:
         return{
             "repo_cache_dir": str(self.repo_cache_dir),
             "db_path": str(self.db_path),
-            "duplication_window": self.duplication_window
-        }
\ No newline at end of file
+            "duplication_window": self.duplication_window,
+            "hotspots_top_n": self.hotspots_top_n,
+            "histogram_bins": self.histogram_bins,
+            "trend_keyframe_interval": self.trend_keyframe_interval,
+            "db_timeout": self.db_timeout,
+            "repo_lock_timeout": self.repo_lock_timeout,
+            "page_size": self.page_size,
+            "clone_min_nodes": self.clone_min_nodes,
+            "clones_top_n": self.clones_top_n,
+            "sample_seconds": self.sample_seconds,
+            "sample_precision": self.sample_precision,
+            "sample_batch": self.sample_batch,
+            "analysis_deadline": self.analysis_deadline,
+            "stream_results": self.stream_results,
+            "sweep_workers": self.sweep_workers,
+            "freshness_ttl": self.freshness_ttl,
+            "revalidate_interval": self.revalidate_interval,
+            "io_slots": self.io_slots,
+            "cpu_slots": self.cpu_slots,
+            "persist_ir": self.persist_ir,
+            "profiles_dir": str(self.profiles_dir)
+        }
@@ -0,0 +1,49 @@
+import time
+from typing import Any, Dict, Optional
+
+class DeadlineExceeded(RuntimeError):
+    """
+    Se agotó el presupuesto de tiempo de un análisis.
+    'stage' indica la fase en la que ocurrió: "clone", "discovery" o "metrics".
+    """
+
+    def __init__(self, stage: str):
+        super().__init__(f"Tiempo de análisis agotado durante la fase '{stage}'")
+        self.stage = stage
+
+class Deadline:
+    """
+    Presupuesto de tiempo de un análisis completo (clonado, búsqueda de
+    archivos y métricas). Se crea al empezar la petición y se pasa a cada fase,
+    que consulta 'remaining()' o llama a 'check()' entre unidades de trabajo.
+    Sin segundos (None o <= 0) no hay límite.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds if seconds and seconds > 0 else None
+        self.started = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> Optional[float]:
+        """
+        Segundos que quedan (nunca negativos), o None si no hay límite.
+        """
+        if self.seconds is None:
+            return None
+        return max(self.seconds - self.elapsed(), 0.0)
+
+    def expired(self) -> bool:
+        return self.seconds is not None and self.elapsed() >= self.seconds
+
+    def check(self, stage: str) -> None:
+        """
+        Raises:
+            DeadlineExceeded: si el tiempo se ha agotado.
+        """
+        if self.expired():
+            raise DeadlineExceeded(stage)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"seconds": self.seconds, "elapsed": round(self.elapsed(), 3)}
@@ -0,0 +1,149 @@
+import heapq
+import math
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+class RepoStatsAggregator:
+    """
+    Acumulador de estadísticas a nivel de repositorio.
+    Recoge en una sola pasada los valores de cada fichero y de cada función
+    y al final calcula percentiles, histogramas y los 'hotspots' (funciones
+    más complejas) sin necesidad de volver a recorrer el detalle por archivo.
+    """
+
+    # Métricas por fichero: clave en el dict de métricas -> rango fijo del histograma (o None)
+    FILE_METRICS: Dict[str, Optional[Tuple[float, float]]] = {
+        "maintainability": (0.0, 100.0),
+        "loc": None,
+        "duplication": (0.0, 1.0),
+    }
+
+    # Métricas por función (salida de FunctionsStrategy)
+    FUNCTION_METRICS: Dict[str, Optional[Tuple[float, float]]] = {
+        "cc": None,
+        "max_nesting": None,
+        "loc": None,
+    }
+
+    PERCENTILES = (50, 75, 90, 95, 99)
+
+    def __init__(self, top_n: int = 10, bins: int = 10):
+        self.top_n = top_n
+        self.bins = bins
+        # array('d') guarda los valores como doubles contiguos (mucho más compacto que una lista)
+        self._file_values: Dict[str, array] = {k: array("d") for k in self.FILE_METRICS}
+        self._func_values: Dict[str, array] = {k: array("d") for k in self.FUNCTION_METRICS}
+        # Min-heap acotado a top_n: la raíz es el hotspot "menos caliente" de los guardados
+        self._hotspots: List[Tuple[int, int, int, int, str, str]] = []
+        self._seq = 0
+
+    def add_file(self, metrics: Dict[str, Any]) -> None:
+        """
+        Incorpora las métricas de un fichero (y de sus funciones) al acumulado.
+        """
+        for key, values in self._file_values.items():
+            value = metrics.get(key)
+            if value is not None:
+                values.append(float(value))
+
+        path = metrics.get("path", "")
+        for func_name, func_metrics in (metrics.get("functions") or {}).items():
+            for key, values in self._func_values.items():
+                value = func_metrics.get(key)
+                if value is not None:
+                    values.append(float(value))
+            self._push_hotspot(path, func_name, func_metrics)
+
+    def _push_hotspot(self, path: str, func_name: str, func_metrics: Dict[str, Any]) -> None:
+        """
+        Mantiene las top_n funciones ordenadas por (CC, anidamiento, LOC).
+        Coste O(log N) por función y memoria O(N).
+        """
+        if self.top_n <= 0:
+            return
+        # El contador negativo desempata a favor de la primera función vista
+        self._seq += 1
+        entry = (
+            func_metrics.get("cc", 0),
+            func_metrics.get("max_nesting", 0),
+            func_metrics.get("loc", 0),
+            -self._seq,
+            path,
+            func_name,
+        )
+        if len(self._hotspots) < self.top_n:
+            heapq.heappush(self._hotspots, entry)
+        elif entry > self._hotspots[0]:
+            heapq.heapreplace(self._hotspots, entry)
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Devuelve las distribuciones y hotspots listos para guardarse en el 'summary'.
+        """
+        return {
+            "distributions": {
+                "files": {
+                    k: self._describe(self._file_values[k], rng)
+                    for k, rng in self.FILE_METRICS.items()
+                },
+                "functions": {
+                    k: self._describe(self._func_values[k], rng)
+                    for k, rng in self.FUNCTION_METRICS.items()
+                },
+            },
+            "hotspots": [
+                {"path": path, "function": name, "cc": cc, "max_nesting": nesting, "loc": loc}
+                for cc, nesting, loc, _, path, name in sorted(self._hotspots, reverse=True)
+            ],
+        }
+
+    def _describe(self, values: array, fixed_range: Optional[Tuple[float, float]]) -> Dict[str, Any]:
+        """
+        Calcula estadísticos descriptivos de una serie de valores.
+        """
+        count = len(values)
+        if count == 0:
+            return {"count": 0}
+
+        ordered = sorted(values)
+        stats = {
+            "count": count,
+            "min": round(ordered[0], 4),
+            "max": round(ordered[-1], 4),
+            "mean": round(math.fsum(ordered) / count, 4),
+        }
+        for p in self.PERCENTILES:
+            stats[f"p{p}"] = round(self._percentile(ordered, p), 4)
+        stats["histogram"] = self._histogram(ordered, fixed_range)
+        return stats
+
+    @staticmethod
+    def _percentile(ordered: List[float], p: float) -> float:
+        """
+        Percentil con interpolación lineal (mismo criterio que numpy 'linear').
+        """
+        if len(ordered) == 1:
+            return ordered[0]
+        pos = (len(ordered) - 1) * p / 100.0
+        low = math.floor(pos)
+        high = min(low + 1, len(ordered) - 1)
+        frac = pos - low
+        return ordered[low] + (ordered[high] - ordered[low]) * frac
+
+    def _histogram(self, ordered: List[float], fixed_range: Optional[Tuple[float, float]]) -> Dict[str, List]:
+        """
+        Histograma de anchura fija. Si la métrica tiene rango conocido (MI, duplicación)
+        se usa ese rango para que los histogramas de distintos repos sean comparables.
+        """
+        low, high = fixed_range if fixed_range else (ordered[0], ordered[-1])
+        if high <= low:
+            return {"edges": [round(low, 4), round(high, 4)], "counts": [len(ordered)]}
+
+        width = (high - low) / self.bins
+        counts = [0] * self.bins
+        for value in ordered:
+            idx = int((value - low) / width)
+            # El valor máximo cae en el último bin (intervalo cerrado por la derecha)
+            counts[min(max(idx, 0), self.bins - 1)] += 1
+        edges = [round(low + i * width, 4) for i in range(self.bins + 1)]
+        return {"edges": edges, "counts": counts}
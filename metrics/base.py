@@ -1,13 +1,40 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Dict, Tuple
 
 class MetricStrategy(ABC):
     """
     Clase base abstracta (Interfaz) para las estrategias de métricas.
     Define el contrato que todas las métricas concretas deben seguir.
     Patrón: Strategy
+
+    Cada estrategia declara además sus metadatos para el registro (metrics/registry.py):
+        name:       identificador con el que se selecciona (ej. "duplication").
+        output_key: clave donde se guarda el resultado en las métricas del archivo.
+        inputs:     entradas que necesita, la primera es la que recibe 'compute':
+                    "text" (contenido), "lines" (lista de líneas), "ast" (árbol), "path"
+                    o "source" (contenido leído, aunque no compile). Las demás llegan
+                    como kwargs con su nombre (ej. ("path", "source") -> source=...).
+        cost:       coste relativo (1 = trivial). Sirve para informar y ordenar.
+        options:    argumentos de 'compute' que vienen de las opciones de la petición
+                    ({kwarg: clave_opción}, ej. {"window": "dup_window"}).
+        repo_wide:  el resultado se agrega entre archivos (ej. clones), así que al
+                    reutilizar métricas guardadas hay que volver a calcularla.
+        supports_ir: sabe calcularse con 'compute_ir' desde la representación
+                    intermedia guardada (metrics/ir.py), sin leer ni parsear el archivo.
+        supports_tokens: si el archivo no compila, da una aproximación con
+                    'compute_tokens' desde el flujo de tokens (metrics/fallback.py)
+                    en vez del valor vacío de 'compute' sin AST.
     """
 
+    name: str = ""
+    output_key: str = ""
+    inputs: Tuple[str, ...] = ("text",)
+    cost: int = 1
+    options: Dict[str, str] = {}
+    repo_wide: bool = False
+    supports_ir: bool = False
+    supports_tokens: bool = False
+
     @abstractmethod
     def compute(self, data: Any, **kwargs) -> Any:
         """
@@ -17,8 +44,30 @@ class MetricStrategy(ABC):
             data: Puede ser un string (código fuente), un nodo AST,
                   o un Path (ruta la fichero, dependiendo de la estrategia.
             **kwargs: Argumentos opcionales (ej. window size para duplicación.)
-        
+
         Returns:
             El resultado de la métrica (int, float, dict, etc.)
         """
-        pass
\ No newline at end of file
+        pass
+
+    def compute_ir(self, ir: Dict[str, Any], tree=None, **kwargs) -> Any:
+        """
+        Calcula la métrica desde la representación intermedia de un archivo.
+        Debe dar exactamente lo mismo que 'compute' con el contenido original.
+
+        Args:
+            ir (dict): IR del archivo (ver metrics.ir.build_ir).
+            tree (IRNode): Árbol ligero ya reconstruido (None si no compilaba).
+            **kwargs: Las mismas opciones que 'compute' (ej. window).
+        """
+        raise NotImplementedError(f"La métrica '{self.name}' no se puede calcular desde el IR")
+
+    def compute_tokens(self, scan: Dict[str, Any], **kwargs) -> Any:
+        """
+        Aproxima la métrica de un archivo que no compila.
+
+        Args:
+            scan (dict): Resultado de metrics.fallback.scan_tokens sobre su contenido.
+            **kwargs: Las mismas opciones que 'compute'.
+        """
+        raise NotImplementedError(f"La métrica '{self.name}' no tiene aproximación por tokens")
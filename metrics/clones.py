@@ -0,0 +1,159 @@
+import ast
+import hashlib
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
+
+from .base import MetricStrategy
+from .registry import register_strategy
+
+# Fragmento: (hash, nº de nodos, tipo, nombre, línea inicio, línea fin, hash del fragmento padre)
+Fragment = Tuple[bytes, int, str, str, int, int, Optional[bytes]]
+
+# Sentencias que se indexan como fragmentos
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+BLOCK_NODES = (ast.For, ast.AsyncFor, ast.While, ast.If, ast.With, ast.AsyncWith, ast.Try)
+
+# Campos que no aportan estructura (contexto Load/Store, comentarios de tipo...)
+IGNORED_FIELDS = {"ctx", "type_comment", "kind"}
+
+@register_strategy
+class CloneStrategy(MetricStrategy):
+    """
+    Estrategia que calcula la huella estructural de las funciones y bloques de un fichero.
+    El hash de cada subárbol ignora identificadores y valores literales (solo
+    conserva su tipo), así que una copia con variables renombradas tiene el mismo hash.
+    El cruce entre ficheros lo hace CloneIndex (no hay comparación por parejas).
+    """
+    name = "clones"
+    output_key = "clones"
+    inputs = ("ast",)
+    cost = 4
+    options = {"min_nodes": "clone_min_nodes"}
+    repo_wide = True
+
+    def compute(self, ast_node: Any, **kwargs) -> List[Fragment]:
+        """
+        Args:
+            ast_node (ast.AST): Árbol del módulo (el mismo que usan el resto de métricas).
+            min_nodes (int, opcional): Tamaño mínimo (en nodos) de un fragmento. Default: 25.
+
+        Returns:
+            List[Fragment]: Fragmentos indexables del fichero.
+        """
+        if not isinstance(ast_node, ast.AST):
+            return []
+        min_nodes = kwargs.get("min_nodes", 25)
+        fragments: List[Fragment] = []
+        self._hash(ast_node, min_nodes, fragments, [])
+        return fragments
+
+    def _hash(self, node: ast.AST, min_nodes: int, fragments: List[Fragment],
+              orphans: List[int]) -> Tuple[bytes, int]:
+        """
+        Hash normalizado y tamaño de un subárbol, en postorden: cada nodo se visita
+        una vez y combina los hashes (de tamaño fijo) de sus hijos, así que el coste
+        es lineal en el tamaño del fichero.
+        'orphans' son los índices de fragmentos que aún no tienen padre.
+        """
+        first_child = len(fragments)
+        parts = [type(node).__name__.encode()]
+        size = 1
+        for field, value in ast.iter_fields(node):
+            if field in IGNORED_FIELDS:
+                continue
+            parts.append(field.encode())
+            children = value if isinstance(value, list) else [value]
+            for child in children:
+                if isinstance(child, ast.AST):
+                    digest, child_size = self._hash(child, min_nodes, fragments, orphans)
+                    parts.append(digest)
+                    size += child_size
+                else:
+                    # Identificadores y literales se abstraen: solo cuenta su tipo
+                    parts.append(type(child).__name__.encode())
+
+        digest = hashlib.blake2b(b"|".join(parts), digest_size=16).digest()
+
+        if isinstance(node, FUNCTION_NODES + BLOCK_NODES) and size >= min_nodes:
+            kind = "function" if isinstance(node, FUNCTION_NODES) else "block"
+            name = getattr(node, "name", type(node).__name__.lower())
+            # Los fragmentos sin padre registrados dentro de este nodo son sus hijos
+            while orphans and orphans[-1] >= first_child:
+                i = orphans.pop()
+                fragments[i] = fragments[i][:6] + (digest,)
+            orphans.append(len(fragments))
+            fragments.append((digest, size, kind, name,
+                              getattr(node, "lineno", 0), getattr(node, "end_lineno", 0), None))
+
+        return digest, size
+
+
+class CloneIndex:
+    """
+    Índice de fragmentos de todo el repositorio (hash -> ubicaciones).
+    Se llena en una pasada junto al resto de métricas; las clases de clones son
+    los hashes con dos o más ubicaciones. Coste lineal en el número de fragmentos.
+    """
+
+    # Ubicaciones mostradas por clase (el recuento sí es completo)
+    MAX_LOCATIONS = 10
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        # hash -> [(path, tipo, nombre, inicio, fin, hash padre)]
+        self._locations: Dict[bytes, List[Tuple[str, str, str, int, int, Optional[bytes]]]] = {}
+        self._sizes: Dict[bytes, int] = {}
+
+    def add(self, path: str, fragments: List[Fragment]) -> None:
+        for digest, size, kind, name, start, end, parent in fragments:
+            self._locations.setdefault(digest, []).append((path, kind, name, start, end, parent))
+            self._sizes[digest] = size
+
+    def result(self) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        Returns:
+            (resumen, {path: nº de fragmentos clonados del fichero})
+            Solo se cuentan las clases maximales: un fragmento cuyo padre
+            también está clonado ya queda cubierto por la clase del padre.
+        """
+        cloned = {d for d, locs in self._locations.items() if len(locs) > 1}
+        per_file: Dict[str, int] = {}
+        classes = []
+        fragments = 0
+        cloned_lines = 0
+
+        for digest in cloned:
+            locations = self._locations[digest]
+            if all(loc[5] in cloned for loc in locations):
+                continue
+            fragments += len(locations)
+            for path, _, _, start, end, _ in locations:
+                per_file[path] = per_file.get(path, 0) + 1
+                cloned_lines += end - start + 1
+            # Peso: nodos que sobran (todas las copias menos una)
+            weight = self._sizes[digest] * (len(locations) - 1)
+            first = min(locations, key=lambda loc: (loc[0], loc[3]))
+            classes.append((weight, first[0], first[3], digest))
+
+        # Las clases más pesadas primero; a igual peso, por ubicación (determinista)
+        top = heapq.nsmallest(self.top_n, classes, key=lambda c: (-c[0], c[1], c[2]))
+        summary = {
+            "classes": len(classes),
+            "fragments": fragments,
+            "cloned_lines": cloned_lines,
+            "top": [self._describe(digest) for _, _, _, digest in top],
+        }
+        return summary, per_file
+
+    def _describe(self, digest: bytes) -> Dict[str, Any]:
+        locations = sorted(self._locations[digest], key=lambda loc: (loc[0], loc[3]))
+        return {
+            "hash": digest.hex(),
+            "kind": locations[0][1],
+            "size": self._sizes[digest],
+            "count": len(locations),
+            "locations": [
+                {"path": path, "name": name, "start": start, "end": end}
+                for path, _, name, start, end, _ in locations[:self.MAX_LOCATIONS]
+            ],
+        }
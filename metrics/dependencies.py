@@ -0,0 +1,244 @@
+import ast
+import heapq
+from pathlib import PurePosixPath
+from typing import Any, Dict, List, Optional
+
+from .base import MetricStrategy
+from .registry import register_strategy
+
+@register_strategy
+class DependenciesStrategy(MetricStrategy):
+    """
+    Estrategia que recoge los módulos que importa un fichero (sobre el mismo AST
+    que el resto de métricas). Solo depende del contenido: los imports relativos
+    se guardan con sus puntos (".x", "..pkg.y") y se resuelven al construir el grafo,
+    cuando se conoce la ruta del fichero y el resto de módulos del repositorio.
+    """
+    name = "dependencies"
+    output_key = "dependencies"
+    inputs = ("ast",)
+    cost = 2
+    supports_ir = True
+    supports_tokens = True
+
+    def compute(self, ast_node: Any, **kwargs) -> List[str]:
+        """
+        Args:
+            ast_node (ast.AST): Árbol del módulo.
+
+        Returns:
+            List[str]: Destinos importados, ordenados y sin repetir.
+                "from a import b" se guarda como "a.b": si 'b' no es un módulo,
+                al resolver se cae a "a".
+        """
+        if not isinstance(ast_node, ast.AST):
+            return []
+        targets = set()
+        for node in ast.walk(ast_node):
+            if isinstance(node, ast.Import):
+                targets.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                self._add_from(targets, "." * node.level + (node.module or ""),
+                               [alias.name for alias in node.names])
+        return sorted(targets)
+
+    def compute_ir(self, ir: Dict[str, Any], tree=None, **kwargs) -> List[str]:
+        if tree is None:
+            return []
+        targets = set()
+        for node in tree.walk():
+            # Los hijos de un import son sus alias (etiqueta = nombre importado)
+            if node.type == "Import":
+                targets.update(alias.label for alias in node.children)
+            elif node.type == "ImportFrom":
+                module, level = node.label
+                self._add_from(targets, "." * level + module,
+                               [alias.label for alias in node.children])
+        return sorted(targets)
+
+    def compute_tokens(self, scan: Dict[str, Any], **kwargs) -> List[str]:
+        targets = set()
+        for base, names in scan["imports"]:
+            if base is None:
+                targets.update(names)
+            else:
+                self._add_from(targets, base, names)
+        return sorted(targets)
+
+    @staticmethod
+    def _add_from(targets: set, base: str, names: List[str]) -> None:
+        for name in names:
+            if name == "*":
+                targets.add(base)
+            elif base.endswith(".") or not base:
+                targets.add(base + name)
+            else:
+                targets.add(f"{base}.{name}")
+
+
+class DependencyGraph:
+    """
+    Grafo de dependencias entre los módulos del repositorio.
+    Se llena en la misma pasada que el resto de métricas con los destinos de cada
+    fichero; al final se resuelven contra los módulos del repo (lo externo se
+    descarta) y se buscan los ciclos con Tarjan (componentes fuertemente conexas),
+    en tiempo lineal en módulos + aristas.
+    """
+
+    # Módulos mostrados por ciclo (el tamaño sí es completo)
+    MAX_CYCLE_MODULES = 20
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        # path -> destinos tal como los devuelve DependenciesStrategy
+        self._targets: Dict[str, List[str]] = {}
+
+    def add(self, path: str, targets: List[str]) -> None:
+        """
+        Añade (o sustituye, si cambió) los imports de un fichero.
+        """
+        self._targets[path.replace("\\", "/")] = targets
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Resumen del grafo: tamaño, módulos con más fan-in / fan-out, ciclos y
+            el grafo compacto ("paths" + listas de adyacencia con índices).
+        """
+        paths = sorted(self._targets)
+        index = {path: i for i, path in enumerate(paths)}
+        modules = self._module_names(paths)
+
+        adjacency: List[List[int]] = []
+        for path in paths:
+            out = set()
+            for target in self._targets[path]:
+                dest = self._resolve(path, target, modules)
+                if dest is not None and dest != path:
+                    out.add(index[dest])
+            adjacency.append(sorted(out))
+
+        fan_in = [0] * len(paths)
+        for out in adjacency:
+            for j in out:
+                fan_in[j] += 1
+
+        cycles = [c for c in self.strongly_connected(adjacency) if len(c) > 1]
+        cycles.sort(key=lambda c: (-len(c), min(c)))
+        return {
+            "modules": len(paths),
+            "edges": sum(len(out) for out in adjacency),
+            "fan_in": self._top(paths, fan_in),
+            "fan_out": self._top(paths, [len(out) for out in adjacency]),
+            "cycles": len(cycles),
+            "modules_in_cycles": sum(len(c) for c in cycles),
+            "top_cycles": [
+                {"size": len(c), "paths": sorted(paths[i] for i in c)[:self.MAX_CYCLE_MODULES]}
+                for c in cycles[:self.top_n]
+            ],
+            "graph": {"paths": paths, "adjacency": adjacency},
+        }
+
+    def _top(self, paths: List[str], counts: List[int]) -> List[Dict[str, Any]]:
+        top = heapq.nsmallest(self.top_n, range(len(paths)), key=lambda i: (-counts[i], paths[i]))
+        return [{"path": paths[i], "count": counts[i]} for i in top if counts[i] > 0]
+
+    @staticmethod
+    def _module_names(paths: List[str]) -> Dict[str, str]:
+        """
+        Nombre de módulo -> path. Cada fichero se registra con su ruta completa
+        ("src/pkg/a.py" -> "src.pkg.a") y, si cuelga de paquetes (con __init__.py),
+        también desde el paquete raíz ("pkg.a"), que es como se suele importar.
+        """
+        files = set(paths)
+        modules: Dict[str, str] = {}
+        for path in paths:
+            parts = list(PurePosixPath(path).with_suffix("").parts)
+            if parts[-1] == "__init__":
+                parts.pop()
+            if not parts:
+                continue
+            modules.setdefault(".".join(parts), path)
+            # Sube mientras el directorio padre siga siendo un paquete
+            root = len(parts) - 1
+            while root > 0 and "/".join(parts[:root]) + "/__init__.py" in files:
+                root -= 1
+            modules.setdefault(".".join(parts[root:]), path)
+        return modules
+
+    @staticmethod
+    def _resolve(path: str, target: str, modules: Dict[str, str]) -> Optional[str]:
+        """
+        Fichero del repo al que apunta un import, o None si es externo.
+        Se prueba el nombre completo y luego quitando componentes por la derecha
+        ("pkg.util.f" -> "pkg.util" -> "pkg").
+        """
+        name = target.lstrip(".")
+        level = len(target) - len(name)
+        if level:
+            # Relativo al paquete del fichero (su directorio)
+            package = list(PurePosixPath(path).parent.parts)
+            if level - 1 > len(package):
+                return None
+            base = package[:len(package) - (level - 1)]
+            parts = base + (name.split(".") if name else [])
+        else:
+            parts = name.split(".")
+        while parts:
+            found = modules.get(".".join(parts))
+            if found is not None:
+                return found
+            parts.pop()
+        return None
+
+    @staticmethod
+    def strongly_connected(adjacency: List[List[int]]) -> List[List[int]]:
+        """
+        Componentes fuertemente conexas (Tarjan), iterativo para no depender del
+        límite de recursión en grafos grandes. O(V + E).
+        """
+        n = len(adjacency)
+        order = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        for start in range(n):
+            if order[start] != -1:
+                continue
+            # Pila de llamadas: (nodo, siguiente arista por visitar)
+            work = [(start, 0)]
+            order[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack[start] = True
+            while work:
+                node, edge = work[-1]
+                if edge < len(adjacency[node]):
+                    work[-1] = (node, edge + 1)
+                    nxt = adjacency[node][edge]
+                    if order[nxt] == -1:
+                        order[nxt] = low[nxt] = counter
+                        counter += 1
+                        stack.append(nxt)
+                        on_stack[nxt] = True
+                        work.append((nxt, 0))
+                    elif on_stack[nxt]:
+                        low[node] = min(low[node], order[nxt])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == order[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
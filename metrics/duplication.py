@@ -1,12 +1,21 @@
 from pathlib import Path
-from typing import Any, List, Set
+from typing import Any, Dict, List
 from .base import MetricStrategy
+from .ir import line_hashes
+from .registry import register_strategy
 
+@register_strategy
 class DuplicationStrategy(MetricStrategy):
     """
     Estrategia para detectar duplicación de código (Copy-Paste) dentro de un archivo
     utilizando el algoritmo de Shingles (Ventanas Deslizantes) 
     """
+    name = "duplication"
+    output_key = "duplication"
+    inputs = ("path", "source")
+    cost = 5
+    options = {"window": "dup_window"}
+    supports_ir = True
 
     def compute(self, filepath: Any, **kwargs) -> float:
         """
@@ -15,6 +24,7 @@ class DuplicationStrategy(MetricStrategy):
         Args:
             filepath (Path): Ruta al archivo a analizar.
             window (int, opcional): Tamaño de la ventana (bloque de líneas). Default: 4.
+            source (str, opcional): Contenido ya leído (ej. de un zip); evita leer 'filepath'.
             
         Returns:
             float: Ratio de duplicación (0.0 = único, 1.0 = todo duplicado).
@@ -26,15 +36,25 @@ class DuplicationStrategy(MetricStrategy):
         # Obtenemos el tamaño de la ventan de los argumentos opcionales (default 4)
         window_size = kwargs.get('window', 4)
 
-        try:
-            # Leemos el fichero ignorando errores de codificación (importante para robustez)
-            content = filepath.read_text(encoding='utf-8', errors='ignore')
-        except Exception:
-            return 0.0
+        content = kwargs.get('source')
+        if content is None:
+            try:
+                # Leemos el fichero ignorando errores de codificación (importante para robustez)
+                content = filepath.read_text(encoding='utf-8', errors='ignore')
+            except Exception:
+                return 0.0
         
         # 1. Normalización: Limpiamos espacios y líneas vacías
-        lines = self._normalize_to_lines(content)
+        return self._ratio(self._normalize_to_lines(content), window_size)
+
+    def compute_ir(self, ir: Dict[str, Any], tree=None, **kwargs) -> float:
+        """
+        Igual que 'compute' con los hashes de las líneas normalizadas del IR
+        en lugar de las propias líneas.
+        """
+        return self._ratio(line_hashes(ir), kwargs.get('window', 4))
 
+    def _ratio(self, lines: List[str], window_size: int) -> float:
         if len(lines) < window_size:
             return 0.0
         
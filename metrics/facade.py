@@ -1,16 +1,23 @@
 import ast
 import datetime
+import time
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, Iterator, List, Optional
 
-# Importamos la interfaz y las implementaciones concretas
+# Importamos la interfaz y el registro de estrategias concretas
 from .base import MetricStrategy
-from .lines import LinesStrategy, TodoStrategy
-from .imports import NumImportsStrategy
-from .functions import FunctionsStrategy
-from .duplication import DuplicationStrategy
-from .maintainability import MaintainabilityStrategy
+from .registry import available_metrics, resolve_metrics
+from .aggregation import RepoStatsAggregator
+from .clones import CloneIndex
+from .dependencies import DependencyGraph
+from .fallback import ParseFailures, scan_tokens
+from .ir import IRCollector, build_ir, content_hash, decode_ir, load_tree
+from .profiling import AnalysisProfiler, stage
+from .records import FileRecord
+from .sampling import StratifiedEstimator, StratifiedSampler
 from config import ConfigSingleton
+from deadline import Deadline, DeadlineExceeded
+from repo.sources import SourceFile, as_source
 
 class MetricsFacade:
     """
@@ -19,125 +26,552 @@ class MetricsFacade:
     Patrón: Facade
     """
 
+    # Tamaño mínimo de muestra antes de fiarse de la precisión estimada
+    MIN_SAMPLE = 30
+
     def __init__(self):
-        # Inicializamos todas las estrategias disponibles
+        # Instanciamos todas las estrategias registradas (metrics/registry.py)
         self.strategies: Dict[str, MetricStrategy] = {
-            "lines": LinesStrategy(),
-            "todos": TodoStrategy(),
-            "imports": NumImportsStrategy(),
-            "functions": FunctionsStrategy(),
-            "duplication": DuplicationStrategy(),
-            "maintainability": MaintainabilityStrategy()
+            name: cls() for name, cls in available_metrics().items()
         }
         self.config = ConfigSingleton.get_instance()
 
-    def compute_all(self, repo_path: Path, options: dict = None) -> Dict[str, Any]:
+    def compute_all(self, source, options: dict = None,
+                    deadline: Optional[Deadline] = None,
+                    resume_from: Optional[Dict[str, Any]] = None,
+                    sink=None, ir_store=None,
+                    profiler: Optional[AnalysisProfiler] = None,
+                    failure_store=None) -> Dict[str, Any]:
         """
         Recorre el repositorio, aplica todas las métricas a cada fichero .py
         y genera un informe agregado.
 
         Args:
-            repo_path (Path): Ruta local al directorio del repositorio clonado.
+            source (Path | fuente): Directorio del repositorio clonado o una fuente
+                de repo/sources.py (directorio local, tar o zip leído sin extraer).
             options (dict): Opciones de configuración.
+                - metrics (list[str]): subconjunto de métricas a calcular (por defecto todas).
+                - dup_window (int): ventana de duplicación.
+            deadline (Deadline): Presupuesto de tiempo. Si se agota se devuelve un
+                informe parcial ("partial": True) con los archivos ya calculados.
+            resume_from (dict): Informe parcial previo (mismo commit, métricas y
+                opciones): sus archivos se reutilizan en vez de recalcularse.
+            sink: Destino incremental de los archivos (modo streaming, ver ReportBuilder).
+                El informe devuelto no incluye 'files'.
+            ir_store: Dónde guardar la representación intermedia de cada contenido
+                nuevo (repo.db_manager.DBManager); None = no se guarda.
+            profiler (AnalysisProfiler): Perfil de CPU y memoria por fase, estrategia
+                y archivo (metrics/profiling.py); None = sin perfilar.
+            failure_store: Dónde se recuerdan los contenidos que no compilan
+                (repo.db_manager.DBManager): en el siguiente análisis van directos
+                a la aproximación por tokens sin intentar parsearlos.
 
         Returns:
             Dict: Informe completo con resumen y detalle por archivo.
         """
         if options is None:
             options = {}
+        if deadline is None:
+            deadline = Deadline()
+        source = as_source(source)
 
-        print(f"\n--- 🕵️ DEBUG FACHADA ---")
-        print(f"Analizando ruta absoluta: {repo_path.absolute()}")
-        print(f"¿La carpeta existe?: {repo_path.exists()}")
-        if repo_path.exists():
-            print(f"¿Es un directorio?: {repo_path.is_dir()}")
-            # Listamos qué hay dentro de la raíz (los primeros 5 elementos)
-            contenido = list(repo_path.iterdir())
-            print(f"Contenido raíz ({len(contenido)} items): {[p.name for p in contenido[:5]]}")
-            
-            # Probamos la búsqueda de python
-            archivos_py = list(repo_path.rglob("*.py"))
-            print(f"Archivos .py detectados por rglob: {len(archivos_py)}")
-        print("------------------------\n")
-        
-        # Preparar contenedores de resultados
-        file_metrics_list = []
-        total_lines = 0
-        total_files = 0
-        sum_maintainability = 0.0
-
-        # Buscar recursivamente todos los archivos .py
-        # sorted() asegura que el orden sea determinista (útil para tests y UI)
-        py_files = sorted(repo_path.rglob("*.py"))
-
-        for file_path in py_files:
-            # Ignoramos carpetas ocultas o venv si se colaron
-            if ".venv" in str(file_path) or "__pycache__" in str(file_path):
-                continue
-
-            total_files += 1
-
-            # 1. Lectura y Parsing (Optimización: una sola vez) 
-            try:
-                content = file_path.read_text(encoding="utf-8", errors="ignore")
-                # Parseamos AST una vez para pasárselo a quien lo necesite
-                ast_tree = ast.parse(content)
-            except (SyntaxError, Exception):
-                # Si falla (archivo binario o sintaxis inválida), usamos valores vacíos
-                content = ""
-                ast_tree = None
-            
-            # 2. Cálculo de Métricas por Archivo
-            metrics = {
-                "path": str(file_path.relative_to(repo_path)),
-                "name": file_path.name
-            }
-
-            # Estrategias basadas en TEXTO
-            metrics["loc"] = self.strategies["lines"].compute(content)
-            metrics["todos"] = self.strategies["todos"].compute(content)
-            metrics["num_imports"] = self.strategies["imports"].compute(content)
-
-            # Estrategias basadas en AST
-            if ast_tree:
-                metrics["functions"] = self.strategies["functions"].compute(ast_tree)
-            else:
-                metrics["functions"] = {}
-            
-            # Estrategias basadas en FILESYSTEM / PATH
-            # Duplication necesita 'window' de las opciones o del config
-            dup_window = options.get("dup_window", self.config.duplication_window)
-            metrics["duplication"] = self.strategies["duplication"].compute(file_path, window=dup_window)
+        # Métricas a calcular (options["metrics"]; por defecto todas)
+        selected = resolve_metrics(options.get("metrics"))
+        strategy_options = self.strategy_options(options)
+        used_options = self._used_options(selected, strategy_options)
+        report = ReportBuilder(self.config, selected, sink)
+
+        try:
+            # En un tar la búsqueda y la lectura son la misma pasada (flujo)
+            with stage(profiler, "discovery"):
+                files = source.iter_files(deadline)
+        except DeadlineExceeded as e:
+            return self._partial(report.build(source.name, used_options), e.stage, deadline, None)
 
-            metrics["maintainability"] = self.strategies["maintainability"].compute(file_path)
+        # Archivos ya calculados por un análisis parcial anterior
+        done = {f["path"]: f for f in (resume_from or {}).get("files", [])}
+        # Las métricas de todo el repo (clones) necesitan volver a ver los archivos reutilizados
+        repo_wide = [name for name in selected if self.strategies[name].repo_wide]
+        expired = False
+        total = 0
 
-            # 3. Acumulación para Resumen Global
-            total_lines += metrics["loc"]
-            sum_maintainability += metrics["maintainability"]
+        ir = IRCollector(ir_store) if ir_store is not None else None
+        if ir is not None and hasattr(source, "entries"):
+            # En un árbol git los shas ya se conocen: se consulta de una vez qué IR falta
+            ir.prime(sha for sha, _ in source.entries().values())
+        failures = None
+        if failure_store is not None:
+            blobs = [sha for sha, _ in source.entries().values()] if hasattr(source, "entries") else None
+            failures = ParseFailures(failure_store, blobs)
 
-            file_metrics_list.append(metrics)
+        try:
+            with stage(profiler, "metrics"):
+                for source_file in files:
+                    total += 1
+                    if source_file.path in done:
+                        metrics = FileRecord(done[source_file.path])
+                        if repo_wide:
+                            metrics.update(self.compute_file(source_file, repo_wide, strategy_options,
+                                                             profiler=profiler, failures=failures))
+                    else:
+                        # El límite se comprueba entre archivos: los pendientes quedan para otra vez
+                        expired = expired or deadline.expired()
+                        if expired:
+                            continue
+                        metrics = self.compute_file(source_file, selected, strategy_options, ir,
+                                                    profiler=profiler, failures=failures)
+
+                    # 3. Acumulación para Resumen Global
+                    report.add(metrics)
+        finally:
+            if ir is not None:
+                ir.flush()
+            if failures is not None:
+                failures.flush()
 
         # 4. Construcción del Resultado Final
+        with stage(profiler, "report"):
+            result = report.build(source.name, used_options)
+        if expired:
+            return self._partial(result, "metrics", deadline, total)
+        return result
+
+    @staticmethod
+    def _partial(result: Dict[str, Any], stage: str, deadline: Deadline,
+                 total: Optional[int]) -> Dict[str, Any]:
+        """
+        Marca un informe como parcial: 'files' contiene solo los archivos cubiertos.
+        """
+        covered = result["summary"]["num_files"]
+        print(f"[Fachada] Tiempo agotado en '{stage}': {covered}/{total} archivos")
+        result["partial"] = True
+        result["coverage"] = dict(
+            deadline.as_dict(),
+            stage=stage,
+            files_covered=covered,
+            files_total=total,
+        )
+        return result
+
+    def compute_approximate(self, source, options: dict = None,
+                            on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Análisis aproximado: procesa una muestra estratificada creciente y se detiene
+        al agotar el tiempo, alcanzar la precisión pedida o cubrir la fracción máxima.
+
+        Args:
+            source (Path | fuente): Repositorio local (la fuente debe admitir acceso aleatorio).
+            options (dict): Las de compute_all y además:
+                - sample_seconds (float): presupuesto de tiempo.
+                - sample_precision (float): semiamplitud relativa objetivo del IC 95%.
+                - sample_fraction (float): fracción máxima de archivos (por defecto 1.0).
+                - seed (int): semilla del muestreo (reproducibilidad).
+            on_progress: Se llama con cada informe intermedio.
+
+        Returns:
+            Dict: Último informe (marcado con "approximate": True).
+        """
+        if options is None:
+            options = {}
+        seconds = options.get("sample_seconds") or self.config.sample_seconds
+        precision = options.get("sample_precision") or self.config.sample_precision
+        fraction = options.get("sample_fraction") or 1.0
+        started = time.monotonic()
+
+        result: Dict[str, Any] = {}
+        for result in self.iter_approximate(source, options):
+            if on_progress:
+                on_progress(result)
+            sampling = result["sampling"]
+            print(f"[Fachada] Muestra {sampling['files_sampled']}/{sampling['files_total']} "
+                  f"(precisión ±{sampling['precision']})")
+            enough = sampling["files_sampled"] >= min(self.MIN_SAMPLE, sampling["files_total"])
+            precise = sampling["precision"] is not None and sampling["precision"] <= precision
+            if (time.monotonic() - started >= seconds
+                    or sampling["files_sampled"] >= fraction * sampling["files_total"]
+                    or (enough and precise)):
+                break
+        return result
+
+    def iter_approximate(self, source, options: dict = None) -> Iterator[Dict[str, Any]]:
+        """
+        Genera informes aproximados cada vez más precisos: tras cada lote de la
+        muestra se extrapolan los totales al repositorio con su IC 95%.
+        El último informe (muestra completa) coincide con el exacto.
+        """
+        if options is None:
+            options = {}
+        source = as_source(source)
+
+        selected = resolve_metrics(options.get("metrics"))
+        strategy_options = self.strategy_options(options)
+        used_options = self._used_options(selected, strategy_options)
+
+        # Muestrear exige conocer todos los archivos antes de leer ninguno
+        files = source.list_files()
+        sampler = StratifiedSampler(files, seed=options.get("seed"))
+        estimator = StratifiedEstimator(sampler.strata_sizes)
+        report = ReportBuilder(self.config, selected)
+        batch = options.get("sample_batch") or self.config.sample_batch
+
+        if not files:
+            yield self._approximate_report(report.build(source.name, used_options), estimator, 0)
+            return
+
+        for chunk in sampler.batches(batch):
+            for stratum, source_file in chunk:
+                metrics = self.compute_file(source_file, selected, strategy_options)
+                estimator.add(stratum, metrics)
+                report.add(metrics)
+            yield self._approximate_report(report.build(source.name, used_options),
+                                           estimator, len(sampler.strata_sizes))
+
+    def _approximate_report(self, result: Dict[str, Any], estimator: StratifiedEstimator,
+                            num_strata: int) -> Dict[str, Any]:
+        """
+        Sustituye los totales del resumen por sus estimaciones y añade los datos del muestreo.
+        Las distribuciones, hotspots, clones y dependencias se refieren solo a la muestra.
+        """
+        estimates = estimator.estimates()
+        summary = result["summary"]
+        summary["num_files"] = estimator.population
+        summary["estimates"] = estimates
+        if summary.get("total_lines") is not None and "loc" in estimates:
+            summary["total_lines"] = round(estimates["loc"]["total"])
+        if summary.get("avg_maintainability") is not None and "maintainability" in estimates:
+            summary["avg_maintainability"] = round(estimates["maintainability"]["mean"], 2)
+
+        sampled = len(result["files"])
+        # La precisión del informe es la peor de las métricas estimadas
+        precision = max((StratifiedEstimator.relative_precision(e) for e in estimates.values()),
+                        default=0.0)
+        result["approximate"] = sampled < estimator.population
+        result["sampling"] = {
+            "files_total": estimator.population,
+            "files_sampled": sampled,
+            "strata": num_strata,
+            "confidence": 0.95,
+            "precision": round(precision, 4) if precision != float("inf") else None,
+        }
+        return result
+
+    def discover_files(self, source, deadline: Optional[Deadline] = None) -> List[SourceFile]:
+        """
+        Archivos .py del repositorio, en orden determinista (útil para tests y UI).
+
+        Raises:
+            DeadlineExceeded: si el tiempo se agota durante la búsqueda.
+        """
+        return as_source(source).list_files(deadline)
+
+    def recompute_metrics(self, source, base_result: Dict[str, Any],
+                          metric_names: List[str], options: dict = None,
+                          irs: Optional[Dict[str, bytes]] = None) -> Dict[str, Any]:
+        """
+        Recalcula solo 'metric_names' sobre un informe existente del mismo commit
+        (ej. la duplicación con otra ventana) y reutiliza el resto de métricas.
+
+        Args:
+            source (Path | fuente): Repositorio local en el mismo commit que base_result
+                (la fuente debe admitir acceso aleatorio). Puede ser None con 'irs'.
+            base_result (dict): Informe previo con todas las métricas seleccionadas.
+            metric_names (list[str]): Métricas a recalcular.
+            options (dict): Nuevas opciones de la petición.
+            irs (dict): IR guardado de cada archivo {blob: datos} (DBManager.get_ir).
+                Con él no se lee el repositorio: todas las métricas de 'metric_names'
+                deben admitir IR y cada archivo del informe tener el suyo.
+
+        Returns:
+            Dict: Informe nuevo, con resumen recalculado.
+        """
+        if options is None:
+            options = {}
+        if irs is None:
+            source = as_source(source)
+
+        selected = resolve_metrics(base_result.get("metrics"))
+        strategy_options = self.strategy_options(options)
+        report = ReportBuilder(self.config, selected)
+
+        for old_metrics in base_result.get("files", []):
+            metrics = FileRecord(old_metrics)
+            if irs is not None:
+                metrics.update(self.compute_ir(decode_ir(irs[old_metrics["blob"]]),
+                                               metric_names, strategy_options))
+            else:
+                metrics.update(self.compute_file(source.get(old_metrics["path"]), metric_names,
+                                                 strategy_options))
+            report.add(metrics)
+
+        result = report.build(base_result.get("repo_name") or source.name,
+                              self._used_options(selected, strategy_options))
+
+        # Las métricas de todo el repo (clones) que no se recalculan conservan
+        # el resumen y los recuentos por archivo del informe base
+        for name in selected:
+            if self.strategies[name].repo_wide and name not in metric_names:
+                key = self.strategies[name].output_key
+                result["summary"][key] = base_result.get("summary", {}).get(key)
+        return result
+
+    def compute_file(self, source_file: SourceFile, selected: List[str],
+                     strategy_options: Dict[str, Any],
+                     ir: Optional[IRCollector] = None,
+                     profiler: Optional[AnalysisProfiler] = None,
+                     failures: Optional[ParseFailures] = None) -> FileRecord:
+        """
+        Calcula las métricas seleccionadas de un fichero.
+        El contenido se lee una sola vez (también para las estrategias basadas en
+        la ruta, que así funcionan dentro de un zip o tar) y solo se preparan las
+        entradas (líneas, AST) que alguna estrategia necesita.
+        Con 'ir' se anota el hash del contenido ("blob") y se construye su
+        representación intermedia si aún no está guardada (con el mismo parseo).
+        Con 'profiler' se mide el archivo entero, la lectura y parseo y cada estrategia.
+        Si el archivo no compila (o 'failures' ya lo sabe) las métricas que lo admiten
+        se aproximan con sus tokens y el archivo se marca "degraded".
+        """
+        if profiler is not None:
+            with profiler.file(source_file.path):
+                return self._compute_file(source_file, selected, strategy_options, ir, profiler, failures)
+        return self._compute_file(source_file, selected, strategy_options, ir, None, failures)
+
+    def _compute_file(self, source_file: SourceFile, selected: List[str],
+                      strategy_options: Dict[str, Any], ir: Optional[IRCollector],
+                      profiler: Optional[AnalysisProfiler],
+                      failures: Optional[ParseFailures]) -> FileRecord:
+        strategies = [self.strategies[name] for name in selected]
+        needed = {inp for strategy in strategies for inp in strategy.inputs}
+
+        # 1. Lectura y Parsing (Optimización: una sola vez y solo si hace falta)
+        inputs: Dict[str, Any] = {"path": source_file.disk_path or Path(source_file.path)}
+        blob = None
+        if needed & {"text", "lines", "ast", "source"}:
+            if profiler is None:
+                blob = self._read_inputs(source_file, needed, inputs, ir, failures)
+            else:
+                with profiler.step("parse"):
+                    blob = self._read_inputs(source_file, needed, inputs, ir, failures)
+
+        # 2. Cálculo de Métricas por Archivo
+        metrics = FileRecord(path=source_file.path, name=source_file.name)
+        if ir is not None and blob is not None:
+            # Identifica el contenido: con él se encuentra su IR guardado
+            metrics["blob"] = blob
+        # Alguna métrica necesitaba el AST y el archivo no compila: se aproxima por tokens
+        scan = inputs.get("tokens") if "ast" in needed else None
+        if scan is not None:
+            metrics["degraded"] = True
+        for strategy in strategies:
+            if profiler is None:
+                metrics[strategy.output_key] = self._run(strategy, inputs, strategy_options, scan)
+            else:
+                with profiler.step(f"strategy:{strategy.name}"):
+                    metrics[strategy.output_key] = self._run(strategy, inputs, strategy_options, scan)
+
+        return metrics
+
+    @staticmethod
+    def _run(strategy: MetricStrategy, inputs: Dict[str, Any], strategy_options: Dict[str, Any],
+             scan: Optional[Dict[str, Any]]) -> Any:
+        kwargs = {kw: strategy_options[key] for kw, key in strategy.options.items()}
+        if scan is not None and strategy.supports_tokens:
+            return strategy.compute_tokens(scan, **kwargs)
+        data = inputs[strategy.inputs[0]]
+        # El resto de entradas declaradas llegan por nombre (ej. source=...)
+        kwargs.update({inp: inputs[inp] for inp in strategy.inputs[1:]})
+        # Las estrategias basadas en AST sin aproximación devuelven {} / 0 si no hay árbol
+        return strategy.compute(data, **kwargs)
+
+    @staticmethod
+    def _read_inputs(source_file: SourceFile, needed: set, inputs: Dict[str, Any],
+                     ir: Optional[IRCollector], failures: Optional[ParseFailures]) -> Optional[str]:
+        """
+        Lee el archivo una vez y rellena en 'inputs' las entradas de texto y AST
+        que hacen falta. Si no compila, el texto se conserva (líneas y TODOs siguen
+        valiendo) y en "tokens" queda su aproximación (scan_tokens), hecha sobre el
+        mismo contenido ya leído. Devuelve el hash del contenido si se calculó.
+        """
+        blob = None
+        try:
+            raw = source_file.read_bytes()
+            if ir is not None or failures is not None:
+                blob = source_file.sha or content_hash(raw)
+            content = raw.decode("utf-8", errors="ignore")
+        except Exception:
+            content = ""
+        inputs["source"] = content
+        wants_ir = ir is not None and blob is not None and ir.wants(blob)
+        ast_tree = None
+        scan = None
+        if "ast" in needed or wants_ir:
+            if failures is not None and failures.known(blob):
+                # Ya se sabe que no compila: no se intenta otra vez
+                scan = scan_tokens(content)
+            else:
+                try:
+                    # Parseamos AST una vez para pasárselo a quien lo necesite
+                    ast_tree = ast.parse(content)
+                except (SyntaxError, ValueError) as e:
+                    # Python 2, plantilla, bytes nulos...: se aproxima con los tokens
+                    scan = scan_tokens(content)
+                    if failures is not None:
+                        failures.add(blob, e)
+                except RecursionError:
+                    # Expresión demasiado anidada para el límite de recursión actual:
+                    # se aproxima, pero no es un fallo del contenido y no se recuerda
+                    # (ni en parse_failures ni en el IR)
+                    print(f"[Fachada] {source_file.path}: demasiado anidado para el AST, "
+                          f"se aproxima con los tokens")
+                    scan = scan_tokens(content)
+                    wants_ir = False
+        inputs["tokens"] = scan
+        if wants_ir:
+            ir.add(blob, build_ir(content, ast_tree, scan))
+        inputs["text"] = content
+        inputs["ast"] = ast_tree if "ast" in needed else None
+        if "lines" in needed:
+            inputs["lines"] = content.splitlines()
+        return blob
+
+    def compute_ir(self, ir: Dict[str, Any], selected: List[str],
+                   strategy_options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Como compute_file pero desde el IR de un archivo: no se lee ni se parsea
+        nada. Solo vale para estrategias con 'supports_ir' y da lo mismo que
+        compute_file con esas métricas.
+        """
+        strategies = [self.strategies[name] for name in selected]
+        needed = {inp for strategy in strategies for inp in strategy.inputs}
+        tree = load_tree(ir) if "ast" in needed or "source" in needed else None
+        # Como en compute_file: sin árbol, lo que admite aproximación sale de los tokens
+        scan = ir["degraded"] if "ast" in needed and ir["ast"] is None else None
+
+        metrics: Dict[str, Any] = {}
+        if scan is not None:
+            metrics["degraded"] = True
+        for strategy in strategies:
+            kwargs = {kw: strategy_options[key] for kw, key in strategy.options.items()}
+            if scan is not None and strategy.supports_tokens:
+                metrics[strategy.output_key] = strategy.compute_tokens(scan, **kwargs)
+            else:
+                metrics[strategy.output_key] = strategy.compute_ir(ir, tree=tree, **kwargs)
+        return metrics
+
+    def strategy_options(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Opciones que pueden consumir las estrategias, con los valores por defecto del config.
+        """
+        resolved = {
+            "dup_window": self.config.duplication_window,
+            "clone_min_nodes": self.config.clone_min_nodes,
+        }
+        resolved.update({k: v for k, v in (options or {}).items() if v is not None})
+        return resolved
+
+    def _used_options(self, selected: List[str], resolved: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Subconjunto de opciones que consumen las métricas seleccionadas
+        (se guarda en el informe y forma parte de la clave de caché).
+        """
+        keys = {key for name in selected for key in self.strategies[name].options.values()}
+        return {key: resolved.get(key) for key in sorted(keys)}
+
+
+class ReportBuilder:
+    """
+    Acumula las métricas de cada archivo y construye el informe final
+    (resumen, distribuciones y detalle). Lo usan compute_all y recompute_metrics.
+
+    Con un 'sink' (ej. repo.db_manager.AnalysisStream) cada archivo se escribe
+    en cuanto se añade y no se guarda en memoria: solo quedan los acumulados.
+    El sink debe ofrecer write(metrics) y update_files(clave, {path: valor}).
+    """
+
+    def __init__(self, config, selected: List[str], sink=None):
+        self.selected = selected
+        self.sink = sink
+        self.files: List[Dict[str, Any]] = []
+        self.num_files = 0
+        # Archivos que no compilan (métricas aproximadas por tokens)
+        self.num_degraded = 0
+        self.total_lines = 0
+        self.sum_maintainability = 0.0
+        # Distribuciones y hotspots se acumulan en la misma pasada
+        self.aggregator = RepoStatsAggregator(
+            top_n=config.hotspots_top_n,
+            bins=config.histogram_bins
+        )
+        # Índice de huellas estructurales de todo el repo (clones entre archivos)
+        self.clone_index = CloneIndex(top_n=config.clones_top_n)
+        self._clones_indexed = False
+        # Grafo de imports entre módulos del repo (los destinos se quedan en el archivo)
+        self.dependency_graph = DependencyGraph(top_n=config.hotspots_top_n)
+        self._dependencies_indexed = False
+
+    def add(self, metrics: Dict[str, Any]) -> None:
+        # Las huellas van al índice, no al detalle del archivo (allí solo queda el recuento)
+        fragments = metrics.get("clones")
+        if isinstance(fragments, list):
+            self.clone_index.add(metrics["path"], fragments)
+            metrics["clones"] = 0
+            self._clones_indexed = True
+        targets = metrics.get("dependencies")
+        if isinstance(targets, list):
+            self.dependency_graph.add(metrics["path"], targets)
+            self._dependencies_indexed = True
+        self.total_lines += metrics.get("loc", 0)
+        self.sum_maintainability += metrics.get("maintainability", 0.0)
+        self.aggregator.add_file(metrics)
+        self.num_files += 1
+        if metrics.get("degraded"):
+            self.num_degraded += 1
+        if self.sink is not None:
+            self.sink.write(metrics)
+        else:
+            self.files.append(metrics)
+
+    def build(self, repo_name: str, used_options: Dict[str, Any]) -> Dict[str, Any]:
+        total_files = self.num_files
 
         # Promedio de mantenibilidad
         avg_maintainability = 0.0
         if total_files > 0:
-            avg_maintainability = sum_maintainability / total_files
+            avg_maintainability = self.sum_maintainability / total_files
 
-        result = {
+        # Las métricas no seleccionadas quedan a None en el resumen
+        summary = {
+            "num_files": total_files,
+            "total_lines": self.total_lines if "lines" in self.selected else None,
+            "avg_maintainability": round(avg_maintainability, 2) if "maintainability" in self.selected else None,
+            "degraded_files": self.num_degraded,
+        }
+        # Percentiles, histogramas y top-N funciones complejas
+        summary.update(self.aggregator.result())
+
+        # Clases de clones estructurales y fragmentos clonados por archivo
+        if self._clones_indexed:
+            summary["clones"], per_file = self.clone_index.result()
+            if self.sink is not None:
+                # Los archivos ya escritos tienen 0: solo se corrigen los que tienen clones
+                self.sink.update_files("clones", per_file)
+            for metrics in self.files:
+                metrics["clones"] = per_file.get(metrics["path"], 0)
+
+        # Fan-in / fan-out y ciclos de imports
+        if self._dependencies_indexed:
+            summary["dependencies"] = self.dependency_graph.result()
+
+        return {
             # Metadatos generales
             "analyzed_at": datetime.datetime.now().isoformat(),
-            "repo_name": repo_path.name,
+            "repo_name": repo_name,
+            "metrics": self.selected,
+            "options": used_options,
 
             # Resumen ejecutivo (Summary)
-            "summary": {
-                "num_files": total_files,
-                "total_lines": total_lines,
-                "avg_maintainability": round(avg_maintainability, 2),
-            },
-
-            # Detalle granular
-            "files": file_metrics_list
-        }
+            "summary": summary,
 
-        return result
\ No newline at end of file
+            # Detalle granular (vacío en streaming: está en el sink)
+            "files": self.files,
+            "streamed": self.sink is not None
+        }
@@ -0,0 +1,326 @@
+import io
+import keyword
+import math
+import sys
+import tokenize
+from typing import Any, Dict, Iterable, List, Optional
+
+# Palabras que abren un punto de decisión al empezar una sentencia (como los
+# nodos que cuentan FunctionsStrategy._compute_cc y MaintainabilityStrategy)
+_DECISIONS = {"if", "elif", "for", "while", "with", "except", "assert"}
+# Sentencias que suman un nivel de anidamiento (If, For, While, Try, FunctionDef)
+_NESTING = {"if", "for", "while", "try", "def"}
+# Cláusulas que continúan la sentencia compuesta anterior del mismo bloque
+_CLAUSES = {"elif", "else", "except", "finally"}
+# Operadores de Halstead (los mismos que cuenta el índice de mantenibilidad)
+_OPERATORS = {"+", "-", "*", "/", "%", "**", "<<", ">>", "|", "^", "&", "//"}
+_OPERATORS |= {op + "=" for op in _OPERATORS}
+_COMPOUND = _NESTING | _CLAUSES | {"with", "class"}
+_CONSTANTS = {"True", "False", "None"}
+_SKIP = {tokenize.NL, tokenize.COMMENT, tokenize.ENCODING}
+
+def python_version() -> str:
+    """
+    Versión de Python que parsea ("3.11"): un archivo que no compila en una
+    puede compilar en otra, así que los fallos se recuerdan por versión.
+    """
+    return "%d.%d" % sys.version_info[:2]
+
+def scan_tokens(content: str) -> Dict[str, Any]:
+    """
+    Métricas aproximadas de un archivo que no compila (Python 2, plantillas...)
+    a partir de su flujo de tokens, sin AST. Se hace una sola pasada y, si el
+    tokenizador también falla, se queda con lo leído hasta el error.
+
+    Returns:
+        Dict (serializable en JSON, se guarda en el IR):
+            imports:    [[base, [nombres]]] por sentencia; base None en 'import a, b'
+                        y el módulo con sus puntos en 'from ..a import b'.
+            functions:  [[nombre, loc, params, cc, max_nesting]] en orden de aparición.
+            cc:         complejidad ciclomática del archivo.
+            volume:     volumen de Halstead aproximado.
+            code_lines: líneas no vacías.
+    """
+    scanner = _Scanner()
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(content).readline):
+            scanner.feed(tok)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+    scanner.finish()
+    return {
+        "imports": scanner.imports,
+        "functions": [[f["name"], f["end"] - f["start"] + 1, f["params"], f["cc"], f["nesting"]]
+                      for f in scanner.functions],
+        "cc": scanner.cc,
+        "volume": scanner.volume(),
+        "code_lines": sum(1 for line in content.splitlines() if line.strip()),
+    }
+
+
+class _Scanner:
+    """
+    Recorre los tokens una vez. Los bloques salen de INDENT/DEDENT: cada uno
+    guarda la profundidad de anidamiento de lo que contiene, y una función
+    termina cuando se cierra el bloque de su cuerpo.
+    """
+
+    def __init__(self):
+        self.imports: List[List[Any]] = []
+        self.functions: List[Dict[str, Any]] = []
+        self.cc = 1
+        self.operators = 0
+        self.operands = 0
+        self.unique_operators: set = set()
+        self.unique_operands: set = set()
+        # Profundidad de anidamiento de cada bloque abierto (el módulo es 0)
+        self.levels = [0]
+        # Profundidad que abrió la última sentencia compuesta de cada bloque (para elif/else)
+        self.previous: Dict[int, int] = {}
+        # Funciones abiertas: las de bloque se cierran con su DEDENT
+        self.open: List[Dict[str, Any]] = []
+        # Función cuya cabecera acaba de terminar: espera su bloque (INDENT)
+        self.awaiting: Optional[Dict[str, Any]] = None
+        self.pending_depth: Optional[int] = None
+        self.statement: List[tokenize.TokenInfo] = []
+        self.parens = 0
+        self.last_line = 0
+        self.prev: Optional[tokenize.TokenInfo] = None
+
+    def feed(self, tok: tokenize.TokenInfo) -> None:
+        kind = tok.type
+        if kind in _SKIP:
+            return
+        if kind == tokenize.INDENT:
+            self._indent()
+            return
+        if kind == tokenize.DEDENT:
+            self._dedent()
+            return
+        if kind in (tokenize.NEWLINE, tokenize.ENDMARKER):
+            self._end_statement()
+            if self.awaiting is not None and (self.awaiting["inline"] or kind == tokenize.ENDMARKER):
+                # Función de una sola línea ("def f(): return 1"): no tiene bloque propio
+                self._close(self.awaiting)
+                self.awaiting = None
+            return
+
+        if self.awaiting is not None:
+            self.awaiting["inline"] = True
+
+        self.last_line = tok.end[0]
+        if kind == tokenize.OP:
+            if tok.string in "([{":
+                self.parens += 1
+            elif tok.string in ")]}":
+                self.parens = max(0, self.parens - 1)
+            elif self.parens == 0 and tok.string in (";", ":") and self.statement:
+                # "a; b" o "if x: return y": lo que sigue es otra sentencia
+                if tok.string == ":" and self._first_of(self.statement) not in _COMPOUND:
+                    self.statement.append(tok)
+                else:
+                    self._end_statement(tok.string == ";")
+                self.prev = tok
+                return
+            if tok.string in _OPERATORS:
+                self.operators += 1
+                self.unique_operators.add(tok.string)
+        elif kind == tokenize.NAME:
+            if tok.string in ("and", "or"):
+                self._decision()
+            elif (tok.string in _CONSTANTS or not keyword.iskeyword(tok.string)) and not (
+                    self.prev is not None and self.prev.string in (".", "def", "class")):
+                self.operands += 1
+                self.unique_operands.add(tok.string)
+        elif kind in (tokenize.NUMBER, tokenize.STRING):
+            self.operands += 1
+            self.unique_operands.add(tok.string)
+        self.statement.append(tok)
+        self.prev = tok
+
+    def finish(self) -> None:
+        self._end_statement()
+        if self.awaiting is not None:
+            self._close(self.awaiting)
+        for function in reversed(self.open):
+            self._close(function)
+        self.open = []
+
+    def volume(self) -> float:
+        n = len(self.unique_operators) + len(self.unique_operands)
+        return (self.operators + self.operands) * math.log2(n) if n else 0.0
+
+    # --- Sentencias ---------------------------------------------------------
+
+    def _end_statement(self, same_line: bool = False) -> None:
+        if not self.statement:
+            return
+        tokens, self.statement = self.statement, []
+        first = self._first_of(tokens)
+        depth = self.levels[-1]
+        block = len(self.levels)
+        opened = None
+        if first in _DECISIONS:
+            self._decision()
+        if first == "elif":
+            opened = self.previous.get(block, depth) + 1
+        elif first in _CLAUSES:
+            opened = self.previous.get(block, depth)
+        elif first in _NESTING:
+            opened = depth + 1
+        elif first in ("with", "class"):
+            opened = depth
+        if opened is not None:
+            self.previous[block] = opened
+            for function in self.open:
+                function["nesting"] = max(function["nesting"], opened - function["base"])
+        if first in ("import", "from"):
+            self._import(tokens)
+        if first == "def":
+            self._function(tokens, opened)
+        # El bloque que abra el siguiente INDENT tendrá esta profundidad
+        self.pending_depth = opened if not same_line else None
+
+    @staticmethod
+    def _first_of(tokens: List[tokenize.TokenInfo]) -> Optional[str]:
+        words = [t.string for t in tokens[:2] if t.type == tokenize.NAME]
+        if words[:1] == ["async"] and len(words) > 1:
+            return words[1]
+        return words[0] if words else None
+
+    def _decision(self) -> None:
+        self.cc += 1
+        for function in self.open:
+            function["cc"] += 1
+        if self.awaiting is not None:
+            self.awaiting["cc"] += 1
+
+    def _import(self, tokens: List[tokenize.TokenInfo]) -> None:
+        words = [t.string for t in tokens if t.type in (tokenize.NAME, tokenize.OP)]
+        if words[0] == "import":
+            base, names = None, self._names(words[1:])
+        elif "import" in words:
+            split = words.index("import")
+            base = "".join(w for w in words[1:split])
+            names = self._names(words[split + 1:])
+        else:
+            return
+        self.imports.append([base, names])
+
+    @staticmethod
+    def _names(words: List[str]) -> List[str]:
+        # "a.b as c, d" -> ["a.b", "d"]
+        names, current, alias = [], "", False
+        for word in words + [","]:
+            if word == ",":
+                if current:
+                    names.append(current)
+                current, alias = "", False
+            elif word == "as":
+                alias = True
+            elif not alias and word not in "()":
+                current += word
+        return names
+
+    def _function(self, tokens: List[tokenize.TokenInfo], opened: int) -> None:
+        strings = [t.string for t in tokens]
+        at = strings.index("def")
+        if at + 1 >= len(tokens):
+            return
+        function = {"name": strings[at + 1], "start": tokens[at].start[0], "end": tokens[-1].end[0],
+                    "params": self._params(strings[at + 2:]), "cc": 1, "nesting": 0,
+                    "base": opened, "block": None, "inline": False}
+        self.functions.append(function)
+        self.awaiting = function
+
+    @staticmethod
+    def _params(strings: List[str]) -> int:
+        # Parámetros posicionales (args.args): ni *args, ni los de solo clave, ni antes de '/'
+        depth, count, expect, stop = 0, 0, False, False
+        for s in strings:
+            if s in "([{":
+                depth += 1
+                expect = depth == 1
+                continue
+            if s in ")]}":
+                depth -= 1
+                if depth == 0:
+                    break
+                continue
+            if depth != 1 or stop:
+                continue
+            if s == ",":
+                expect = True
+            elif s in ("*", "**"):
+                stop = True
+            elif s == "/":
+                count = 0
+            elif expect and s.isidentifier():
+                count += 1
+                expect = False
+            else:
+                expect = False
+        return count
+
+    # --- Bloques ------------------------------------------------------------
+
+    def _indent(self) -> None:
+        depth = self.pending_depth if self.pending_depth is not None else self.levels[-1]
+        self.levels.append(depth)
+        self.pending_depth = None
+        if self.awaiting is not None:
+            self.awaiting["block"] = len(self.levels)
+            self.open.append(self.awaiting)
+            self.awaiting = None
+
+    def _dedent(self) -> None:
+        block = len(self.levels)
+        while self.open and self.open[-1]["block"] == block:
+            self._close(self.open.pop())
+        self.previous.pop(block, None)
+        self.previous.pop(block + 1, None)
+        if len(self.levels) > 1:
+            self.levels.pop()
+
+    def _close(self, function: Dict[str, Any]) -> None:
+        function["end"] = max(function["end"], self.last_line)
+
+
+class ParseFailures:
+    """
+    Contenidos que ya se sabe que no compilan con esta versión de Python:
+    se van directos a scan_tokens sin intentar ast.parse.
+    Como IRCollector, se consulta de una vez al empezar y los nuevos se
+    guardan por lotes en 'store' (repo.db_manager.DBManager).
+    """
+
+    BATCH = 200
+
+    def __init__(self, store, blobs: Optional[Iterable[str]] = None):
+        """
+        Args:
+            store: known_parse_failures / save_parse_failures.
+            blobs: Contenidos del análisis si se conocen de antemano (árbol git);
+                None = se cargan todos los fallos registrados para esta versión.
+        """
+        self.store = store
+        self.python = python_version()
+        blobs = None if blobs is None else [b for b in blobs if b]
+        self._known: set = store.known_parse_failures(blobs, self.python)
+        self._pending: Dict[str, str] = {}
+
+    def known(self, blob: Optional[str]) -> bool:
+        return blob is not None and (blob in self._known or blob in self._pending)
+
+    def add(self, blob: Optional[str], error: Exception) -> None:
+        if blob is None:
+            return
+        self._pending[blob] = f"{type(error).__name__}: {error}"[:200]
+        if len(self._pending) >= self.BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self.store.save_parse_failures(list(self._pending.items()), self.python)
+            self._known.update(self._pending)
+            self._pending = {}
@@ -1,14 +1,27 @@
 import ast
 from typing import Any, Dict
 from .base import MetricStrategy
+from .records import FunctionRecord, FunctionTable
+from .registry import register_strategy
 
+# Los mismos nodos que usan _compute_cc y _compute_nesting, por nombre (para el IR)
+_DECISION_TYPES = {"If", "For", "AsyncFor", "While", "With", "AsyncWith", "ExceptHandler", "Assert"}
+_NESTING_TYPES = {"If", "For", "AsyncFor", "While", "Try", "FunctionDef", "AsyncFunctionDef"}
+
+@register_strategy
 class FunctionsStrategy(MetricStrategy):
     """
     Estrategia compleja que analiza definiciones de funciones usando AST.
     Calcula: LOC, Argumentos, Complejidad Ciclomática y Anidamiento.
     """
+    name = "functions"
+    output_key = "functions"
+    inputs = ("ast",)
+    cost = 3
+    supports_ir = True
+    supports_tokens = True
 
-    def compute(self, ast_node: Any, **kwargs) -> Dict[str, Any]:
+    def compute(self, ast_node: Any, **kwargs) -> FunctionTable:
         """
         Recorre el AST buscando funciones y calculando sus métricas.
         
@@ -16,13 +29,13 @@ class FunctionsStrategy(MetricStrategy):
             ast_node (ast.AST): El árbol sintáctico del módulo (archivo).
             
         Returns:
-            Dict[str, Any]: Diccionario con las métricas de cada función.
+            FunctionTable: Las métricas de cada función, accesibles como un dict.
             Ej: { "mi_funcion": {"loc": 10, "params": 2, "cc": 3, "max_nesting": 1} }
         """
-        results = {}
+        results = []
         
         if not isinstance(ast_node, ast.AST):
-            return results
+            return FunctionTable()
 
         for node in ast.walk(ast_node):
             if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
@@ -42,14 +55,45 @@ class FunctionsStrategy(MetricStrategy):
                 # 4. Profundidad máxima de anidamiento
                 max_nesting = self._compute_nesting(node)
 
-                results[func_name] = {
-                    "loc": loc,
-                    "params": num_params,
-                    "cc": cc,
-                    "max_nesting": max_nesting
-                }
+                results.append((func_name, FunctionRecord(loc, num_params, cc, max_nesting)))
+
+        return FunctionTable(results)
+
+    def compute_ir(self, ir: Dict[str, Any], tree=None, **kwargs) -> FunctionTable:
+        """
+        Lo mismo que 'compute' sobre el árbol ligero del IR
+        (la etiqueta de una función es [nombre, nº de parámetros]).
+        """
+        results = []
+        if tree is None:
+            return FunctionTable()
+        for node in tree.walk():
+            if node.type in ("FunctionDef", "AsyncFunctionDef"):
+                name, num_params = node.label
+                cc = 1
+                for inner in node.walk():
+                    if inner.type in _DECISION_TYPES:
+                        cc += 1
+                    elif inner.type == "BoolOp":
+                        cc += inner.label - 1
+                results.append((name, FunctionRecord((node.end_lineno - node.lineno) + 1, num_params,
+                                                     cc, self._ir_nesting(node))))
+        return FunctionTable(results)
 
-        return results
+    def compute_tokens(self, scan: Dict[str, Any], **kwargs) -> FunctionTable:
+        """
+        Aproximación sin AST: cada 'def' con su bloque (por indentación) y los
+        puntos de decisión al inicio de sus sentencias.
+        """
+        return FunctionTable((name, FunctionRecord(loc, params, cc, nesting))
+                             for name, loc, params, cc, nesting in scan["functions"])
+
+    def _ir_nesting(self, node, current_depth: int = 0) -> int:
+        max_depth = current_depth
+        for child in node.children:
+            next_depth = current_depth + (child.type in _NESTING_TYPES)
+            max_depth = max(max_depth, self._ir_nesting(child, next_depth))
+        return max_depth
 
     def _compute_cc(self, func_node: ast.AST) -> int:
         """
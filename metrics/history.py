@@ -0,0 +1,151 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from repo.sources import GitBlobReader, GitTreeSource, SourceFile
+from .ir import IR_VERSION, IRCollector
+from .records import FileRecord
+from .registry import resolve_metrics
+
+# Blobs por tarea del pool: equilibrio entre repartir bien y serializar poco
+CHUNK_SIZE = 64
+
+# Fachada de cada proceso del pool (se crea una vez por proceso)
+_WORKER_FACADE = None
+
+def _compute_blobs(git_dir: str, blobs: List[Tuple[str, str, int]], selected: List[str],
+                   strategy_options: Dict[str, Any], known_ir: Optional[List[str]]):
+    """
+    Tarea de un proceso del pool: métricas de cada blob [(sha, ruta, tamaño)].
+    Cada proceso abre su propio 'git cat-file --batch' sobre el mirror.
+    Con 'known_ir' (blobs que ya tienen IR) devuelve también los IR nuevos,
+    que guarda el proceso principal. Devuelve ([(sha, métricas)], [(sha, IR)]).
+    """
+    global _WORKER_FACADE
+    if _WORKER_FACADE is None:
+        from .facade import MetricsFacade
+        _WORKER_FACADE = MetricsFacade()
+    ir = IRCollector(None, known_ir) if known_ir is not None else None
+    reader = GitBlobReader(Path(git_dir))
+    try:
+        results = [(sha, _blob_metrics(_WORKER_FACADE, reader, sha, path, size, selected,
+                                       strategy_options, ir))
+                   for sha, path, size in blobs]
+    finally:
+        reader.close()
+    return results, (ir.take() if ir is not None else [])
+
+def _blob_metrics(facade, reader: GitBlobReader, sha: str, path: str, size: int,
+                  selected: List[str], strategy_options: Dict[str, Any],
+                  ir: Optional[IRCollector] = None) -> Dict[str, Any]:
+    """
+    Métricas de un blob sin 'path' ni 'name': dependen solo del contenido, así
+    que sirven para cualquier ruta y commit en que aparezca el mismo blob.
+    """
+    metrics = facade.compute_file(SourceFile(path, size, lambda: reader.read(sha), sha=sha),
+                                  selected, strategy_options, ir)
+    del metrics["path"], metrics["name"]
+    return metrics
+
+
+class HistorySweep:
+    """
+    Analiza una serie de commits de un repositorio reutilizando los resultados
+    por blob: un archivo que no cambia entre commits (mismo sha) se calcula una
+    sola vez, y los blobs nuevos se reparten entre un pool de procesos.
+    El coste crece con el número de blobs distintos, no con commits × archivos.
+    """
+
+    def __init__(self, facade, workers: int = 0, ir_store=None):
+        """
+        Args:
+            facade (MetricsFacade): Fachada que calcula y agrega las métricas.
+            workers (int): Procesos del pool (0 = uno por CPU; 1 = sin pool).
+            ir_store: Dónde guardar el IR de los blobs nuevos (DBManager); None = no se guarda.
+        """
+        self.facade = facade
+        self.workers = workers or os.cpu_count() or 1
+        self.ir_store = ir_store
+        # sha del blob -> métricas (sin ruta); vale para todos los commits del barrido
+        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.blobs_total = 0
+        self.blobs_computed = 0
+
+    def run(self, git_dir: Path, commits: List[str], name: str,
+            options: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Genera el informe de cada commit, en el orden recibido.
+
+        Args:
+            git_dir (Path): Repo git (el mirror bare) que contiene los commits.
+            commits (list[str]): SHAs a analizar (del más antiguo al más reciente).
+            name (str): Nombre del repositorio en los informes.
+            options (dict): Las de compute_all (metrics, dup_window...).
+        """
+        from .facade import ReportBuilder
+
+        options = options or {}
+        selected = resolve_metrics(options.get("metrics"))
+        strategy_options = self.facade.strategy_options(options)
+        used_options = self.facade._used_options(selected, strategy_options)
+
+        # 1. Árboles de todos los commits (solo rutas y shas: no se lee contenido)
+        reader = GitBlobReader(git_dir)
+        try:
+            trees = [GitTreeSource(git_dir, commit, name, reader).entries() for commit in commits]
+
+            # 2. Blobs distintos que aún no se han calculado
+            pending: Dict[str, Tuple[str, int]] = {}
+            for entries in trees:
+                for path, (sha, size) in entries.items():
+                    if sha not in self.cache:
+                        pending.setdefault(sha, (path, size))
+            self.blobs_total = len(self.cache) + len(pending)
+            print(f"[Historial] {len(commits)} commits, {self.blobs_total} blobs distintos, "
+                  f"{len(pending)} por calcular")
+            self._compute(git_dir, reader, pending, selected, strategy_options)
+        finally:
+            reader.close()
+
+        # 3. Cada commit se agrega a partir de los resultados por blob
+        for commit, entries in zip(commits, trees):
+            report = ReportBuilder(self.facade.config, selected)
+            for path in sorted(entries, key=lambda p: PurePosixPath(p).parts):
+                metrics = FileRecord(self.cache[entries[path][0]], path=path,
+                                     name=PurePosixPath(path).name)
+                report.add(metrics)
+            result = report.build(name, used_options)
+            result["commit"] = commit
+            yield result
+
+    def _compute(self, git_dir: Path, reader: GitBlobReader, pending: Dict[str, Tuple[str, int]],
+                 selected: List[str], strategy_options: Dict[str, Any]) -> None:
+        blobs = [(sha, path, size) for sha, (path, size) in pending.items()]
+        self.blobs_computed += len(blobs)
+        ir = None
+        if self.ir_store is not None and blobs:
+            ir = IRCollector(self.ir_store)
+            ir.prime(pending)
+
+        # Pocos blobs (o un solo worker): arrancar procesos costaría más que calcularlos
+        if self.workers <= 1 or len(blobs) <= CHUNK_SIZE:
+            try:
+                for sha, path, size in blobs:
+                    self.cache[sha] = _blob_metrics(self.facade, reader, sha, path, size,
+                                                    selected, strategy_options, ir)
+            finally:
+                if ir is not None:
+                    ir.flush()
+            return
+
+        chunks = [blobs[i:i + CHUNK_SIZE] for i in range(0, len(blobs), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as pool:
+            futures = [pool.submit(_compute_blobs, str(git_dir), chunk, selected, strategy_options,
+                                   [sha for sha, _, _ in chunk if not ir.wants(sha)] if ir else None)
+                       for chunk in chunks]
+            for future in futures:
+                results, irs = future.result()
+                self.cache.update(results)
+                if irs:
+                    self.ir_store.save_ir(irs, IR_VERSION)
@@ -1,18 +1,28 @@
 import ast
-from typing import Any
+from typing import Any, Dict
 from .base import MetricStrategy
+from .registry import register_strategy
 
+@register_strategy
 class NumImportsStrategy(MetricStrategy):
     """
     Estrategia para contar el número de sentencias de importación.
     Usa AST (Abstract Syntax Tree) para evitar falsos positivos en comentarios o strings.
     """
+    name = "imports"
+    output_key = "num_imports"
+    inputs = ("ast",)
+    cost = 2
+    supports_ir = True
+    supports_tokens = True
+
     def compute(self, source: Any, **kwargs) -> int:
         """
         Analiza el árbol sintáctico y cuenta nodos Import e ImportFrom.
         
         Args:
-            source (str): El código fuente del archivo.
+            source (str | ast.AST): El código fuente del archivo, o su árbol ya
+                parseado (la fachada reutiliza el AST que ya tiene).
             
         Returns:
             int: Cantidad de imports encontrados.
@@ -20,13 +30,16 @@ class NumImportsStrategy(MetricStrategy):
         if not source:
             return 0
         
-        try:
-            # Parseamos el código fuente a un árbol de nodos
-            tree = ast.parse(source)
-        except SyntaxError:
-            # Si el archivo tiene errores de sintaxis (no es Python válido),
-            # devolvemos 0 porque no podemos analizarlo con AST.
-            return 0
+        if isinstance(source, ast.AST):
+            tree = source
+        else:
+            try:
+                # Parseamos el código fuente a un árbol de nodos
+                tree = ast.parse(source)
+            except SyntaxError:
+                # Si el archivo tiene errores de sintaxis (no es Python válido),
+                # devolvemos 0 porque no podemos analizarlo con AST.
+                return 0
         
         count = 0
         # ast.walk recorre todos los nodos del árbol recursivamente
@@ -34,4 +47,12 @@ class NumImportsStrategy(MetricStrategy):
             # Detectamos: "import x" (ast.Import) y "from x import y" (ast.ImportFrom)
             if isinstance(node, (ast.Import, ast.ImportFrom)):
                 count += 1
-        return count
\ No newline at end of file
+        return count
+
+    def compute_ir(self, ir: Dict[str, Any], tree=None, **kwargs) -> int:
+        if tree is None:
+            return 0
+        return sum(1 for node in tree.walk() if node.type in ("Import", "ImportFrom"))
+
+    def compute_tokens(self, scan: Dict[str, Any], **kwargs) -> int:
+        return len(scan["imports"])
@@ -0,0 +1,247 @@
+import ast
+import collections
+import hashlib
+import io
+import json
+import sys
+import tokenize
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .fallback import scan_tokens
+
+# Versión del formato: un IR de otra versión se ignora (como si no existiera)
+IR_VERSION = 2
+
+# Etiquetas de constantes más largas que esto se guardan como hash
+MAX_LABEL = 64
+
+def content_hash(data: bytes) -> str:
+    """
+    Huella del contenido de un archivo. Es el sha1 de blob de git, así que en un
+    árbol de git coincide con el sha que ya da 'ls-tree' (no hay que leer nada).
+    """
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def _short_hash(text: str) -> str:
+    return "#" + hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=8).hexdigest()
+
+def build_ir(content: str, tree: Optional[ast.AST],
+             scan: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Representación intermedia de un archivo, independiente de las métricas:
+    - text:   nº de líneas y de líneas con TODO/FIXME.
+    - lines:  hash de cada línea normalizada (sin espacios en los extremos, sin vacías).
+    - tokens: resumen del flujo de tokens (recuento por tipo y por operador).
+    - ast:    árbol ligero (tipos, posiciones y los nombres que usan las métricas),
+              o None si el archivo no compila.
+    - degraded: si no compila, las métricas aproximadas por tokens (metrics/fallback.py).
+
+    Args:
+        content (str): Contenido del archivo.
+        tree (ast.AST): Su AST ya parseado (None si falló el parseo).
+        scan (dict): scan_tokens(content) si ya se calculó (solo sin árbol).
+    """
+    if tree is None and scan is None:
+        scan = scan_tokens(content)
+    lines = content.splitlines()
+    normalized = [line.strip() for line in lines]
+    line_hashes = b"".join(
+        hashlib.blake2b(line.encode("utf-8", "surrogatepass"), digest_size=8).digest()
+        for line in normalized if line
+    )
+    return {
+        "v": IR_VERSION,
+        "py": "%d.%d" % sys.version_info[:2],
+        "text": {
+            "lines": len(lines),
+            "todo_lines": sum(1 for line in lines if "TODO" in line or "FIXME" in line),
+        },
+        "lines": line_hashes.hex(),
+        "tokens": _token_summary(content),
+        "ast": _flatten(tree) if isinstance(tree, ast.AST) else None,
+        "degraded": scan if tree is None else None,
+    }
+
+def _token_summary(content: str) -> Dict[str, Any]:
+    counts: Dict[str, int] = collections.Counter()
+    operators: Dict[str, int] = collections.Counter()
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(content).readline):
+            counts[tokenize.tok_name[tok.type]] += 1
+            if tok.type == tokenize.OP:
+                operators[tok.string] += 1
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        # El resumen se queda con los tokens leídos hasta el error
+        pass
+    return {"counts": dict(counts), "operators": dict(operators)}
+
+def _label(node: ast.AST) -> Any:
+    """
+    Lo que se guarda de cada nodo además de su tipo (None = nada).
+    """
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return [node.name, len(node.args.args)]
+    if isinstance(node, ast.ClassDef):
+        return node.name
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Constant):
+        text = str(node.value)
+        return text if len(text) <= MAX_LABEL else _short_hash(text)
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.arg):
+        return node.arg
+    if isinstance(node, ast.alias):
+        return node.name
+    if isinstance(node, ast.ImportFrom):
+        return [node.module or "", node.level]
+    if isinstance(node, ast.BoolOp):
+        return len(node.values)
+    return None
+
+def _flatten(tree: ast.AST) -> Dict[str, Any]:
+    """
+    AST en preorden como columnas de enteros (compacto y rápido de leer):
+    tipo (índice en 'types'), nº de hijos, línea de inicio y de fin, y las
+    etiquetas solo de los nodos que tienen ([índice, etiqueta]).
+    """
+    types: Dict[str, int] = {}
+    kinds: List[int] = []
+    arity: List[int] = []
+    starts: List[int] = []
+    ends: List[int] = []
+    labels: List[List[Any]] = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        # El contexto (Load/Store) no lo usa ninguna métrica y está en cada nombre
+        children = [c for c in ast.iter_child_nodes(node) if not isinstance(c, ast.expr_context)]
+        kinds.append(types.setdefault(type(node).__name__, len(types)))
+        arity.append(len(children))
+        start = getattr(node, "lineno", None) or 0
+        starts.append(start)
+        ends.append(getattr(node, "end_lineno", None) or start)
+        label = _label(node)
+        if label is not None:
+            labels.append([len(kinds) - 1, label])
+        stack.extend(reversed(children))
+    return {"types": list(types), "kind": kinds, "arity": arity,
+            "start": starts, "end": ends, "labels": labels}
+
+
+class IRNode:
+    """
+    Nodo del árbol ligero. Imita lo que las métricas usan de ast.AST:
+    el tipo (por nombre), las posiciones, los hijos y una etiqueta.
+    """
+    __slots__ = ("type", "lineno", "end_lineno", "label", "children")
+
+    def __init__(self, type_name: str, lineno: int, end_lineno: int, label: Any):
+        self.type = type_name
+        self.lineno = lineno
+        self.end_lineno = end_lineno
+        self.label = label
+        self.children: List["IRNode"] = []
+
+    def walk(self) -> Iterator["IRNode"]:
+        """
+        Recorre el subárbol en anchura, en el mismo orden que ast.walk.
+        """
+        todo = collections.deque([self])
+        while todo:
+            node = todo.popleft()
+            todo.extend(node.children)
+            yield node
+
+
+def load_tree(ir: Dict[str, Any]) -> Optional[IRNode]:
+    """
+    Reconstruye el árbol ligero de un IR (None si el archivo no compilaba).
+    """
+    flat = ir.get("ast")
+    if flat is None:
+        return None
+    labels = {index: label for index, label in flat["labels"]}
+    types = flat["types"]
+    root: Optional[IRNode] = None
+    # Pila de (nodo, hijos que le faltan)
+    stack: List[List[Any]] = []
+    for i, (kind, arity) in enumerate(zip(flat["kind"], flat["arity"])):
+        node = IRNode(types[kind], flat["start"][i], flat["end"][i], labels.get(i))
+        if stack:
+            parent = stack[-1]
+            parent[0].children.append(node)
+            parent[1] -= 1
+            if parent[1] == 0:
+                stack.pop()
+                while stack and stack[-1][1] == 0:
+                    stack.pop()
+        else:
+            root = node
+        if arity:
+            stack.append([node, arity])
+    return root
+
+def line_hashes(ir: Dict[str, Any]) -> List[str]:
+    """
+    Hashes (hex, 16 caracteres) de las líneas normalizadas, en orden.
+    """
+    data = ir["lines"]
+    return [data[i:i + 16] for i in range(0, len(data), 16)]
+
+def encode_ir(ir: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(ir, separators=(",", ":")).encode(), 6)
+
+def decode_ir(data: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(data))
+
+
+class IRCollector:
+    """
+    Acumula los IR de un análisis y los guarda por lotes en 'store'
+    (repo.db_manager.DBManager: known_ir / save_ir). Un IR ya guardado
+    (mismo contenido, misma versión) no se vuelve a construir.
+    Sin 'store' (ej. en un proceso del pool del barrido) los IR se quedan
+    pendientes hasta que alguien los recoge con 'take'.
+    """
+
+    BATCH = 200
+
+    def __init__(self, store, known: Iterable[str] = ()):
+        self.store = store
+        self._known: set = set(known)
+        self._pending: Dict[str, bytes] = {}
+
+    def prime(self, blobs: Iterable[str]) -> None:
+        """
+        Consulta de una vez qué contenidos ya tienen IR (ej. los blobs de un árbol git).
+        """
+        blobs = [b for b in blobs if b]
+        if blobs:
+            self._known.update(self.store.known_ir(blobs, IR_VERSION))
+
+    def wants(self, blob: str) -> bool:
+        return blob not in self._known and blob not in self._pending
+
+    def add(self, blob: str, ir: Dict[str, Any]) -> None:
+        self._pending[blob] = encode_ir(ir)
+        if len(self._pending) >= self.BATCH:
+            self.flush()
+
+    def take(self) -> List[tuple]:
+        """
+        Devuelve y vacía los IR pendientes [(blob, datos comprimidos)].
+        """
+        items = list(self._pending.items())
+        self._known.update(self._pending)
+        self._pending.clear()
+        return items
+
+    def flush(self) -> None:
+        if not self._pending or self.store is None:
+            return
+        self.store.save_ir(list(self._pending.items()), IR_VERSION)
+        self._known.update(self._pending)
+        self._pending.clear()
@@ -1,10 +1,18 @@
-from typing import Any
+from typing import Any, Dict
 from .base import MetricStrategy
+from .registry import register_strategy
 
+@register_strategy
 class LinesStrategy(MetricStrategy):
     """
     Estrategia para contar las líneas totales de un fichero (LOC).
     """
+    name = "lines"
+    output_key = "loc"
+    inputs = ("text",)
+    cost = 1
+    supports_ir = True
+
     def compute(self, source: Any, **kwargs) -> int:
         """
         Cuenta los saltos de línea en el código fuente.
@@ -22,10 +30,20 @@ class LinesStrategy(MetricStrategy):
         # diferentes finales de línea (\r\n, \n, \r) automáticamente.
         return len(source.splitlines())
 
+    def compute_ir(self, ir: Dict[str, Any], tree=None, **kwargs) -> int:
+        return ir["text"]["lines"]
+
+@register_strategy
 class TodoStrategy(MetricStrategy):
     """
     Estrategia para contar marcas de deuda técnica (TODO, FIXME).
     """
+    name = "todos"
+    output_key = "todos"
+    inputs = ("text",)
+    cost = 1
+    supports_ir = True
+
     def compute(self, source: Any, **kwargs) -> int:
         """
         Escanea el código buscando 'TODO' o 'FIXME' (mayúsculas).
@@ -47,4 +65,7 @@ class TodoStrategy(MetricStrategy):
             if  "TODO" in line or "FIXME" in line:
                 count += 1
         
-        return count
\ No newline at end of file
+        return count
+
+    def compute_ir(self, ir: Dict[str, Any], tree=None, **kwargs) -> int:
+        return ir["text"]["todo_lines"]
@@ -1,15 +1,29 @@
 import ast
 import math
 from pathlib import Path
-from typing import Any, Set
+from typing import Any, Dict, Set
 from .base import MetricStrategy
+from .ir import line_hashes
+from .registry import register_strategy
 
+# Nodos de decisión y operadores por nombre (para calcular desde el IR)
+_DECISION_TYPES = {"If", "For", "AsyncFor", "While", "With", "AsyncWith", "ExceptHandler", "Assert"}
+_OPERATOR_TYPES = {"Add", "Sub", "Mult", "Div", "Mod", "Pow", "LShift", "RShift",
+                   "BitOr", "BitXor", "BitAnd", "FloorDiv"}
+
+@register_strategy
 class MaintainabilityStrategy(MetricStrategy):
     """
     Calcula el Índice de Mantenibilidad (Maintainability Index - MI).
     Formula Original: MI = 171 -5.2 * ln(V) -0.23 * CC - 16.2 * ln(LOC)
     Luego se escala al rango 0-100.
     """
+    name = "maintainability"
+    output_key = "maintainability"
+    inputs = ("path", "source", "ast")
+    cost = 8
+    supports_ir = True
+    supports_tokens = True
 
     def compute(self, filepath: Any, **kwargs) -> float:
         """
@@ -17,6 +31,8 @@ class MaintainabilityStrategy(MetricStrategy):
 
         Args:
             filepath (Path): Ryta al fichero.
+            source (str, opcional): Contenido ya leído (ej. de un zip); evita leer 'filepath'.
+            ast (ast.AST, opcional): Su árbol ya parseado por la fachada; evita parsearlo otra vez.
 
         Returns:
             float: Valor entre 0 y 100.
@@ -25,11 +41,15 @@ class MaintainabilityStrategy(MetricStrategy):
             filepath = Path(str(filepath))
 
         try:
-            content = filepath.read_text(encoding='utf-8', errors='ignore')
+            content = kwargs.get('source')
+            if content is None:
+                content = filepath.read_text(encoding='utf-8', errors='ignore')
             if not content.strip():
                 return 100.0
-                
-            tree = ast.parse(content)
+
+            tree = kwargs.get('ast')
+            if tree is None:
+                tree = ast.parse(content)
         except Exception:
             return 0.0
 
@@ -44,6 +64,47 @@ class MaintainabilityStrategy(MetricStrategy):
         # 3. Calcular Volumen de Halstead (V)
         volume = self._compute_halstead_volume(tree)
 
+        return self._index(volume, cc, loc)
+
+    def compute_ir(self, ir: Dict[str, Any], tree=None, **kwargs) -> float:
+        """
+        Igual que 'compute' desde el IR: las LOC son las líneas normalizadas y
+        CC y Halstead salen del árbol ligero (mismos nodos, por nombre).
+        """
+        loc = len(line_hashes(ir))
+        if loc == 0:
+            return 100.0
+        if tree is None:
+            return 0.0
+
+        cc = 1
+        operators = operands = 0
+        unique_operators: Set[str] = set()
+        unique_operands: Set[str] = set()
+        for node in tree.walk():
+            if node.type in _DECISION_TYPES:
+                cc += 1
+            elif node.type == "BoolOp":
+                cc += node.label - 1
+            elif node.type in _OPERATOR_TYPES:
+                operators += 1
+                unique_operators.add(node.type)
+            elif node.type in ("Name", "Constant"):
+                operands += 1
+                unique_operands.add(node.label)
+        n = len(unique_operators) + len(unique_operands)
+        volume = (operators + operands) * math.log2(n) if n else 0.0
+        return self._index(volume, cc, loc)
+
+    def compute_tokens(self, scan: Dict[str, Any], **kwargs) -> float:
+        """
+        Aproximación sin AST: CC y volumen de Halstead contados sobre los tokens.
+        """
+        if scan["code_lines"] == 0:
+            return 100.0
+        return self._index(scan["volume"], scan["cc"], scan["code_lines"])
+
+    def _index(self, volume: float, cc: int, loc: int) -> float:
         # 4. Aplicar Fórmula MI
         # Evitamos log(0) usando max(1, value)
         try:
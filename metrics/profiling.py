@@ -0,0 +1,214 @@
+import cProfile
+import contextlib
+import io
+import json
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Ficheros que deja un análisis perfilado en su carpeta (profiles_dir/<id>/)
+ARTIFACTS = {
+    "summary.json": "application/json",  # tiempos y memoria por fase, estrategia y archivo
+    "cpu.pstats": "application/octet-stream",  # estadísticas de cProfile (pstats / snakeviz)
+    "cpu.txt": "text/plain",  # las funciones más costosas, ya legibles
+    "memory.txt": "text/plain",  # dónde se reservó la memoria en cada fase (tracemalloc)
+}
+
+# Las reservas del propio tracemalloc y del sistema de imports no interesan
+_IGNORE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+)
+
+# tracemalloc es de todo el proceso: lo arranca el primer perfil activo y lo
+# para el último (a menos que ya estuviera activo por otra vía, ej. PYTHONTRACEMALLOC)
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+def _acquire_tracing() -> None:
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_users += 1
+
+def _release_tracing() -> None:
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+def stage(profiler: Optional["AnalysisProfiler"], name: str):
+    """
+    profiler.stage(name), o un contexto vacío si no se está perfilando.
+    """
+    return profiler.stage(name) if profiler is not None else contextlib.nullcontext()
+
+
+class AnalysisProfiler:
+    """
+    Perfil de CPU (cProfile) y memoria (tracemalloc) de un análisis concreto.
+
+    - stage(): fases gruesas (clone, discovery, metrics, report, db_write):
+      tiempo, memoria neta y pico, y una instantánea de tracemalloc al final.
+    - step(): pasos que se repiten en cada archivo (parse, cada estrategia): se acumulan.
+    - file(): tiempo y pico de memoria de cada archivo (los más pesados van al resumen).
+
+    cProfile solo ve el hilo que llama a start(); tracemalloc es de todo el
+    proceso (se comparte entre perfiles simultáneos y lo para el último), así
+    que con varios análisis a la vez la memoria se mezcla.
+    """
+
+    def __init__(self, top_n: int = 20):
+        self.top_n = top_n
+        self.cpu = cProfile.Profile()
+        self.stages: List[Dict[str, Any]] = []
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        # Última instantánea de tracemalloc y lo reservado en cada fase respecto a ella
+        self._snapshot = None
+        self._memory: List[str] = []
+        self._tracing = False
+        self._cpu_active = False
+        self._started = None
+        self._stopped = None
+        # Pico de memoria de la fase en curso (file() reinicia el de tracemalloc)
+        self._stage_peak = 0
+
+    def start(self) -> "AnalysisProfiler":
+        _acquire_tracing()
+        self._tracing = True
+        self._snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORE)
+        try:
+            self.cpu.enable()
+            self._cpu_active = True
+        except ValueError:
+            # Ya hay otro perfilador activo en este hilo: solo se mide la memoria
+            print("[Profiler] cProfile ya está activo; se perfila solo la memoria")
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            return
+        self._stopped = time.perf_counter()
+        if self._cpu_active:
+            self.cpu.disable()
+        if self._tracing:
+            self._tracing = False
+            _release_tracing()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self._stage_peak = 0
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            entry = {"stage": name, "seconds": round(seconds, 4)}
+            # Si alguien ajeno a los perfiles ha parado tracemalloc solo queda el tiempo
+            if tracemalloc.is_tracing():
+                after, peak = tracemalloc.get_traced_memory()
+                entry["allocated"] = after - current
+                entry["peak"] = max(peak, self._stage_peak) - current
+            self.stages.append(entry)
+            self._compare(name)
+
+    @contextlib.contextmanager
+    def step(self, name: str):
+        before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            totals = self.steps.setdefault(name, {"calls": 0, "seconds": 0.0, "allocated": 0})
+            totals["calls"] += 1
+            totals["seconds"] += time.perf_counter() - started
+            if tracemalloc.is_tracing():
+                totals["allocated"] += tracemalloc.get_traced_memory()[0] - before
+
+    @contextlib.contextmanager
+    def file(self, path: str):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            before, peak = tracemalloc.get_traced_memory()
+            self._stage_peak = max(self._stage_peak, peak)
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            entry = self.files.setdefault(path, {"path": path, "seconds": 0.0, "peak": 0})
+            entry["seconds"] += seconds
+            if tracing and tracemalloc.is_tracing():
+                _, peak = tracemalloc.get_traced_memory()
+                self._stage_peak = max(self._stage_peak, peak)
+                entry["peak"] = max(entry["peak"], peak - before)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Resumen en JSON: fases, pasos acumulados y los archivos más pesados
+        (por tiempo y por pico de memoria). La memoria va en bytes.
+        """
+        end = self._stopped if self._stopped is not None else time.perf_counter()
+        steps = [dict(totals, step=name, seconds=round(totals["seconds"], 4))
+                 for name, totals in sorted(self.steps.items(), key=lambda kv: -kv[1]["seconds"])]
+        files = list(self.files.values())
+        by_time = sorted(files, key=lambda f: -f["seconds"])[:self.top_n]
+        by_memory = sorted(files, key=lambda f: -f["peak"])[:self.top_n]
+        return {
+            "seconds": round(end - self._started, 4) if self._started is not None else None,
+            "cpu_profiled": self._cpu_active,
+            "stages": self.stages,
+            "steps": steps,
+            "files_profiled": len(files),
+            "slowest_files": [dict(f, seconds=round(f["seconds"], 4)) for f in by_time],
+            "largest_files": [dict(f, seconds=round(f["seconds"], 4)) for f in by_memory],
+        }
+
+    def save(self, directory: Path) -> List[str]:
+        """
+        Escribe los artefactos (ARTIFACTS) en 'directory'. Devuelve sus nombres.
+        """
+        self.stop()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "summary.json").write_text(json.dumps(self.summary(), indent=2))
+
+        written = ["summary.json"]
+        if self._cpu_active:
+            import pstats
+            self.cpu.dump_stats(str(directory / "cpu.pstats"))
+            text = io.StringIO()
+            pstats.Stats(self.cpu, stream=text).sort_stats("cumulative").print_stats(50)
+            (directory / "cpu.txt").write_text(text.getvalue())
+            written += ["cpu.pstats", "cpu.txt"]
+
+        (directory / "memory.txt").write_text("\n".join(self._memory))
+        written.append("memory.txt")
+        print(f"[Profiler] Perfil guardado en {directory}")
+        return written
+
+    def _compare(self, name: str) -> None:
+        # Solo se conserva la última instantánea: la diferencia se pasa a texto ya
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORE)
+        self._memory.append(f"== {name} ==")
+        for diff in snapshot.compare_to(self._snapshot, "lineno")[:self.top_n]:
+            self._memory.append(str(diff))
+        self._memory.append("")
+        self._snapshot = snapshot
@@ -0,0 +1,214 @@
+import json
+from array import array
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+# Campos con hueco propio en FileRecord (las claves de salida de las estrategias incluidas
+# y "degraded": el archivo no compila y sus métricas de AST son aproximadas)
+FILE_FIELDS = ("path", "name", "blob", "degraded", "loc", "todos", "num_imports", "dependencies",
+               "functions", "clones", "duplication", "maintainability")
+
+# Métricas de cada función, en el orden de las columnas de FunctionTable
+FUNCTION_FIELDS = ("loc", "params", "cc", "max_nesting")
+
+
+class FunctionRecord(Mapping):
+    """
+    Métricas de una función. Se comporta como el dict de antes
+    ({"loc": .., "params": .., "cc": .., "max_nesting": ..}) pero sin diccionario
+    por objeto.
+    """
+    __slots__ = FUNCTION_FIELDS
+
+    def __init__(self, loc: int, params: int, cc: int, max_nesting: int):
+        self.loc = loc
+        self.params = params
+        self.cc = cc
+        self.max_nesting = max_nesting
+
+    def __getitem__(self, key: str) -> int:
+        if key not in FUNCTION_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FUNCTION_FIELDS)
+
+    def __len__(self) -> int:
+        return len(FUNCTION_FIELDS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def to_dict(self) -> Dict[str, int]:
+        return {key: getattr(self, key) for key in FUNCTION_FIELDS}
+
+
+class FunctionTable(Mapping):
+    """
+    Funciones de un archivo {nombre: FunctionRecord} guardadas en columnas:
+    la lista de nombres y un array de enteros con las cuatro métricas de cada
+    una (unos 32 bytes por función en vez de un dict con sus claves).
+    Es de solo lectura; los FunctionRecord se crean al acceder.
+    """
+    __slots__ = ("_names", "_values")
+
+    def __init__(self, items: Iterable[Tuple[str, Any]] = ()):
+        """
+        Args:
+            items: Pares (nombre, métricas) con las métricas como mapping o FunctionRecord.
+                Un nombre repetido conserva su posición y se queda con las últimas
+                métricas (como al asignar en un dict).
+        """
+        merged: Dict[str, Any] = {}
+        for name, metrics in items:
+            merged[name] = metrics
+        self._names = list(merged)
+        self._values = array("q")
+        for metrics in merged.values():
+            self._values.extend(int(metrics[key]) for key in FUNCTION_FIELDS)
+
+    @classmethod
+    def from_dict(cls, functions: Mapping) -> "FunctionTable":
+        return functions if isinstance(functions, cls) else cls(functions.items())
+
+    def __getitem__(self, name: str) -> FunctionRecord:
+        try:
+            i = self._names.index(name)
+        except ValueError:
+            raise KeyError(name) from None
+        return self._record(i)
+
+    def _record(self, i: int) -> FunctionRecord:
+        width = len(FUNCTION_FIELDS)
+        return FunctionRecord(*self._values[i * width:(i + 1) * width])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def items(self):
+        # Recorrido secuencial sin buscar cada nombre
+        return [(name, self._record(i)) for i, name in enumerate(self._names)]
+
+    def values(self):
+        return [self._record(i) for i in range(len(self._names))]
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+    def __reduce__(self):
+        # Para pasar entre procesos (pool del barrido del historial)
+        return (_function_table, (self._names, self._values))
+
+    def to_dict(self) -> Dict[str, Dict[str, int]]:
+        return {name: record.to_dict() for name, record in self.items()}
+
+
+def _function_table(names, values) -> FunctionTable:
+    table = FunctionTable.__new__(FunctionTable)
+    table._names = names
+    table._values = values
+    return table
+
+
+class FileRecord(MutableMapping):
+    """
+    Métricas de un archivo. Las claves conocidas (FILE_FIELDS) van en slots;
+    las de otras estrategias, en un dict aparte que solo se crea si hace falta.
+    Se usa como el dict de antes (metrics["loc"], .get, .update, del...) en la
+    fachada, el proxy y la BD; solo se convierte a dict/JSON al salir (plain).
+    """
+    __slots__ = FILE_FIELDS + ("_extra",)
+
+    def __init__(self, data: Optional[Mapping] = None, **fields):
+        self._extra = None
+        if data is not None:
+            self.update(data)
+        if fields:
+            self.update(fields)
+
+    @classmethod
+    def from_json(cls, text: str) -> "FileRecord":
+        return cls(json.loads(text))
+
+    def __getitem__(self, key: str) -> Any:
+        if key in FILE_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == "functions" and isinstance(value, Mapping):
+            value = FunctionTable.from_dict(value)
+        if key in FILE_FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in FILE_FIELDS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is None or key not in self._extra:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in FILE_FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"FileRecord({dict(self)!r})"
+
+    def copy(self) -> "FileRecord":
+        return FileRecord(self)
+
+    def __getstate__(self):
+        return dict(self)
+
+    def __setstate__(self, state) -> None:
+        self._extra = None
+        self.update(state)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: plain(value) for key, value in self.items()}
+
+
+def plain(value: Any) -> Any:
+    """
+    Convierte registros (y las listas/dicts que los contienen) a dicts normales.
+    Para los bordes de la API: JSON, jsonify, CLI.
+    """
+    if isinstance(value, (FileRecord, FunctionTable, FunctionRecord)):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    return value
+
+def json_default(value: Any) -> Any:
+    """
+    'default' de json.dumps: serializa los registros sin convertir antes todo el informe.
+    """
+    if isinstance(value, (FileRecord, FunctionTable, FunctionRecord)):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,105 @@
+import importlib
+from typing import Dict, Iterable, List, Optional, Type
+
+from .base import MetricStrategy
+
+# Nombre de la métrica -> clase de la estrategia
+_REGISTRY: Dict[str, Type[MetricStrategy]] = {}
+
+# Módulos de las estrategias incluidas (se registran al importarse)
+_BUILTIN_MODULES = ("lines", "imports", "dependencies", "functions", "clones",
+                    "duplication", "maintainability")
+
+# Entradas que la fachada sabe preparar para una estrategia
+VALID_INPUTS = ("text", "lines", "ast", "path", "source")
+
+def register_strategy(cls: Type[MetricStrategy]) -> Type[MetricStrategy]:
+    """
+    Decorador que añade una estrategia al registro.
+    Valida los metadatos declarados para fallar al importar y no en mitad de un análisis.
+    """
+    if not cls.name or not cls.output_key:
+        raise ValueError(f"{cls.__name__} debe declarar 'name' y 'output_key'")
+    unknown = set(cls.inputs) - set(VALID_INPUTS)
+    if not cls.inputs or unknown:
+        raise ValueError(f"{cls.__name__}: entradas no válidas {sorted(unknown) or '()'}")
+    if cls.name in _REGISTRY and _REGISTRY[cls.name] is not cls:
+        raise ValueError(f"Ya existe una métrica registrada como '{cls.name}'")
+    _REGISTRY[cls.name] = cls
+    return cls
+
+def _load_builtin_strategies() -> None:
+    """
+    Importa los módulos de las estrategias incluidas para que se registren.
+    """
+    for name in _BUILTIN_MODULES:
+        importlib.import_module(f".{name}", __package__)
+
+def available_metrics() -> Dict[str, Type[MetricStrategy]]:
+    """
+    Devuelve todas las métricas registradas {nombre: clase}, de la más barata a
+    la más cara (a igual coste, por nombre). El orden no depende de qué módulo
+    se importó primero, así que es estable entre procesos.
+    """
+    _load_builtin_strategies()
+    ordered = sorted(_REGISTRY.values(), key=lambda cls: (cls.cost, cls.name))
+    return {cls.name: cls for cls in ordered}
+
+def resolve_metrics(selection: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Valida una selección de métricas y la devuelve en orden canónico (por coste).
+    None o una selección vacía significa 'todas'.
+
+    Raises:
+        ValueError: si se pide una métrica que no existe.
+    """
+    registry = available_metrics()
+    if not selection:
+        return list(registry)
+
+    wanted = {name.strip() for name in selection if name and name.strip()}
+    unknown = wanted - set(registry)
+    if unknown:
+        raise ValueError(
+            f"Métricas desconocidas: {', '.join(sorted(unknown))}. "
+            f"Disponibles: {', '.join(registry)}"
+        )
+    return [name for name in registry if name in wanted]
+
+def metrics_cache_key(names: Iterable[str]) -> str:
+    """
+    Clave canónica de un conjunto de métricas (independiente del orden).
+    """
+    return ",".join(sorted(names))
+
+def describe_metrics() -> List[Dict[str, object]]:
+    """
+    Metadatos de las métricas registradas (para la UI y la CLI).
+    """
+    return [
+        {"name": cls.name, "output_key": cls.output_key,
+         "inputs": list(cls.inputs), "cost": cls.cost, "ir": cls.supports_ir}
+        for cls in available_metrics().values()
+    ]
+
+def options_cache_key(names: Iterable[str], resolved_options: Dict[str, object]) -> str:
+    """
+    Clave canónica de las opciones que realmente afectan a las métricas elegidas.
+    Ej: con 'duplication' seleccionada -> "dup_window=4"; sin ella -> "".
+    Así, cambiar una opción que ninguna métrica usa no invalida la caché.
+    """
+    registry = available_metrics()
+    keys = sorted({key for name in names for key in registry[name].options.values()})
+    return ",".join(f"{key}={resolved_options.get(key)}" for key in keys)
+
+def metrics_affected_by(names: Iterable[str], old_options: Dict[str, object],
+                        new_options: Dict[str, object]) -> List[str]:
+    """
+    Métricas (de 'names') cuyo resultado cambia al pasar de old_options a new_options.
+    """
+    registry = available_metrics()
+    return [
+        name for name in names
+        if any(old_options.get(key) != new_options.get(key)
+               for key in registry[name].options.values())
+    ]
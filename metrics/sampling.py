@@ -0,0 +1,158 @@
+import math
+import random
+from bisect import bisect_right
+from pathlib import PurePosixPath
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Cuantil de la normal para un intervalo de confianza del 95%
+Z_95 = 1.96
+
+# Valores por archivo que se extrapolan al repositorio completo
+ESTIMATED_METRICS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "loc": lambda m: m.get("loc"),
+    "todos": lambda m: m.get("todos"),
+    "num_imports": lambda m: m.get("num_imports"),
+    "num_functions": lambda m: len(m["functions"]) if "functions" in m else None,
+    "duplication": lambda m: m.get("duplication"),
+    "maintainability": lambda m: m.get("maintainability"),
+}
+
+class StratifiedSampler:
+    """
+    Ordena los archivos de un repositorio para muestrearlos de forma progresiva.
+    Los estratos son (directorio de primer nivel, banda de tamaño). El orden
+    garantiza que cualquier prefijo es una muestra aleatoria estratificada:
+    primero un archivo de cada estrato y después en proporción al tamaño de cada uno.
+    """
+
+    # Número de bandas de tamaño (cuantiles del tamaño en bytes de todo el repo)
+    SIZE_BANDS = 4
+
+    def __init__(self, files: List[Any], seed: Optional[int] = None):
+        """
+        Args:
+            files: Archivos de la fuente (repo.sources.SourceFile: 'path' relativo y 'size').
+            seed: Semilla del orden (reproducibilidad).
+        """
+        rng = random.Random(seed)
+        sizes = [f.size for f in files]
+        thresholds = self._band_thresholds(sorted(sizes))
+
+        groups: Dict[str, List[Any]] = {}
+        for file_path, size in zip(files, sizes):
+            parts = PurePosixPath(file_path.path.replace("\\", "/")).parts
+            top = parts[0] if len(parts) > 1 else "."
+            band = bisect_right(thresholds, size)
+            groups.setdefault(f"{top}|{band}", []).append(file_path)
+
+        # Posición de cada archivo en su estrato normalizada a [0, 1): al ordenar por
+        # ella, cada prefijo toma de cada estrato una parte proporcional a su tamaño
+        keyed = []
+        for stratum in sorted(groups):
+            group = groups[stratum]
+            rng.shuffle(group)
+            for i, file_path in enumerate(group):
+                position = 0.0 if i == 0 else (i + rng.random()) / len(group)
+                keyed.append((position, rng.random(), stratum, file_path))
+        keyed.sort(key=lambda k: (k[0], k[1]))
+
+        self.strata_sizes: Dict[str, int] = {name: len(group) for name, group in groups.items()}
+        self.order: List[Tuple[str, Any]] = [(stratum, f) for _, _, stratum, f in keyed]
+
+    def batches(self, size: int) -> Iterator[List[Tuple[str, Any]]]:
+        """
+        Devuelve el orden de muestreo en lotes de 'size' archivos.
+        """
+        for start in range(0, len(self.order), size):
+            yield self.order[start:start + size]
+
+    def _band_thresholds(self, ordered_sizes: List[int]) -> List[int]:
+        if not ordered_sizes:
+            return []
+        n = len(ordered_sizes)
+        return sorted({ordered_sizes[(n * i) // self.SIZE_BANDS] for i in range(1, self.SIZE_BANDS)})
+
+
+class StratifiedEstimator:
+    """
+    Estimador estratificado de totales y medias con su intervalo de confianza.
+    Acumula n, suma y suma de cuadrados por estrato (memoria O(estratos)),
+    así que se puede consultar tras cada lote sin recorrer la muestra.
+    """
+
+    def __init__(self, strata_sizes: Dict[str, int]):
+        self.strata_sizes = strata_sizes
+        self.population = sum(strata_sizes.values())
+        # métrica -> estrato -> [n, suma, suma de cuadrados]
+        self._stats: Dict[str, Dict[str, List[float]]] = {key: {} for key in ESTIMATED_METRICS}
+
+    def add(self, stratum: str, metrics: Dict[str, Any]) -> None:
+        for key, extract in ESTIMATED_METRICS.items():
+            value = extract(metrics)
+            if value is None:
+                continue
+            acc = self._stats[key].setdefault(stratum, [0, 0.0, 0.0])
+            acc[0] += 1
+            acc[1] += value
+            acc[2] += value * value
+
+    def estimate(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Total y media por archivo estimados para todo el repositorio (IC 95%).
+        Los estratos aún sin observar usan la media y varianza del conjunto de la muestra.
+        """
+        stats = self._stats[key]
+        sampled = int(sum(acc[0] for acc in stats.values()))
+        if sampled == 0 or self.population == 0:
+            return None
+
+        pooled_mean = sum(acc[1] for acc in stats.values()) / sampled
+        pooled_var = self._variance(sampled, sum(acc[1] for acc in stats.values()),
+                                    sum(acc[2] for acc in stats.values()))
+
+        total = 0.0
+        variance = 0.0
+        for stratum, size in self.strata_sizes.items():
+            n, s, ss = stats.get(stratum, (0, 0.0, 0.0))
+            if n == 0:
+                total += size * pooled_mean
+                variance += size * size * pooled_var
+                continue
+            s2 = self._variance(n, s, ss) if n > 1 else pooled_var
+            total += size * s / n
+            # Corrección por población finita: un estrato completo no aporta varianza
+            variance += size * size * (1 - n / size) * s2 / n
+
+        half = Z_95 * math.sqrt(max(variance, 0.0))
+        return {
+            "total": round(total, 4),
+            "total_ci": [round(total - half, 4), round(total + half, 4)],
+            "mean": round(total / self.population, 4),
+            "mean_ci": [round((total - half) / self.population, 4),
+                        round((total + half) / self.population, 4)],
+            "sampled": sampled,
+        }
+
+    def estimates(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for key in ESTIMATED_METRICS:
+            estimate = self.estimate(key)
+            if estimate is not None:
+                result[key] = estimate
+        return result
+
+    @staticmethod
+    def relative_precision(estimate: Dict[str, Any]) -> float:
+        """
+        Semiamplitud del intervalo relativa al valor estimado (0.05 = ±5%).
+        """
+        half = (estimate["total_ci"][1] - estimate["total_ci"][0]) / 2
+        if estimate["total"] == 0:
+            return 0.0 if half == 0 else math.inf
+        return abs(half / estimate["total"])
+
+    @staticmethod
+    def _variance(n: int, s: float, ss: float) -> float:
+        if n < 2:
+            return 0.0
+        return max((ss - s * s / n) / (n - 1), 0.0)
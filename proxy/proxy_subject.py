@@ -1,59 +1,594 @@
-from typing import List, Dict, Any
+import json
+import threading
+from pathlib import Path
+from typing import Iterator, List, Dict, Any, Optional
 
+from config import ConfigSingleton
+from deadline import Deadline, DeadlineExceeded
+from metrics.profiling import stage
+from repo.locks import LockTimeout
+from .scheduler import PRIORITIES, QueueTimeout
 from .subject_interface import SubjectInterface
-from repo.repo_manager import RepoManager
-from repo.db_manager import DBManager
-from metrics.facade import MetricsFacade
 
 class ProxySubject(SubjectInterface):
     """
     Proxy que gestiona el acceso al análisis de repositorios.
+    Los subsistemas (Repo, DB, Métricas) se crean de forma perezosa la primera
+    vez que se usan, para que importar/instanciar el proxy sea instantáneo.
     """
 
     def __init__(self):
-        # Inicializamos los subsistemas
-        self.repo_manager = RepoManager()
-        
-        # --- AQUÍ ES DONDE PROBABLEMENTE ESTABA EL ERROR ---
-        # Asegúrate de que pone 'db_manager' con 'b' de Barcelona (DataBase)
-        self.db_manager = DBManager()  
-        
-        self.facade = MetricsFacade()
-
-    def peticion(self, repo_url: str, force: bool = False) -> Dict[str, Any]:
+        self._repo_manager = None
+        self._db_manager = None
+        self._facade = None
+        self._scheduler = None
+        # Revalidación en segundo plano (proxy/revalidator.py); la conecta la web
+        self.revalidator = None
+        # Evita que dos hilos creen a la vez el mismo subsistema
+        self._init_lock = threading.Lock()
+
+    @property
+    def repo_manager(self):
+        if self._repo_manager is None:
+            with self._init_lock:
+                if self._repo_manager is None:
+                    from repo.repo_manager import RepoManager
+                    self._repo_manager = RepoManager()
+        return self._repo_manager
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            with self._init_lock:
+                if self._db_manager is None:
+                    from repo.db_manager import DBManager
+                    self._db_manager = DBManager()
+        return self._db_manager
+
+    @property
+    def facade(self):
+        if self._facade is None:
+            with self._init_lock:
+                if self._facade is None:
+                    from metrics.facade import MetricsFacade
+                    self._facade = MetricsFacade()
+        return self._facade
+
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            with self._init_lock:
+                if self._scheduler is None:
+                    from .scheduler import Scheduler
+                    self._scheduler = Scheduler()
+        return self._scheduler
+
+    def peticion(self, repo_url: str, force: bool = False,
+                 metrics: Optional[List[str]] = None,
+                 options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        from metrics.registry import resolve_metrics, metrics_cache_key, options_cache_key
+        from repo.sources import open_local_source
+
+        # 0. Clave de caché: (repo, commit, conjunto de métricas, opciones que usan).
+        #    Un análisis con otras métricas u opciones no sirve tal cual para esta petición.
+        options = dict(options or {})
+        config = ConfigSingleton.get_instance()
+        # Presupuesto de tiempo de toda la petición (clonado + búsqueda + métricas)
+        deadline = Deadline(options.pop("deadline", None) or config.analysis_deadline)
+        # Streaming: los archivos se escriben en la BD según se calculan (sin el informe completo en memoria)
+        stream = bool(options.pop("stream", None) or config.stream_results) and not options.get("approximate")
+        # Rama, tag o commit a analizar (None = rama por defecto del remoto)
+        ref = options.pop("ref", None) or None
+        if ref is not None and ref.startswith("-"):
+            raise ValueError(f"Referencia no válida: {ref}")
+        # Perfil de CPU y memoria (metrics/profiling.py): siempre se calcula, sin caché
+        profiler = None
+        if options.pop("profile", None):
+            from metrics.profiling import AnalysisProfiler
+            profiler = AnalysisProfiler(top_n=config.hotspots_top_n)
+            force = True
+        # Turno en los pools del planificador: quién lo pide y con qué prioridad
+        job = self._job(options, "interactive")
+        selected = resolve_metrics(metrics)
+        metrics_key = metrics_cache_key(selected)
+        resolved = self.facade.strategy_options(options)
+        options_key = options_cache_key(selected, resolved)
+
+        # Directorio local o archivo tar/zip: se lee en su sitio, sin clonar en repo_cache.
+        # Su "commit" es la huella del contenido (sha256 del archivo comprimido)
+        source = open_local_source(repo_url)
+        if source is not None:
+            repo_url = source.location
+            ref = None
+        if source is not None and options.get("approximate") and not source.random_access:
+            raise ValueError("El modo aproximado necesita acceso aleatorio: use un zip o un directorio")
+
+        if profiler is not None:
+            profiler.start()
+        try:
+            result = self._peticion(repo_url, source, ref, force, selected, options, resolved,
+                                    metrics_key, options_key, deadline, stream, job, profiler)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+            if source is not None:
+                source.close()
+        if profiler is not None:
+            result["profile"] = self._save_profile(profiler, result.get("id"))
+        return result
+
+    @staticmethod
+    def _save_profile(profiler, analysis_id: Optional[int]) -> Dict[str, Any]:
+        """
+        Guarda los artefactos junto al análisis (profiles_dir/<id>/) y devuelve el
+        resumen. Un informe que no se guarda (aproximado, sin archivos) no tiene
+        dónde dejarlos: solo se devuelve el resumen.
+        """
+        summary = profiler.summary()
+        if analysis_id is None:
+            return dict(summary, artifacts=[])
+        directory = ConfigSingleton.get_instance().profiles_dir / str(analysis_id)
+        return dict(summary, artifacts=profiler.save(directory), directory=str(directory))
+
+    def _peticion(self, repo_url: str, source, ref: Optional[str], force: bool, selected: List[str],
+                  options: Dict[str, Any], resolved: Dict[str, Any], metrics_key: str,
+                  options_key: str, deadline: Deadline, stream: bool,
+                  job: Dict[str, Any], profiler=None) -> Dict[str, Any]:
+        # Análisis parcial (se agotó el tiempo) que se puede continuar
+        resume_from = None
+
         # 1. Si NO forzamos, intentamos buscar en la Base de Datos (Cache)
         if not force:
-            # Revisa también aquí: self.db_manager
-            cached_result = self.db_manager.get_latest_analysis(repo_url)
-            if cached_result:
+            if source is not None:
+                local_path = None
+                commit = source.digest()
+            else:
+                # Si ya hay mirror local resolvemos la ref sin tocar la red
+                local_path = self.repo_manager.local_repo_path(repo_url)
+                commit = self.repo_manager.resolve_ref(local_path, ref) if local_path else None
+
+            # Con el commit conocido sirve el análisis de cualquier ref que apunte a él
+            cached_result = self.db_manager.get_latest_analysis(repo_url, metrics_key, options_key, commit, ref)
+            if cached_result and cached_result.get("partial"):
+                print(f"[Proxy] Análisis parcial en caché para: {repo_url}. Se continúa.")
+                resume_from = cached_result
+            elif cached_result:
                 print(f"[Proxy] Acierto de caché (Hit) para: {repo_url}")
                 cached_result["_from_cache"] = True
                 cached_result["forced"] = False
+                cached_result["ref"] = ref
+                # Se sirve ya; si hace tiempo que no se comprueba el remoto, se revisa aparte
+                if self.revalidator is not None and source is None:
+                    cached_result["_revalidating"] = self.revalidator.track(
+                        repo_url, ref, selected, options, metrics_key, options_key)
                 return cached_result
 
+            # Stale-while-revalidate: mientras se re-analiza en segundo plano
+            # (el mirror ya apunta al commit nuevo) se sirve el último análisis
+            if (self.revalidator is not None and source is None and resume_from is None
+                    and self.revalidator.is_revalidating(repo_url, ref, metrics_key, options_key)):
+                stale = self.db_manager.get_latest_analysis(repo_url, metrics_key, options_key, ref=ref)
+                if stale and not stale.get("partial"):
+                    print(f"[Proxy] Re-análisis en curso para: {repo_url}. Se sirve el anterior.")
+                    stale.update(_from_cache=True, _stale=True, forced=False, ref=ref)
+                    return stale
+
+            # 1b. Mismo commit y métricas con otras opciones: recalculamos solo lo afectado
+            if commit and resume_from is None:
+                self._job_size(job, repo_url, source)
+                reused = None
+                try:
+                    if local_path:
+                        # El lock evita que un refresco re-clone el mirror mientras se lee
+                        with self.repo_manager.repo_lock(repo_url):
+                            tree = self.repo_manager.open_tree(local_path, commit, repo_url, ref)
+                            try:
+                                with self.scheduler.cpu.slot(deadline=deadline, **job):
+                                    reused = self._recompute_from_cache(repo_url, tree, commit, ref, selected,
+                                                                        options, resolved, options_key)
+                            finally:
+                                tree.close()
+                    elif source.random_access:
+                        with self.scheduler.cpu.slot(deadline=deadline, **job):
+                            reused = self._recompute_from_cache(repo_url, source, commit, ref, selected,
+                                                                options, resolved, options_key)
+                except QueueTimeout:
+                    return self._timed_out(repo_url, selected, ref, force, deadline, QueueTimeout.stage)
+                if reused:
+                    return reused
+
         print(f"[Proxy] Fallo de caché (Miss) o forzado. Calculando: {repo_url}")
+        self._job_size(job, repo_url, source)
+
+        if source is not None:
+            # Sin clon no hace falta el lock del repo: el archivo local no se modifica aquí
+            commit = source.digest()
+            try:
+                with self.scheduler.cpu.slot(deadline=deadline, **job):
+                    result, sink = self._compute(source, repo_url, commit, ref, selected, options,
+                                                 metrics_key, options_key, deadline, stream, force,
+                                                 resume_from, profiler)
+            except QueueTimeout:
+                return self._timed_out(repo_url, selected, ref, force, deadline, QueueTimeout.stage)
+        else:
+            # 2. Gestión del Repositorio Físico (un mirror bare por remoto)
+            # El lock del repo evita que otro hilo/proceso lo borre o re-clone mientras
+            # se analiza (y que dos workers clonen el mismo repo a la vez).
+            try:
+                with self.repo_manager.repo_lock(repo_url, deadline):
+                    # Clonar y hacer fetch van por el pool de E/S (red y disco)
+                    with self.scheduler.io.slot(deadline=deadline, **job), stage(profiler, "clone"):
+                        if force:
+                            mirror = self.repo_manager.refresh_repo(repo_url, deadline)
+                        else:
+                            mirror = self.repo_manager.ensure_repo(repo_url, deadline)
+                        commit = self._resolve_ref(repo_url, mirror, ref, deadline, fetched=force)
+                    # Otro hilo/proceso pudo analizar este commit mientras esperábamos el lock
+                    if not force and resume_from is None:
+                        cached_result = self.db_manager.get_latest_analysis(repo_url, metrics_key,
+                                                                            options_key, commit)
+                        if cached_result and not cached_result.get("partial"):
+                            print(f"[Proxy] Acierto de caché (Hit) tras el lock para: {repo_url}")
+                            cached_result.update(_from_cache=True, forced=False, ref=ref)
+                            return cached_result
+                    # El árbol del commit se lee del mirror: no hay worktree por ref
+                    tree = self.repo_manager.open_tree(mirror, commit, repo_url, ref)
+                    try:
+                        with self.scheduler.cpu.slot(deadline=deadline, **job):
+                            result, sink = self._compute(tree, repo_url, commit, ref, selected, options,
+                                                         metrics_key, options_key, deadline, stream,
+                                                         force, resume_from, profiler)
+                    finally:
+                        tree.close()
+            except (DeadlineExceeded, LockTimeout) as e:
+                # Sin repositorio (o sin turno) no hay nada que guardar ni que continuar
+                if not deadline.expired():
+                    raise
+                return self._timed_out(repo_url, selected, ref, force, deadline,
+                                       getattr(e, "stage", "clone"))
+
+        # Un informe aproximado no se guarda: no debe servir de caché de uno exacto.
+        # Un parcial sin ningún archivo tampoco (no hay nada que continuar)
+        if options.get("approximate") or (result.get("partial") and not result["summary"]["num_files"]):
+            if result.get("streamed"):
+                sink.abort()
+            result.update(repo=repo_url, commit=commit, ref=ref, options_key=options_key,
+                          forced=force, _from_cache=False, id=None)
+            return result
+
+        # 4. Enriquecemos resultado y guardamos
+        if profiler is not None:
+            # Se anota antes de guardar: la cabecera del análisis dice que tiene perfil
+            result["profiled"] = True
+        with stage(profiler, "db_write"):
+            stored = self._store(result, repo_url, commit, ref, options_key, forced=force, sink=sink)
+        if self.revalidator is not None and source is None:
+            self.revalidator.track(repo_url, ref, selected, options, metrics_key, options_key, fresh=True)
+        return stored
+
+    @staticmethod
+    def _job(options: Dict[str, Any], default_priority: str) -> Dict[str, Any]:
+        """
+        Saca de las opciones la prioridad ("interactive" / "batch") y el solicitante.
+        """
+        priority = options.pop("priority", None) or default_priority
+        if priority not in PRIORITIES:
+            raise ValueError(f"Prioridad no válida: {priority}")
+        return {"priority": priority, "requester": options.pop("requester", None)}
+
+    def _job_size(self, job: Dict[str, Any], repo_url: str, source) -> None:
+        """
+        Tamaño estimado del repo para el planificador (los pequeños pasan antes).
+        Solo se calcula cuando se va a pedir turno: un acierto de caché no lo usa.
+        """
+        if "size" not in job:
+            job["size"] = source.size_hint() if source is not None else self.repo_manager.mirror_size(repo_url)
+
+    @staticmethod
+    def _timed_out(repo_url: str, selected: List[str], ref: Optional[str], force: bool,
+                   deadline: Deadline, stage: str) -> Dict[str, Any]:
+        """
+        Informe vacío y parcial de una petición cuyo tiempo se agotó antes de
+        empezar a calcular (clonando o esperando turno en el planificador).
+        """
+        print(f"[Proxy] Tiempo agotado antes de analizar ({stage}): {repo_url}")
+        return {
+            "repo": repo_url, "repo_name": None, "metrics": selected, "commit": None,
+            "ref": ref, "summary": {"num_files": 0}, "files": [], "partial": True,
+            "coverage": dict(deadline.as_dict(), stage=stage, files_covered=0, files_total=None),
+            "forced": force, "_from_cache": False, "id": None,
+        }
+
+    def _resolve_ref(self, repo_url: str, mirror, ref: Optional[str], deadline: Deadline,
+                     fetched: bool) -> str:
+        """
+        Commit al que apunta 'ref' en el mirror. Una ref que aún no está (rama
+        nueva, commit reciente) provoca un fetch antes de darla por inexistente.
+        """
+        commit = self.repo_manager.resolve_ref(mirror, ref)
+        if commit is None and ref and not fetched:
+            self.repo_manager.fetch(repo_url, deadline)
+            commit = self.repo_manager.resolve_ref(mirror, ref)
+            if commit is None:
+                # Un SHA que no cuelga de ninguna ref se pide explícitamente
+                try:
+                    self.repo_manager.fetch(repo_url, deadline, ref)
+                except RuntimeError:
+                    pass
+                commit = self.repo_manager.resolve_ref(mirror, ref)
+        if commit is None:
+            raise ValueError(f"No existe la referencia '{ref or 'HEAD'}' en {repo_url}")
+        return commit
+
+    def _compute(self, target, repo_url: str, commit: Optional[str], ref: Optional[str],
+                 selected: List[str], options: Dict[str, Any], metrics_key: str, options_key: str,
+                 deadline: Deadline, stream: bool, force: bool, resume_from: Optional[Dict[str, Any]],
+                 profiler=None):
+        """
+        3. Delegamos cálculo a la Fachada ('target' es el árbol del commit o la fuente local).
+        Devuelve (informe, sink de streaming o None).
+        """
+        # Solo se continúa un parcial del mismo commit
+        if resume_from is not None and resume_from.get("commit") != commit:
+            resume_from = None
+
+        compute_options = dict(options, force=force, metrics=selected)
+        if options.get("approximate"):
+            return self.facade.compute_approximate(target, options=compute_options), None
+
+        sink = self.db_manager.begin_stream(repo_url, metrics_key, options_key, commit, ref) if stream else None
+        # El IR de cada contenido nuevo se guarda para calcular métricas futuras sin re-parsear
+        ir_store = self.db_manager if ConfigSingleton.get_instance().persist_ir else None
+        try:
+            result = self.facade.compute_all(target, options=compute_options, deadline=deadline,
+                                             resume_from=resume_from, sink=sink, ir_store=ir_store,
+                                             profiler=profiler, failure_store=self.db_manager)
+        except Exception:
+            if sink is not None:
+                sink.abort()
+            raise
+        if resume_from is not None:
+            result["resumed_from"] = resume_from.get("id")
+        return result, (sink if result.get("streamed") else None)
+
+    def _recompute_from_cache(self, repo_url: str, source, commit: str, ref: Optional[str],
+                              selected: List[str], options: Dict[str, Any], resolved: Dict[str, Any],
+                              options_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Reutiliza un análisis del mismo commit y métricas hecho con otras opciones:
+        solo se recalculan las métricas que dependen de las opciones cambiadas
+        (ej. la duplicación con otra ventana). Devuelve None si no hay base reutilizable.
+        'source' es el árbol de 'commit' (o la fuente local identificada por él).
+        """
+        from metrics.registry import metrics_cache_key, metrics_affected_by
 
-        # 2. Gestión del Repositorio Físico
-        repo_path = self.repo_manager.ensure_repo(repo_url)
+        base = self.db_manager.get_latest_analysis(repo_url, metrics_cache_key(selected), commit=commit)
+        if not base or base.get("partial"):
+            return None
 
-        if force:
-            self.repo_manager.remove_repo(repo_path)
-            repo_path = self.repo_manager.ensure_repo(repo_url)
+        affected = metrics_affected_by(selected, base.get("options", {}), resolved)
+        if not affected:
+            return None
 
-        # 3. Delegamos cálculo a la Fachada
-        result = self.facade.compute_all(repo_path, options={"force": force})
+        print(f"[Proxy] Reutilizando análisis {base.get('id')}; recalculando: {', '.join(affected)}")
+        # Si todo lo afectado se puede calcular desde el IR guardado no se lee el repo
+        result = self.facade.recompute_metrics(source, base, affected, options,
+                                               irs=self._stored_irs(base, affected))
+        # El nombre sale de la fuente (la ref pedida), no del informe base
+        result["repo_name"] = source.name
+        result = self._store(result, repo_url, commit, ref, options_key, forced=False)
+        result["_recomputed"] = affected
+        return result
+
+    def _stored_irs(self, base: Dict[str, Any], names: List[str]) -> Optional[Dict[str, bytes]]:
+        """
+        IR guardado de cada archivo de 'base' ({blob: datos}), o None si alguna
+        métrica de 'names' no admite IR o a algún archivo le falta el suyo.
+        """
+        from metrics.ir import IR_VERSION
+
+        if not all(self.facade.strategies[name].supports_ir for name in names):
+            return None
+        blobs = [f.get("blob") for f in base.get("files", [])]
+        if not all(blobs):
+            return None
+        irs = self.db_manager.get_ir(sorted(set(blobs)), IR_VERSION)
+        return irs if len(irs) == len(set(blobs)) else None
+
+    def rollout(self, metrics: List[str], repo_url: Optional[str] = None) -> Dict[str, Any]:
+        from metrics.registry import resolve_metrics, metrics_cache_key, options_cache_key
+
+        if not metrics:
+            raise ValueError("Indique las métricas a desplegar")
+        names = resolve_metrics(metrics)
+        unsupported = [name for name in names if not self.facade.strategies[name].supports_ir]
+        if unsupported:
+            raise ValueError(f"Estas métricas necesitan el AST completo y no se pueden calcular "
+                             f"desde el IR: {', '.join(unsupported)}")
+
+        updated, skipped = [], []
+        with self.scheduler.cpu.slot(priority="batch", requester="rollout"):
+            for entry in self.db_manager.list_tracked():
+                if repo_url is not None and entry["repo_url"] != repo_url:
+                    continue
+                missing = [name for name in names if name not in (entry["metrics"] or [])]
+                if not missing:
+                    continue
+                base = self.db_manager.get_latest_analysis(entry["repo_url"], entry["metrics_key"],
+                                                           entry["options_key"], ref=entry["ref"])
+                if base is None:
+                    continue
+                selected = resolve_metrics(list(entry["metrics"]) + missing)
+                options = base.get("options", {})
+                resolved = self.facade.strategy_options(options)
+                options_key = options_cache_key(selected, resolved)
+                # Ya desplegado (ej. una ejecución anterior del mismo rollout)
+                if self.db_manager.has_analysis(entry["repo_url"], metrics_cache_key(selected),
+                                                options_key, base.get("commit")):
+                    continue
+                irs = self._stored_irs(base, missing)
+                if irs is None:
+                    skipped.append({"repo": entry["repo_url"], "ref": entry["ref"],
+                                    "metrics_key": entry["metrics_key"]})
+                    continue
+
+                # Sin leer el repositorio: las métricas nuevas salen del IR de cada blob
+                result = self.facade.recompute_metrics(None, dict(base, metrics=selected),
+                                                       missing, options, irs=irs)
+                stored = self._store(result, entry["repo_url"], base.get("commit"), entry["ref"],
+                                     options_key, forced=False)
+                print(f"[Proxy] Métricas {', '.join(missing)} añadidas a {entry['repo_url']} "
+                      f"(análisis {stored['id']}, sin re-parsear)")
+                updated.append({"repo": entry["repo_url"], "ref": entry["ref"], "id": stored["id"],
+                                "metrics_key": metrics_cache_key(selected), "added": missing})
 
-        # 4. Enriquecemos resultado
+        return {"metrics": names, "updated": updated, "skipped": skipped}
+
+    def _store(self, result: Dict[str, Any], repo_url: str, commit: Optional[str], ref: Optional[str],
+               options_key: str, forced: bool, sink=None) -> Dict[str, Any]:
+        """
+        Completa los metadatos del análisis y lo guarda en la BD.
+        En streaming los archivos ya están escritos: se cierra el análisis y se
+        devuelven solo la cabecera, el resumen y el id (sin 'files'); los archivos
+        se consultan paginados (get_analysis_page, /analysis/<id>) o de uno en uno
+        (get_analysis_file), sin volver a cargarlos todos en memoria.
+        """
         result["repo"] = repo_url
-        result["forced"] = force
+        result["commit"] = commit
+        result["ref"] = ref
+        result["options_key"] = options_key
+        result["forced"] = forced
         result["_from_cache"] = False
 
-        # 5. Guardamos en BD
-        # Revisa aquí también: self.db_manager
-        self.db_manager.save_analysis(result)
+        # 5. Guardamos en BD (el id permite volver a consultarlo paginado)
+        if sink is None:
+            result["id"] = self.db_manager.save_analysis(result)
+            return result
 
+        result.pop("files", None)
+        result["id"] = sink.finish(result)
         return result
 
+    def sweep(self, repo_url: str, revision: Optional[str] = None, every: int = 1,
+              tags: bool = False, limit: Optional[int] = None, force: bool = False,
+              metrics: Optional[List[str]] = None,
+              options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        from metrics.history import HistorySweep
+        from metrics.registry import resolve_metrics, metrics_cache_key, options_cache_key
+
+        options = dict(options or {})
+        config = ConfigSingleton.get_instance()
+        ref = options.pop("ref", None) or None
+        workers = options.pop("workers", None) or config.sweep_workers
+        # Un barrido es trabajo de fondo: cede el turno a las peticiones interactivas
+        job = self._job(options, "batch")
+        job["size"] = self.repo_manager.mirror_size(repo_url)
+        for value in (revision, ref):
+            if value is not None and value.startswith("-"):
+                raise ValueError(f"Referencia no válida: {value}")
+        selected = resolve_metrics(metrics)
+        metrics_key = metrics_cache_key(selected)
+        resolved = self.facade.strategy_options(options)
+        options_key = options_cache_key(selected, resolved)
+
+        with self.repo_manager.repo_lock(repo_url):
+            with self.scheduler.io.slot(**job):
+                if force:
+                    mirror = self.repo_manager.refresh_repo(repo_url)
+                else:
+                    mirror = self.repo_manager.ensure_repo(repo_url)
+            commits = self.repo_manager.list_commits(mirror, revision or ref, every, tags, limit)
+
+            # Los commits ya analizados con las mismas métricas y opciones no se repiten
+            ids = {}
+            if not force:
+                for entry in commits:
+                    cached = self.db_manager.get_latest_analysis(repo_url, metrics_key, options_key,
+                                                                 entry["commit"])
+                    if cached and not cached.get("partial"):
+                        ids[entry["commit"]] = cached["id"]
+            todo = [entry for entry in commits if entry["commit"] not in ids]
+            print(f"[Proxy] Barrido de {repo_url}: {len(commits)} commits, {len(todo)} por analizar")
+
+            name = self.repo_manager.display_name(repo_url, ref)
+            history = HistorySweep(self.facade, workers,
+                                   ir_store=self.db_manager if config.persist_ir else None)
+            with self.scheduler.cpu.slot(**job):
+                reports = history.run(mirror, [entry["commit"] for entry in todo], name,
+                                      dict(options, metrics=selected))
+                # Del más antiguo al más reciente: la cadena de deltas sigue la historia
+                for entry, result in zip(todo, reports):
+                    # La serie se ordena por la fecha del commit, no por la del barrido
+                    result["analyzed_at"] = entry["date"]
+                    result["label"] = entry["label"]
+                    ids[entry["commit"]] = self._store(result, repo_url, entry["commit"], ref,
+                                                       options_key, forced=force)["id"]
+
+        return {
+            "repo": repo_url,
+            "ref": ref,
+            "metrics": selected,
+            "options_key": options_key,
+            "commits": [dict(entry, id=ids.get(entry["commit"]),
+                             reused=entry not in todo) for entry in commits],
+            "blobs_total": history.blobs_total,
+            "blobs_computed": history.blobs_computed,
+        }
+
+    def get_analysis(self, analysis_id: int) -> Optional[Dict[str, Any]]:
+        return self.db_manager.get_analysis(analysis_id)
+
+    def scheduler_stats(self) -> Dict[str, Any]:
+        return self.scheduler.stats()
+
+    def export(self, level: str, repo_url: Optional[str] = None, since: Optional[str] = None,
+               until: Optional[str] = None, where: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        from repo.export import check_conditions, export_rows, parse_condition
+
+        conditions = [parse_condition(text) for text in where or []]
+        # Se valida ya: el generador no se ejecuta hasta que alguien lee la primera fila
+        check_conditions(level, conditions)
+        source = self.db_manager.iter_export(level != "analyses", repo_url, since, until)
+        return export_rows(level, source, conditions)
+
+    def get_analysis_page(self, analysis_id: int, page: int = 1, per_page: int = 50,
+                          sort: str = "path", descending: bool = False,
+                          query: str = "") -> Optional[Dict[str, Any]]:
+        return self.db_manager.get_analysis_page(analysis_id, page, per_page, sort, descending, query)
+
+    def get_analysis_file(self, analysis_id: int, path: str) -> Optional[Dict[str, Any]]:
+        return self.db_manager.get_analysis_file(analysis_id, path)
+
+    def get_profile(self, analysis_id: int) -> Optional[Dict[str, Any]]:
+        from metrics.profiling import ARTIFACTS
+
+        directory = ConfigSingleton.get_instance().profiles_dir / str(analysis_id)
+        summary = directory / "summary.json"
+        if not summary.is_file():
+            return None
+        profile = json.loads(summary.read_text())
+        profile["artifacts"] = [name for name in ARTIFACTS if (directory / name).is_file()]
+        return profile
+
+    def profile_artifact(self, analysis_id: int, name: str) -> Optional[Path]:
+        from metrics.profiling import ARTIFACTS
+
+        # Solo los nombres conocidos: el nombre viene de la URL
+        if name not in ARTIFACTS:
+            return None
+        path = ConfigSingleton.get_instance().profiles_dir / str(analysis_id) / name
+        return path if path.is_file() else None
+
     def list_analyses(self) -> List[Dict[str, Any]]:
-        # Y aquí: self.db_manager
-        return self.db_manager.list_analyses()
\ No newline at end of file
+        return self.db_manager.list_analyses()
+
+    def trend(self, repo_url: str, path: Optional[str] = None,
+              metrics: Optional[List[str]] = None,
+              ref: Optional[str] = None) -> List[Dict[str, Any]]:
+        from metrics.registry import resolve_metrics, metrics_cache_key
+
+        # Las tendencias se leen directamente de la serie guardada (sin reconstruir informes)
+        metrics_key = metrics_cache_key(resolve_metrics(metrics)) if metrics else None
+        if path:
+            return self.db_manager.get_file_trend(repo_url, path, metrics_key, ref)
+        return self.db_manager.get_summary_trend(repo_url, metrics_key, ref)
\ No newline at end of file
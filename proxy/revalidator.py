@@ -0,0 +1,186 @@
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import ConfigSingleton
+from repo.locks import FileLock, LockTimeout
+
+# Clave de lo que se mantiene al día: (repo, ref, métricas, opciones)
+TrackKey = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+class Revalidator:
+    """
+    Mantiene la caché de análisis al día en segundo plano (stale-while-revalidate).
+
+    - Un acierto de caché más antiguo que 'freshness_ttl' se sirve tal cual y se
+      encola su comprobación: 'git ls-remote' dice si el remoto se ha movido y,
+      solo entonces, se re-analiza (forzado) en un hilo aparte.
+    - Mientras se re-analiza, las peticiones de ese repo siguen recibiendo el
+      último análisis (marcado '_stale') en vez de esperar.
+    - Con 'revalidate_interval' > 0, un hilo comprueba periódicamente todos los
+      repos ya analizados (calentado de caché). Con varios workers, solo uno
+      hace cada ronda (lock de fichero).
+    """
+
+    def __init__(self, subject, interval: Optional[float] = None, ttl: Optional[float] = None):
+        config = ConfigSingleton.get_instance()
+        self.subject = subject
+        self.interval = config.revalidate_interval if interval is None else interval
+        self.ttl = config.freshness_ttl if ttl is None else ttl
+
+        self._tracked: Dict[TrackKey, Dict[str, Any]] = {}
+        # Última comprobación (monotonic) de cada clave
+        self._checked: Dict[TrackKey, float] = {}
+        # Claves encoladas o re-analizándose (no se encolan dos veces)
+        self._pending: set = set()
+        self._running: set = set()
+        self._queue: "queue.Queue[TrackKey]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._ticker: Optional[threading.Thread] = None
+
+    def track(self, repo_url: str, ref: Optional[str], metrics: Optional[List[str]],
+              options: Dict[str, Any], metrics_key: str, options_key: str,
+              fresh: bool = False) -> bool:
+        """
+        Registra una petición servida. Si su última comprobación caducó se encola
+        una revalidación. Con fresh=True se acaba de calcular: solo se registra.
+
+        Returns:
+            bool: True si se encoló una revalidación.
+        """
+        key = (repo_url, ref, metrics_key, options_key)
+        now = time.monotonic()
+        with self._lock:
+            self._tracked[key] = {
+                "repo_url": repo_url, "ref": ref, "metrics": metrics, "options": dict(options),
+                "metrics_key": metrics_key, "options_key": options_key,
+            }
+            if fresh:
+                self._checked[key] = now
+                return False
+            last = self._checked.get(key)
+            if key in self._pending or (last is not None and now - last < self.ttl):
+                return False
+            self._pending.add(key)
+        self._ensure_worker()
+        self._queue.put(key)
+        return True
+
+    def is_revalidating(self, repo_url: str, ref: Optional[str],
+                        metrics_key: str, options_key: str) -> bool:
+        with self._lock:
+            return (repo_url, ref, metrics_key, options_key) in self._running
+
+    def check(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Comprueba una entrada con 'git ls-remote' y la re-analiza si el remoto
+        apunta a un commit sin analizar. Devuelve el análisis nuevo o None.
+        """
+        key = (entry["repo_url"], entry["ref"], entry["metrics_key"], entry["options_key"])
+        with self._lock:
+            self._checked[key] = time.monotonic()
+
+        remote = self.subject.repo_manager.remote_commit(entry["repo_url"], entry["ref"])
+        if remote is None:
+            return None
+        if self.subject.db_manager.has_analysis(entry["repo_url"], entry["metrics_key"],
+                                                entry["options_key"], remote):
+            return None
+
+        print(f"[Revalidator] {entry['repo_url']} ha cambiado ({remote[:12]}). Re-analizando...")
+        with self._lock:
+            self._running.add(key)
+        try:
+            # Trabajo de fondo: cede el turno a las peticiones interactivas
+            options = dict(entry["options"], ref=entry["ref"], priority="batch",
+                           requester="revalidator")
+            return self.subject.peticion(entry["repo_url"], force=True,
+                                         metrics=entry["metrics"], options=options)
+        finally:
+            with self._lock:
+                self._running.discard(key)
+
+    def run_once(self) -> List[Dict[str, Any]]:
+        """
+        Una ronda de comprobación de todo lo analizado (BD) y registrado (memoria).
+        Devuelve los análisis nuevos.
+        """
+        entries = {}
+        for entry in self.subject.db_manager.list_tracked():
+            entries[(entry["repo_url"], entry["ref"], entry["metrics_key"], entry["options_key"])] = entry
+        with self._lock:
+            entries.update(self._tracked)
+
+        refreshed = []
+        for entry in entries.values():
+            # Directorios y archivos locales no tienen remoto que consultar
+            if not self._is_remote(entry["repo_url"]):
+                continue
+            try:
+                result = self.check(entry)
+            except Exception as e:
+                print(f"[Revalidator] Error revalidando {entry['repo_url']}: {e}")
+                continue
+            if result is not None:
+                refreshed.append(result)
+        return refreshed
+
+    def start(self) -> "Revalidator":
+        """
+        Arranca el hilo periódico (si hay intervalo). El de la cola arranca solo
+        con la primera revalidación encolada.
+        """
+        if self.interval and self._ticker is None:
+            self._ticker = threading.Thread(target=self._tick, name="revalidator-ticker", daemon=True)
+            self._ticker.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def join(self) -> None:
+        """
+        Espera a que se procesen las revalidaciones encoladas (útil en tests).
+        """
+        self._queue.join()
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, name="revalidator", daemon=True)
+                self._worker.start()
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            key = self._queue.get()
+            try:
+                with self._lock:
+                    entry = self._tracked.get(key)
+                if entry is not None:
+                    self.check(entry)
+            except Exception as e:
+                print(f"[Revalidator] Error revalidando {key[0]}: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                self._queue.task_done()
+
+    def _tick(self) -> None:
+        while not self._stop.wait(self.interval):
+            config = ConfigSingleton.get_instance()
+            # Con varios workers (gunicorn) solo uno hace cada ronda
+            try:
+                with FileLock(config.repo_cache_dir / ".locks" / "revalidator.lock", timeout=0):
+                    self.run_once()
+            except LockTimeout:
+                continue
+            except Exception as e:
+                print(f"[Revalidator] Error en la ronda periódica: {e}")
+
+    @staticmethod
+    def _is_remote(repo_url: str) -> bool:
+        from repo.sources import open_local_source
+        return open_local_source(repo_url) is None
@@ -0,0 +1,193 @@
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from config import ConfigSingleton
+from repo.locks import LockTimeout
+
+# Clases de prioridad (menor = antes)
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+class QueueTimeout(LockTimeout):
+    """
+    Se agotó el presupuesto de tiempo de la petición esperando turno en un pool.
+    """
+    stage = "queue"
+
+
+class _Ticket:
+    __slots__ = ("priority", "requester", "size", "seq", "enqueued")
+
+    def __init__(self, priority: int, requester: str, size: Optional[int], seq: int):
+        self.priority = priority
+        self.requester = requester
+        self.size = size
+        self.seq = seq
+        self.enqueued = time.monotonic()
+
+
+class PriorityPool:
+    """
+    Pool acotado de 'slots': como mucho 'slots' trabajos a la vez y el resto
+    espera en una cola con prioridad. El trabajo lo hace el propio hilo de la
+    petición; el pool solo decide cuándo puede empezar.
+
+    Al quedar un slot libre entra el trabajo en espera con menor clave:
+        (clase de prioridad, trabajos en curso de su solicitante, tamaño, llegada)
+    Es decir: interactivo antes que batch; entre iguales, el solicitante con
+    menos trabajos en marcha (reparto justo) y luego el repo más pequeño.
+    Un tamaño desconocido (None) va detrás de los conocidos.
+    """
+
+    def __init__(self, name: str, slots: int):
+        """
+        Args:
+            name (str): Nombre del pool ("io" o "cpu") para logs y estadísticas.
+            slots (int): Trabajos simultáneos (<= 0 = sin límite).
+        """
+        self.name = name
+        self.slots = slots
+        self._cond = threading.Condition()
+        self._waiting: List[_Ticket] = []
+        self._running = 0
+        self._running_by: Dict[str, int] = {}
+        self._seq = itertools.count()
+        # Un hilo que ya tiene slot no vuelve a esperar (ej. llamadas anidadas)
+        self._local = threading.local()
+        # Estadísticas acumuladas
+        self.granted = 0
+        self.timeouts = 0
+        self.max_queue_depth = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+    @contextmanager
+    def slot(self, priority: str = "interactive", requester: Optional[str] = None,
+             size: Optional[int] = None, deadline=None):
+        """
+        Espera turno y ocupa un slot mientras dura el bloque 'with'.
+
+        Args:
+            priority (str): "interactive" o "batch".
+            requester (str): Quién lo pide (IP, "cli", "revalidator"...).
+            size (int): Tamaño estimado del repo (bytes); None si no se conoce.
+            deadline (Deadline): Presupuesto de la petición; la espera no lo supera.
+
+        Raises:
+            QueueTimeout: si el presupuesto se agota antes de tener slot.
+        """
+        depth = getattr(self._local, "depth", 0)
+        if depth:
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+
+        if priority not in PRIORITIES:
+            raise ValueError(f"Prioridad no válida: {priority}")
+        ticket = _Ticket(PRIORITIES[priority], requester or "anónimo", size, next(self._seq))
+        self._acquire(ticket, deadline)
+        self._local.depth = 1
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            self._release(ticket)
+
+    def _acquire(self, ticket: _Ticket, deadline) -> None:
+        with self._cond:
+            self._waiting.append(ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiting))
+            while not (self._has_room() and self._next() is ticket):
+                remaining = deadline.remaining() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self.timeouts += 1
+                    # Quizá el siguiente de la cola ya puede entrar
+                    self._cond.notify_all()
+                    raise QueueTimeout(f"Tiempo agotado esperando turno en el pool '{self.name}'")
+                self._cond.wait(remaining)
+
+            self._waiting.remove(ticket)
+            self._running += 1
+            self._running_by[ticket.requester] = self._running_by.get(ticket.requester, 0) + 1
+            waited = time.monotonic() - ticket.enqueued
+            self.granted += 1
+            self.wait_seconds += waited
+            self.max_wait = max(self.max_wait, waited)
+            # Si quedan slots libres, el siguiente en la cola también puede entrar
+            self._cond.notify_all()
+        if waited > 1:
+            print(f"[Scheduler] '{self.name}': {ticket.requester} esperó {waited:.1f}s su turno")
+
+    def _release(self, ticket: _Ticket) -> None:
+        with self._cond:
+            self._running -= 1
+            left = self._running_by[ticket.requester] - 1
+            if left:
+                self._running_by[ticket.requester] = left
+            else:
+                del self._running_by[ticket.requester]
+            self._cond.notify_all()
+
+    def _has_room(self) -> bool:
+        return self.slots <= 0 or self._running < self.slots
+
+    def _next(self) -> Optional[_Ticket]:
+        """
+        Siguiente trabajo en entrar. La clave depende de lo que está en curso
+        (reparto justo), así que se calcula en cada turno en vez de usar un heap.
+        """
+        return min(self._waiting, default=None, key=lambda t: (
+            t.priority,
+            self._running_by.get(t.requester, 0),
+            t.size is None,
+            t.size or 0,
+            t.seq,
+        ))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            by_priority = {name: 0 for name in PRIORITIES}
+            by_requester: Dict[str, int] = {}
+            names = {v: k for k, v in PRIORITIES.items()}
+            for t in self._waiting:
+                by_priority[names[t.priority]] += 1
+                by_requester[t.requester] = by_requester.get(t.requester, 0) + 1
+            return {
+                "slots": self.slots,
+                "running": self._running,
+                "queued": len(self._waiting),
+                "queued_by_priority": by_priority,
+                "queued_by_requester": by_requester,
+                "running_by_requester": dict(self._running_by),
+                "max_queue_depth": self.max_queue_depth,
+                "granted": self.granted,
+                "timeouts": self.timeouts,
+                "wait_ms_total": round(self.wait_seconds * 1000, 2),
+                "wait_ms_max": round(self.max_wait * 1000, 2),
+            }
+
+
+class Scheduler:
+    """
+    Planificador de los trabajos pesados del proxy, con dos pools separados:
+    - io:  clonar y hacer fetch (red y disco). Pocos a la vez para no saturarlos.
+    - cpu: calcular métricas. Tantos como CPUs por defecto.
+    Los límites son por proceso: con varios workers, cada uno tiene los suyos.
+    """
+
+    def __init__(self, io_slots: Optional[int] = None, cpu_slots: Optional[int] = None):
+        config = ConfigSingleton.get_instance()
+        io_slots = config.io_slots if io_slots is None else io_slots
+        cpu_slots = config.cpu_slots if cpu_slots is None else cpu_slots
+        self.io = PriorityPool("io", io_slots)
+        self.cpu = PriorityPool("cpu", cpu_slots or os.cpu_count() or 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"io": self.io.stats(), "cpu": self.cpu.stats()}
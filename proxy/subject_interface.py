@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import Iterator, List, Dict, Any, Optional
 
 class SubjectInterface(ABC):
     """
@@ -8,15 +9,114 @@ class SubjectInterface(ABC):
     """
 
     @abstractmethod
-    def peticion(self, repo_url: str, force: bool = False) -> Dict[str, Any]:
+    def peticion(self, repo_url: str, force: bool = False,
+                 metrics: Optional[List[str]] = None,
+                 options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        Solicita el análisis de un repositorio
+        Solicita el análisis de un repositorio.
+        'metrics' limita el cálculo a un subconjunto de métricas (None = todas).
+        'options' son las opciones de las métricas (ej. {"dup_window": 6}) y del
+        modo aproximado ({"approximate": True, "sample_seconds": 5, ...}).
+        options["deadline"] limita el tiempo (s) del análisis; si se agota el
+        informe es parcial ("partial": True) y la siguiente petición lo continúa.
+        options["ref"] elige la rama, tag o commit (por defecto la rama principal).
+        options["priority"] ("interactive" / "batch") y options["requester"] deciden
+        el turno en las colas del planificador.
         """
         raise NotImplementedError
     
+    @abstractmethod
+    def sweep(self, repo_url: str, revision: Optional[str] = None, every: int = 1,
+              tags: bool = False, limit: Optional[int] = None, force: bool = False,
+              metrics: Optional[List[str]] = None,
+              options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Solicita el análisis de varios commits del historial (uno de cada 'every'
+        en 'revision', o cada tag) y guarda la serie para las tendencias.
+        options["workers"] fija los procesos que calculan los archivos nuevos.
+        Devuelve los commits recorridos con el id de su análisis.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def rollout(self, metrics: List[str], repo_url: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Añade métricas nuevas a los últimos análisis guardados calculándolas desde
+        la representación intermedia, sin acceso a git ni parseo.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def export(self, level: str, repo_url: Optional[str] = None, since: Optional[str] = None,
+               until: Optional[str] = None, where: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Solicita los análisis guardados como filas planas de un nivel ("analyses",
+        "files" o "functions"), filtradas por repo, fechas y umbrales
+        (ej. where=["cc>=10"]). Se generan de una en una (memoria constante).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def scheduler_stats(self) -> Dict[str, Any]:
+        """
+        Solicita el estado de las colas del planificador (pools de E/S y CPU).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_analysis(self, analysis_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Solicita un análisis guardado por su id.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_analysis_page(self, analysis_id: int, page: int = 1, per_page: int = 50,
+                          sort: str = "path", descending: bool = False,
+                          query: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Solicita un análisis guardado con solo una página de sus archivos
+        (filtrados por ruta y ordenados por 'sort').
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_analysis_file(self, analysis_id: int, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Solicita el detalle (incluidas las funciones) de un archivo de un análisis.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_profile(self, analysis_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Solicita el resumen del perfil de CPU y memoria de un análisis perfilado
+        (con la lista de artefactos descargables), o None si no tiene.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def profile_artifact(self, analysis_id: int, name: str) -> Optional[Path]:
+        """
+        Solicita la ruta de un artefacto del perfil (ej. "cpu.pstats"), o None si no existe.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def list_analyses(self) -> List[Dict[str, Any]]:
         """
         Solicita el historial de análisis previos.
         """
+        raise NotImplementedError
+    
+    @abstractmethod
+    def trend(self, repo_url: str, path: Optional[str] = None,
+              metrics: Optional[List[str]] = None,
+              ref: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Solicita la evolución temporal del resumen de un repositorio,
+        o de las métricas de un archivo concreto si se indica 'path'.
+        'metrics' restringe la serie a análisis con ese conjunto de métricas.
+        'ref' elige la serie de una rama o tag (None = rama principal).
+        """
         raise NotImplementedError
\ No newline at end of file
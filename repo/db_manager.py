@@ -1,28 +1,112 @@
 import sqlite3
 import json
-from typing import Optional, List, Dict
+import threading
+import time
+from pathlib import PurePath
+from typing import Any, Iterator, Optional, List, Dict, Tuple
 from config import ConfigSingleton
+from metrics.records import FileRecord, json_default
+
+# Conjunto de métricas con el que se calcularon los análisis anteriores a la
+# selección de métricas (siempre se ejecutaban las seis estrategias)
+LEGACY_METRICS_KEY = "duplication,functions,imports,lines,maintainability,todos"
 
 class DBManager:
     """
     Gestor de Base de Datos SQLite.
     Responsabilidad: Persistir los resultados de los análisis y recuperar el historial.
+
+    Es seguro usarlo desde varios hilos y procesos: cada operación abre su propia
+    conexión, la BD funciona en modo WAL (lectores no bloquean al escritor) y las
+    escrituras se reintentan si SQLite devuelve 'database is locked'.
     """
 
+    # Reintentos de una escritura bloqueada (además del busy_timeout de SQLite)
+    WRITE_RETRIES = 5
+    RETRY_BACKOFF = 0.05
+
     def __init__(self):
         self.config = ConfigSingleton.get_instance()
-        self.init_db()
+        # El esquema se crea de forma perezosa con la primera conexión
+        self._initialized = False
+        # Número de veces que una escritura encontró la BD bloqueada (para diagnóstico)
+        self.contention_events = 0
+        # Escrituras y tiempo esperando el lock de escritura (incluye el busy_timeout)
+        self.writes = 0
+        self.write_wait_seconds = 0.0
+        self.max_write_wait = 0.0
+        self._stats_lock = threading.Lock()
     
     def _get_connection(self) -> sqlite3.Connection:
         """
         Crea una conexión a la base de datos configurada.
+        La primera vez asegura que el esquema existe.
+        """
+        if not self._initialized:
+            self.init_db()
+            self._initialized = True
+        return self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Abre la conexión física (sin comprobar el esquema).
         """
-        return sqlite3.connect(self.config.db_path)
+        self.config.ensure_directories()
+        # 'timeout' equivale a PRAGMA busy_timeout: espera al lock en vez de fallar
+        return sqlite3.connect(self.config.db_path, timeout=self.config.db_timeout)
+
+    def _run_write(self, operation):
+        """
+        Ejecuta 'operation(conn)' en una transacción de escritura (BEGIN IMMEDIATE),
+        reintentando con backoff si otro proceso mantiene la BD bloqueada.
+        """
+        for attempt in range(self.WRITE_RETRIES):
+            try:
+                with self._get_connection() as conn:
+                    # Tomamos el lock de escritura antes de leer, para que
+                    # lectura + escritura sean atómicas frente a otros workers
+                    started = time.perf_counter()
+                    conn.execute("BEGIN IMMEDIATE")
+                    self._record_wait(time.perf_counter() - started)
+                    return operation(conn)
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) and "busy" not in str(e):
+                    raise
+                with self._stats_lock:
+                    self.contention_events += 1
+                if attempt == self.WRITE_RETRIES - 1:
+                    raise
+                time.sleep(self.RETRY_BACKOFF * (2 ** attempt))
     
+    def _record_wait(self, seconds: float) -> None:
+        with self._stats_lock:
+            self.writes += 1
+            self.write_wait_seconds += seconds
+            self.max_write_wait = max(self.max_write_wait, seconds)
+
+    def contention_stats(self) -> Dict:
+        """
+        Contadores de contención de escritura de este proceso (para diagnóstico
+        y bench/loadtest.py).
+        """
+        with self._stats_lock:
+            return {
+                "writes": self.writes,
+                "lock_errors": self.contention_events,
+                "write_wait_ms_total": round(self.write_wait_seconds * 1000, 2),
+                "write_wait_ms_max": round(self.max_write_wait * 1000, 2),
+            }
+
     def init_db(self):
         """
-        Crea la tabla 'analyses' si no existe.
-        Esquema basado en el enunciado del proyecto.
+        Crea las tablas si no existen.
+        - analyses: una fila por análisis (cabecera + resumen).
+        - analysis_files: métricas por archivo. Los 'keyframes' guardan todos los
+          archivos; los 'delta' solo los que cambiaron respecto al análisis anterior.
+        - file_ir: representación intermedia de cada contenido (metrics/ir.py),
+          por hash del contenido; la comparten todos los repos y commits.
+        - parse_failures: contenidos que no compilan con una versión de Python
+          (metrics/fallback.py); se aproximan por tokens sin intentar parsearlos.
         """
         schema = """
         CREATE TABLE IF NOT EXISTS analyses (
@@ -31,60 +115,686 @@ class DBManager:
             analyzed_at TEXT,
             result_json TEXT
         );
+        CREATE TABLE IF NOT EXISTS analysis_files (
+            analysis_id INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            metrics_json TEXT,
+            deleted INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (analysis_id, path)
+        );
+        CREATE INDEX IF NOT EXISTS idx_analysis_files_path
+            ON analysis_files (path, analysis_id);
+        CREATE TABLE IF NOT EXISTS file_ir (
+            blob TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            data BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS parse_failures (
+            blob TEXT NOT NULL,
+            python TEXT NOT NULL,
+            error TEXT,
+            PRIMARY KEY (blob, python)
+        );
         """
-        with self._get_connection() as conn:
-            conn.execute(schema)
+        with self._connect() as conn:
+            # WAL: las lecturas concurrentes no bloquean la escritura (persistente en el fichero)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(schema)
+            self._migrate(conn)
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """
+        Añade las columnas nuevas a bases de datos creadas con versiones anteriores.
+        - repo_name / summary_json: permiten leer el resumen sin cargar el detalle por archivo.
+        - kind / base_id: codificación keyframe + deltas (NULL = fila antigua con el JSON completo).
+        - metrics_key: conjunto de métricas calculado (parte de la clave de caché).
+        - options_key / commit_sha: opciones usadas y commit analizado (resto de la clave).
+        - partial: el análisis se cortó por tiempo (no cuenta en las tendencias).
+        - status: 'running' mientras un análisis en streaming escribe sus archivos
+          (esas filas no se ven como caché ni en el historial); NULL al terminar.
+        - ref: rama, tag o commit pedido (NULL = rama por defecto). Cada ref forma
+          su propia serie de deltas y tendencias.
+        """
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(analyses)")}
+        columns = {
+            "repo_name": "TEXT",
+            "summary_json": "TEXT",
+            "kind": "TEXT",
+            "base_id": "INTEGER",
+            "metrics_key": "TEXT",
+            "options_key": "TEXT",
+            "commit_sha": "TEXT",
+            "partial": "INTEGER NOT NULL DEFAULT 0",
+            "status": "TEXT",
+            "ref": "TEXT",
+        }
+        for name, col_type in columns.items():
+            if name not in existing:
+                try:
+                    conn.execute(f"ALTER TABLE analyses ADD COLUMN {name} {col_type}")
+                except sqlite3.OperationalError as e:
+                    # Otro worker la añadió entre la comprobación y el ALTER
+                    if "duplicate column" not in str(e):
+                        raise
+                if name == "metrics_key":
+                    # Las filas existentes se calcularon con todas las métricas
+                    conn.execute("UPDATE analyses SET metrics_key = ?", (LEGACY_METRICS_KEY,))
+                if name == "options_key":
+                    # Antes no se propagaban opciones: la duplicación usaba siempre la ventana 4
+                    conn.execute(
+                        """
+                        UPDATE analyses SET options_key =
+                            CASE WHEN metrics_key LIKE '%duplication%' THEN 'dup_window=4' ELSE '' END
+                        """
+                    )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analyses_repo ON analyses (repo_url, analyzed_at)"
+        )
     
-    def save_analysis(self, result: Dict) -> None:
+    # Parámetros por consulta IN (...) (SQLite admite 999 en versiones antiguas)
+    IN_CHUNK = 500
+
+    # Última fila de cada archivo en la cadena keyframe + deltas de un análisis
+    # (parámetros: keyframe_id, keyframe_id, analysis_id); vale con rn = 1 AND deleted = 0
+    _LATEST_FILES = """
+        SELECT path, metrics_json, deleted,
+               ROW_NUMBER() OVER (PARTITION BY path ORDER BY analysis_id DESC) AS rn
+        FROM analysis_files
+        WHERE analysis_id = ?
+           OR analysis_id IN (SELECT id FROM analyses WHERE base_id = ? AND id <= ?)
+    """
+
+    def known_ir(self, blobs: List[str], version: int) -> set:
+        """
+        Contenidos (de 'blobs') que ya tienen IR de esta versión.
+        """
+        known = set()
+        with self._get_connection() as conn:
+            for i in range(0, len(blobs), self.IN_CHUNK):
+                chunk = blobs[i:i + self.IN_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                known.update(row[0] for row in conn.execute(
+                    f"SELECT blob FROM file_ir WHERE version = ? AND blob IN ({marks})",
+                    [version] + chunk))
+        return known
+
+    def get_ir(self, blobs: List[str], version: int) -> Dict[str, bytes]:
+        """
+        IR comprimido de cada contenido {blob: datos}; los que no tienen no aparecen.
+        """
+        found = {}
+        with self._get_connection() as conn:
+            for i in range(0, len(blobs), self.IN_CHUNK):
+                chunk = blobs[i:i + self.IN_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                found.update(conn.execute(
+                    f"SELECT blob, data FROM file_ir WHERE version = ? AND blob IN ({marks})",
+                    [version] + chunk))
+        return found
+
+    def save_ir(self, items: List[tuple], version: int) -> None:
+        """
+        Guarda IR [(blob, datos comprimidos)] en una sola transacción.
+        Uno de otra versión se sustituye.
+        """
+        self._run_write(lambda conn: conn.executemany(
+            "INSERT OR REPLACE INTO file_ir (blob, version, data) VALUES (?, ?, ?)",
+            [(blob, version, sqlite3.Binary(data)) for blob, data in items]))
+
+    def known_parse_failures(self, blobs: Optional[List[str]], python: str) -> set:
+        """
+        Contenidos (de 'blobs', o todos si es None) que no compilan con esa versión de Python.
+        """
+        with self._get_connection() as conn:
+            if blobs is None:
+                return {row[0] for row in conn.execute(
+                    "SELECT blob FROM parse_failures WHERE python = ?", (python,))}
+            known = set()
+            for i in range(0, len(blobs), self.IN_CHUNK):
+                chunk = blobs[i:i + self.IN_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                known.update(row[0] for row in conn.execute(
+                    f"SELECT blob FROM parse_failures WHERE python = ? AND blob IN ({marks})",
+                    [python] + chunk))
+        return known
+
+    def save_parse_failures(self, items: List[tuple], python: str) -> None:
+        """
+        Registra contenidos que no compilan [(blob, error)] en una sola transacción.
+        """
+        self._run_write(lambda conn: conn.executemany(
+            "INSERT OR REPLACE INTO parse_failures (blob, python, error) VALUES (?, ?, ?)",
+            [(blob, python, error) for blob, error in items]))
+
+    def save_analysis(self, result: Dict) -> Optional[int]:
         """
         Guarda un nuevo análisis en la base de datos.
-        Recibe el diccionario completo de resultados.
+        Recibe el diccionario completo de resultados y devuelve el id de la fila.
+
+        La cabecera y el resumen van a 'analyses'; el detalle por archivo va a
+        'analysis_files' codificado como keyframe o como delta frente al
+        análisis anterior del mismo repositorio y conjunto de métricas.
         """
         repo_url = result.get("repo")
         analyzed_at = result.get("analyzed_at")
+        metrics_key = ",".join(sorted(result["metrics"])) if result.get("metrics") else None
+        options_key = result.get("options_key")
+        commit_sha = result.get("commit")
+        ref = result.get("ref")
 
-        # Convertimos el diccionario de resultados a un string JSON
-        result_json = json.dumps(result)
-        
-        query = """
-        INSERT INTO analyses (repo_url, analyzed_at, result_json)
-        VALUES (?, ?, ?)
-        """
+        # Cabecera sin el detalle por archivo
+        header = {k: v for k, v in result.items() if k != "files"}
+        result_json = json.dumps(header)
+        # El resumen (con distribuciones y hotspots) se guarda aparte
+        summary_json = json.dumps(result.get("summary", {}))
+
+        # Serialización canónica para poder comparar archivos entre análisis
+        new_files = {
+            f["path"]: json.dumps(f, sort_keys=True, default=json_default)
+            for f in result.get("files", [])
+        }
+
+        def write(conn: sqlite3.Connection) -> int:
+            kind, base_id, previous_files = self._plan_encoding(conn, repo_url, metrics_key, options_key, ref)
+
+            cursor = conn.execute(
+                """
+                INSERT INTO analyses (repo_url, analyzed_at, result_json, repo_name,
+                                      summary_json, kind, base_id, metrics_key,
+                                      options_key, commit_sha, partial, ref)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (repo_url, analyzed_at, result_json, result.get("repo_name"),
+                 summary_json, kind, base_id, metrics_key, options_key, commit_sha,
+                 1 if result.get("partial") else 0, ref)
+            )
+            analysis_id = cursor.lastrowid
+
+            rows = self._diff_files(analysis_id, previous_files, new_files)
+            conn.executemany(
+                """
+                INSERT INTO analysis_files (analysis_id, path, metrics_json, deleted)
+                VALUES (?, ?, ?, ?)
+                """,
+                rows
+            )
+            if kind == "keyframe":
+                self._mark_deleted(conn, analysis_id, repo_url, metrics_key, options_key, ref)
+            return analysis_id
 
         try:
-            with self._get_connection() as conn:
-                conn.execute(query, (repo_url, analyzed_at, result_json))
+            return self._run_write(write)
         except sqlite3.Error as e:
             print(f"[DBManager] Error al guardar análisis: {e}")
+            return None
+
+    def begin_stream(self, repo_url: str, metrics_key: Optional[str],
+                     options_key: Optional[str], commit_sha: Optional[str],
+                     ref: Optional[str] = None) -> "AnalysisStream":
+        """
+        Empieza un análisis en streaming: crea la fila (status 'running') y devuelve
+        un AnalysisStream al que la fachada va pasando cada archivo según lo calcula.
+        Los análisis en streaming siempre son keyframes: un delta exigiría tener en
+        memoria todos los archivos del análisis anterior.
+        Antes se borran los streams huérfanos (ver _purge_stale_streams).
+        """
+        def write(conn: sqlite3.Connection) -> int:
+            self._purge_stale_streams(conn)
+            cursor = conn.execute(
+                """
+                INSERT INTO analyses (repo_url, analyzed_at, result_json, kind, metrics_key,
+                                      options_key, commit_sha, status, ref)
+                VALUES (?, datetime('now'), '{}', 'keyframe', ?, ?, ?, 'running', ?)
+                """,
+                (repo_url, metrics_key, options_key, commit_sha, ref)
+            )
+            return cursor.lastrowid
+
+        return AnalysisStream(self, self._run_write(write))
+
+    # Un stream 'running' más antiguo que el límite de tiempo del análisis más este
+    # margen (o que STALE_STREAM_SECONDS si no hay límite) es de un worker muerto
+    STALE_STREAM_MARGIN = 3600
+    STALE_STREAM_SECONDS = 24 * 3600
+
+    def _purge_stale_streams(self, conn: sqlite3.Connection) -> None:
+        """
+        Borra los análisis en streaming que se quedaron en 'running': abort() solo
+        corre si la excepción llega a Python, y un worker matado (OOM, SIGKILL) deja
+        la fila y todos sus archivos, invisibles para siempre. El corte por
+        antigüedad respeta los streams vivos de otros procesos.
+        """
+        deadline = self.config.analysis_deadline
+        max_age = deadline + self.STALE_STREAM_MARGIN if deadline else self.STALE_STREAM_SECONDS
+        stale = [row[0] for row in conn.execute(
+            """
+            SELECT id FROM analyses
+            WHERE status = 'running' AND analyzed_at < datetime('now', ?)
+            """,
+            (f"-{int(max_age)} seconds",)
+        )]
+        if not stale:
+            return
+        print(f"[DBManager] Borrando {len(stale)} análisis en streaming huérfanos")
+        for start in range(0, len(stale), self.IN_CHUNK):
+            chunk = stale[start:start + self.IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            conn.execute(f"DELETE FROM analysis_files WHERE analysis_id IN ({marks})", chunk)
+            conn.execute(f"DELETE FROM analyses WHERE id IN ({marks})", chunk)
+
+    def _plan_encoding(self, conn: sqlite3.Connection, repo_url: str,
+                       metrics_key: Optional[str], options_key: Optional[str],
+                       ref: Optional[str] = None):
+        """
+        Decide si el nuevo análisis será un keyframe o un delta.
+        Cada (repo, ref, conjunto de métricas, opciones) forma su propia serie.
+        La cadena de deltas sigue el orden de inserción (id), que es el que
+        usa _reconstruct_files, no el de analyzed_at.
+        Devuelve (kind, base_id, archivos_previos). Con un keyframe, archivos_previos
+        es {} (los borrados los marca _mark_deleted).
+        """
+        row = self._last_in_series(conn, repo_url, metrics_key, options_key, ref)
+
+        # Sin historial, o el último análisis es una fila antigua sin detalle separado
+        if row is None or row[1] not in ("keyframe", "delta"):
+            return "keyframe", None, {}
+
+        prev_id, prev_kind, prev_base = row
+        keyframe_id = prev_id if prev_kind == "keyframe" else prev_base
+
+        # Cada 'trend_keyframe_interval' análisis se guarda un keyframe completo
+        # para acotar el número de deltas a aplicar al reconstruir.
+        chain_length = conn.execute(
+            "SELECT COUNT(*) FROM analyses WHERE base_id = ?", (keyframe_id,)
+        ).fetchone()[0]
+        if chain_length + 1 >= self.config.trend_keyframe_interval:
+            return "keyframe", None, {}
+
+        return "delta", keyframe_id, self._reconstruct_files(conn, prev_id, keyframe_id)
+
+    @staticmethod
+    def _last_in_series(conn: sqlite3.Connection, repo_url: str, metrics_key: Optional[str],
+                        options_key: Optional[str], ref: Optional[str],
+                        before_id: Optional[int] = None):
+        """
+        (id, kind, base_id) del último análisis terminado de la serie (anterior a
+        'before_id' si se indica), o None.
+        """
+        return conn.execute(
+            """
+            SELECT id, kind, base_id FROM analyses
+            WHERE repo_url = ? AND metrics_key IS ? AND options_key IS ? AND ref IS ?
+              AND status IS NULL AND (? IS NULL OR id < ?)
+            ORDER BY id DESC
+            LIMIT 1
+            """,
+            (repo_url, metrics_key, options_key, ref, before_id, before_id)
+        ).fetchone()
+
+    def _mark_deleted(self, conn: sqlite3.Connection, analysis_id: int, repo_url: str,
+                      metrics_key: Optional[str], options_key: Optional[str],
+                      ref: Optional[str]) -> None:
+        """
+        Un keyframe guarda todos sus archivos, pero también necesita la marca
+        'deleted' de los que tenía el análisis anterior de la serie y ya no están:
+        sin ella get_file_trend seguiría arrastrando su último valor.
+        Se resuelve en SQLite, sin reconstruir el análisis anterior en memoria.
+        """
+        previous = self._last_in_series(conn, repo_url, metrics_key, options_key, ref, analysis_id)
+        if previous is None or previous[1] not in ("keyframe", "delta"):
+            return
+        prev_id, prev_kind, prev_base = previous
+        keyframe_id = prev_id if prev_kind == "keyframe" else prev_base
+        conn.execute(
+            f"""
+            INSERT INTO analysis_files (analysis_id, path, metrics_json, deleted)
+            SELECT ?, path, NULL, 1 FROM ({self._LATEST_FILES})
+            WHERE rn = 1 AND deleted = 0
+              AND path NOT IN (SELECT path FROM analysis_files WHERE analysis_id = ?)
+            """,
+            (analysis_id, keyframe_id, keyframe_id, prev_id, analysis_id)
+        )
+
+    def _diff_files(self, analysis_id: int, previous: Dict[str, str], current: Dict[str, str]) -> List[tuple]:
+        """
+        Filas a insertar en analysis_files: archivos nuevos o modificados,
+        más una marca 'deleted' para los que desaparecieron.
+        """
+        rows = [
+            (analysis_id, path, metrics_json, 0)
+            for path, metrics_json in current.items()
+            if previous.get(path) != metrics_json
+        ]
+        rows.extend(
+            (analysis_id, path, None, 1)
+            for path in previous
+            if path not in current
+        )
+        return rows
+
+    def _reconstruct_files(self, conn: sqlite3.Connection, analysis_id: int, keyframe_id: int) -> Dict[str, str]:
+        """
+        Reconstruye {path: metrics_json} de un análisis aplicando, en orden,
+        el keyframe y los deltas posteriores hasta 'analysis_id' (incluido).
+        """
+        rows = conn.execute(
+            """
+            SELECT path, metrics_json, deleted FROM analysis_files
+            WHERE analysis_id = ?
+               OR analysis_id IN (
+                   SELECT id FROM analyses WHERE base_id = ? AND id <= ?
+               )
+            ORDER BY analysis_id
+            """,
+            (keyframe_id, keyframe_id, analysis_id)
+        )
+        files: Dict[str, str] = {}
+        for path, metrics_json, deleted in rows:
+            if deleted:
+                files.pop(path, None)
+            else:
+                files[path] = metrics_json
+        return files
+
+    def _load_report(self, conn: sqlite3.Connection, row) -> Dict:
+        """
+        Devuelve el informe completo de una fila (id, result_json, kind, base_id).
+        """
+        analysis_id, result_json, kind, base_id = row
+        report = json.loads(result_json)
+        report["id"] = analysis_id
+        if kind not in ("keyframe", "delta"):
+            # Fila antigua: el JSON ya contiene 'files'
+            return report
+
+        keyframe_id = analysis_id if kind == "keyframe" else base_id
+        files = self._reconstruct_files(conn, analysis_id, keyframe_id)
+        report["files"] = [
+            FileRecord.from_json(files[path])
+            for path in sorted(files, key=lambda p: PurePath(p).parts)
+        ]
+        return report
     
-    def get_latest_analysis(self, repo_url: str) -> Optional[Dict]:
+    def get_latest_analysis(self, repo_url: str, metrics_key: Optional[str] = None,
+                            options_key: Optional[str] = None,
+                            commit: Optional[str] = None,
+                            ref: Optional[str] = None) -> Optional[Dict]:
         """
         Recupera el análisis más reciente para un repositorio dado.
+        Cada parte de la clave de caché que se indique (conjunto de métricas,
+        opciones, commit) restringe la búsqueda; las que sean None no filtran.
+        Con commit el contenido está fijado y sirve el análisis de cualquier ref
+        que apunte a él; sin commit se busca el último de la misma ref (None =
+        rama por defecto).
         Devuelve el diccionario de resultados o None si no existe.
         """
+        where, params = self._filters(repo_url=repo_url, metrics_key=metrics_key,
+                                      options_key=options_key, commit_sha=commit)
+        if commit is None:
+            where += " AND ref IS ?"
+            params += (ref,)
+        query = f"""
+        SELECT id, result_json, kind, base_id FROM analyses 
+        WHERE {where} AND status IS NULL
+        ORDER BY analyzed_at DESC, id DESC
+        LIMIT 1
+        """
+
+        with self._get_connection() as conn:
+            row = conn.execute(query, params).fetchone()
+            if row:
+                return self._load_report(conn, row)
+            return None
+
+    def has_analysis(self, repo_url: str, metrics_key: Optional[str],
+                     options_key: Optional[str], commit: str) -> bool:
+        """
+        Indica si ya hay un análisis completo de 'commit' con esa clave de caché
+        (sin cargarlo).
+        """
         query = """
-        SELECT result_json FROM analyses 
-        WHERE repo_url = ? 
-        ORDER BY analyzed_at DESC 
+        SELECT 1 FROM analyses
+        WHERE repo_url = ? AND metrics_key IS ? AND options_key IS ? AND commit_sha = ?
+          AND partial = 0 AND status IS NULL
         LIMIT 1
         """
+        with self._get_connection() as conn:
+            return conn.execute(query, (repo_url, metrics_key, options_key, commit)).fetchone() is not None
 
+    def list_tracked(self) -> List[Dict]:
+        """
+        Combinaciones (repo, ref, métricas, opciones) ya analizadas, con las
+        métricas y opciones de su último análisis: lo que hay que mantener al día.
+        """
+        query = """
+        SELECT repo_url, ref, metrics_key, options_key, result_json FROM (
+            SELECT repo_url, ref, metrics_key, options_key, result_json,
+                   ROW_NUMBER() OVER (PARTITION BY repo_url, ref, metrics_key, options_key
+                                      ORDER BY analyzed_at DESC, id DESC) AS rn
+            FROM analyses
+            WHERE status IS NULL AND partial = 0
+        )
+        WHERE rn = 1
+        """
+        tracked = []
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (repo_url,))
-            row = cursor.fetchone()
+            for repo_url, ref, metrics_key, options_key, result_json in conn.execute(query):
+                header = json.loads(result_json)
+                tracked.append({
+                    "repo_url": repo_url,
+                    "ref": ref,
+                    "metrics": header.get("metrics"),
+                    "options": header.get("options") or {},
+                    "metrics_key": metrics_key,
+                    "options_key": options_key,
+                })
+        return tracked
 
+    def get_analysis(self, analysis_id: int) -> Optional[Dict]:
+        """
+        Recupera un análisis concreto por su id (informe completo).
+        """
+        query = "SELECT id, result_json, kind, base_id FROM analyses WHERE id = ?"
+        with self._get_connection() as conn:
+            row = conn.execute(query, (analysis_id,)).fetchone()
             if row:
-                return json.loads(row[0])
+                return self._load_report(conn, row)
+            return None
+
+    # Columnas por las que se puede ordenar una página de archivos (la expresión
+    # SQL sale de aquí, nunca del usuario). Las funciones se resumen en SQLite.
+    PAGE_SORT = {
+        "path": "path",
+        "loc": "json_extract(metrics_json, '$.loc')",
+        "todos": "json_extract(metrics_json, '$.todos')",
+        "num_imports": "json_extract(metrics_json, '$.num_imports')",
+        "duplication": "json_extract(metrics_json, '$.duplication')",
+        "clones": "json_extract(metrics_json, '$.clones')",
+        "maintainability": "json_extract(metrics_json, '$.maintainability')",
+        "num_functions": """CASE WHEN json_type(metrics_json, '$.functions') = 'object'
+            THEN (SELECT COUNT(*) FROM json_each(metrics_json, '$.functions')) END""",
+        "max_cc": """CASE WHEN json_type(metrics_json, '$.functions') = 'object'
+            THEN COALESCE((SELECT MAX(json_extract(value, '$.cc'))
+                           FROM json_each(metrics_json, '$.functions')), 0) END""",
+    }
+
+    def get_analysis_page(self, analysis_id: int, page: int = 1, per_page: int = 50,
+                          sort: str = "path", descending: bool = False,
+                          query: str = "") -> Optional[Dict]:
+        """
+        Cabecera de un análisis con una sola página de sus archivos: el filtro por
+        ruta, el orden y la paginación se hacen en SQLite sobre la cadena
+        keyframe + deltas, y solo se deserializan las filas de la página.
+
+        Returns:
+            El informe sin 'files' completo: 'files' lleva los archivos de la página
+            y 'files_page' = {"page", "total"} (página tras acotarla y archivos que
+            pasan el filtro). None si no existe. Las filas antiguas (con todo el
+            JSON) se devuelven enteras, sin 'files_page'.
+        """
+        order_by = self.PAGE_SORT.get(sort, "path")
+        direction = "DESC" if descending else "ASC"
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT id, result_json, kind, base_id FROM analyses WHERE id = ?", (analysis_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            _, result_json, kind, base_id = row
+            if kind not in ("keyframe", "delta"):
+                return self._load_report(conn, row)
+
+            keyframe_id = analysis_id if kind == "keyframe" else base_id
+            latest = f"""
+                SELECT path, metrics_json FROM ({self._LATEST_FILES})
+                WHERE rn = 1 AND deleted = 0 AND instr(lower(path), ?) > 0
+            """
+            params = (keyframe_id, keyframe_id, analysis_id, query.lower())
+            total = conn.execute(f"SELECT COUNT(*) FROM ({latest})", params).fetchone()[0]
+            page = min(max(page, 1), max(1, -(-total // per_page)))
+            # Los valores ausentes (métrica no calculada) van siempre al final
+            rows = conn.execute(
+                f"""
+                SELECT metrics_json FROM ({latest})
+                ORDER BY ({order_by}) IS NULL, ({order_by}) {direction}, path
+                LIMIT ? OFFSET ?
+                """,
+                params + (per_page, (page - 1) * per_page)
+            )
+            report = json.loads(result_json)
+            report["id"] = analysis_id
+            report["files"] = [FileRecord.from_json(metrics_json) for (metrics_json,) in rows]
+            report["files_page"] = {"page": page, "total": total}
+            return report
+
+    def get_analysis_file(self, analysis_id: int, path: str) -> Optional[Dict]:
+        """
+        Recupera las métricas de un único archivo de un análisis, sin reconstruir
+        el resto: basta la última fila de ese 'path' en la cadena keyframe + deltas.
+        """
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT result_json, kind, base_id FROM analyses WHERE id = ?", (analysis_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            result_json, kind, base_id = row
+
+            if kind not in ("keyframe", "delta"):
+                # Fila antigua: el detalle está dentro del JSON completo
+                files = json.loads(result_json).get("files", [])
+                return next((FileRecord(f) for f in files if f.get("path") == path), None)
+
+            keyframe_id = analysis_id if kind == "keyframe" else base_id
+            found = conn.execute(
+                """
+                SELECT metrics_json, deleted FROM analysis_files
+                WHERE path = ?
+                  AND (analysis_id = ?
+                       OR analysis_id IN (SELECT id FROM analyses WHERE base_id = ? AND id <= ?))
+                ORDER BY analysis_id DESC
+                LIMIT 1
+                """,
+                (path, keyframe_id, keyframe_id, analysis_id)
+            ).fetchone()
+            if found is None or found[1]:
+                return None
+            return FileRecord.from_json(found[0])
+
+    def get_summary_trend(self, repo_url: str, metrics_key: Optional[str] = None,
+                          ref: Optional[str] = None) -> List[Dict]:
+        """
+        Serie temporal del resumen de un repositorio (del más antiguo al más reciente)
+        en una ref (None = rama por defecto).
+        Solo lee la columna summary_json: no reconstruye informes.
+        Los análisis parciales (cortados por tiempo) no forman parte de la serie.
+        """
+        where, params = self._filters(repo_url=repo_url, metrics_key=metrics_key)
+        query = f"""
+        SELECT id, analyzed_at, summary_json FROM analyses
+        WHERE {where} AND ref IS ? AND summary_json IS NOT NULL AND partial = 0 AND status IS NULL
+        ORDER BY analyzed_at, id
+        """
+        with self._get_connection() as conn:
+            return [
+                {"id": analysis_id, "analyzed_at": analyzed_at, "summary": json.loads(summary_json)}
+                for analysis_id, analyzed_at, summary_json
+                in conn.execute(query, params + (ref,))
+            ]
+
+    def get_file_trend(self, repo_url: str, path: str, metrics_key: Optional[str] = None,
+                       ref: Optional[str] = None) -> List[Dict]:
+        """
+        Evolución de las métricas de un archivo a lo largo de los análisis.
+        Gracias a la codificación por deltas, cada punto es un cambio: el valor
+        se mantiene hasta el siguiente punto. 'metrics' es None si el archivo se borró.
+        """
+        where, params = self._filters("a.", repo_url=repo_url, metrics_key=metrics_key)
+        query = f"""
+        SELECT a.id, a.analyzed_at, a.kind, f.metrics_json, f.deleted
+        FROM analysis_files f
+        JOIN analyses a ON a.id = f.analysis_id
+        WHERE f.path = ? AND {where} AND a.ref IS ? AND a.partial = 0 AND a.status IS NULL
+        ORDER BY a.analyzed_at, a.id
+        """
+        points: List[Dict] = []
+        last_json = None
+        with self._get_connection() as conn:
+            rows = conn.execute(query, (path,) + params + (ref,))
+            for analysis_id, analyzed_at, kind, metrics_json, deleted in rows:
+                current = None if deleted else metrics_json
+                # Los keyframes repiten el archivo aunque no cambie: se omiten si es igual
+                if points and current == last_json:
+                    continue
+                last_json = current
+                points.append({
+                    "id": analysis_id,
+                    "analyzed_at": analyzed_at,
+                    "metrics": json.loads(current) if current else None,
+                })
+        return points
+
+    @staticmethod
+    def _filters(prefix: str = "", **columns) -> tuple:
+        """
+        Construye la cláusula WHERE (y sus parámetros) con las columnas cuyo valor
+        no es None. Los nombres de columna vienen del código, nunca del usuario.
+        """
+        active = [(name, value) for name, value in columns.items() if value is not None]
+        where = " AND ".join(f"{prefix}{name} = ?" for name, _ in active) or "1 = 1"
+        return where, tuple(value for _, value in active)
+
+    def get_latest_summary(self, repo_url: str) -> Optional[Dict]:
+        """
+        Recupera solo el resumen (summary) del análisis más reciente,
+        sin deserializar el detalle por archivo.
+        """
+        query = """
+        SELECT repo_url, analyzed_at, repo_name, summary_json,
+               CASE WHEN summary_json IS NULL THEN result_json END
+        FROM analyses
+        WHERE repo_url = ? AND status IS NULL
+        ORDER BY analyzed_at DESC
+        LIMIT 1
+        """
+
+        with self._get_connection() as conn:
+            row = conn.execute(query, (repo_url,)).fetchone()
+            if row:
+                return self._row_to_entry(row)
             return None
     
     def list_analyses(self, limit: int = 50) -> List[Dict]:
         """
         Devuelve una lista de los últimos análisis realizados.
-        Se usa para mostrar el historial en la UI
+        Se usa para mostrar el historial en la UI.
+        Solo incluye metadatos y resumen (no el detalle por archivo).
         """
         query = """
-        SELECT result_json FROM analyses 
+        SELECT repo_url, analyzed_at, repo_name, summary_json,
+               CASE WHEN summary_json IS NULL THEN result_json END
+        FROM analyses
+        WHERE status IS NULL
         ORDER BY analyzed_at DESC 
         LIMIT ?
         """
@@ -96,7 +806,200 @@ class DBManager:
             rows = cursor.fetchall()
 
             for row in rows:
-                # Deserializamos cada fila para devolver objetos completos
-                analyses.append(json.loads(row[0]))
+                analyses.append(self._row_to_entry(row))
         
-        return analyses
\ No newline at end of file
+        return analyses
+
+    def iter_export(self, with_files: bool, repo_url: Optional[str] = None,
+                    since: Optional[str] = None,
+                    until: Optional[str] = None) -> Iterator[Tuple[Dict[str, Any], Optional[FileRecord]]]:
+        """
+        Recorre los análisis completados (del más antiguo al más reciente) para
+        exportarlos, con cursores de SQLite: nada se carga entero en memoria.
+
+        Args:
+            with_files (bool): Además de cada análisis, sus archivos.
+            repo_url (str): Solo este repositorio.
+            since / until (str): Fechas ISO (inclusivas, con la precisión que se
+                indique: "2026-01" incluye todo enero).
+
+        Yields:
+            (análisis, None) por análisis, o (análisis, métricas) por archivo.
+        """
+        where, params = self._filters(repo_url=repo_url)
+        if since:
+            where += " AND analyzed_at >= ?"
+            params += (since,)
+        if until:
+            # Comparar el prefijo hace la fecha final inclusiva a cualquier precisión
+            where += " AND substr(analyzed_at, 1, ?) <= ?"
+            params += (len(until), until)
+        query = f"""
+        SELECT id, repo_url, repo_name, ref, commit_sha, analyzed_at, metrics_key,
+               options_key, partial, summary_json, kind, base_id,
+               CASE WHEN summary_json IS NULL OR kind IS NULL THEN result_json END
+        FROM analyses
+        WHERE {where} AND status IS NULL
+        ORDER BY id
+        """
+        conn = self._get_connection()
+        try:
+            for row in conn.execute(query, params):
+                (analysis_id, url, repo_name, ref, commit, analyzed_at, metrics_key,
+                 options_key, partial, summary_json, kind, base_id, result_json) = row
+                legacy = json.loads(result_json) if result_json else None
+                analysis = {
+                    "id": analysis_id, "repo_url": url, "repo_name": repo_name, "ref": ref,
+                    "commit": commit, "analyzed_at": analyzed_at, "metrics_key": metrics_key,
+                    "options_key": options_key, "partial": partial,
+                    "summary": json.loads(summary_json) if summary_json else (legacy or {}).get("summary", {}),
+                }
+                if not with_files:
+                    yield analysis, None
+                elif kind not in ("keyframe", "delta"):
+                    # Fila antigua: el detalle está dentro del JSON completo
+                    for metrics in (legacy or {}).get("files", []):
+                        yield analysis, FileRecord(metrics)
+                else:
+                    keyframe_id = analysis_id if kind == "keyframe" else base_id
+                    for metrics_json in self._iter_files(conn, analysis_id, keyframe_id):
+                        yield analysis, FileRecord.from_json(metrics_json)
+        finally:
+            conn.close()
+
+    def _iter_files(self, conn: sqlite3.Connection, analysis_id: int, keyframe_id: int) -> Iterator[str]:
+        """
+        Como _reconstruct_files pero sin el dict en memoria: SQLite elige la
+        última versión de cada archivo en la cadena keyframe + deltas.
+        """
+        rows = conn.execute(
+            f"""
+            SELECT metrics_json FROM ({self._LATEST_FILES})
+            WHERE rn = 1 AND deleted = 0
+            ORDER BY path
+            """,
+            (keyframe_id, keyframe_id, analysis_id)
+        )
+        for (metrics_json,) in rows:
+            yield metrics_json
+
+    def _row_to_entry(self, row) -> Dict:
+        """
+        Convierte una fila (repo_url, analyzed_at, repo_name, summary_json, result_json)
+        en una entrada de historial.
+        Las filas antiguas sin summary_json se resuelven deserializando result_json.
+        """
+        repo_url, analyzed_at, repo_name, summary_json, result_json = row
+        if summary_json is None:
+            full = json.loads(result_json)
+            repo_name = full.get("repo_name")
+            summary = full.get("summary", {})
+        else:
+            summary = json.loads(summary_json)
+        return {
+            "repo": repo_url,
+            "repo_url": repo_url,
+            "repo_name": repo_name,
+            "analyzed_at": analyzed_at,
+            "summary": summary,
+        }
+
+class AnalysisStream:
+    """
+    Escritura incremental de un análisis: los archivos se insertan en lotes según
+    se calculan, así que ni la fachada ni la BD necesitan el informe completo en
+    memoria. El informe se reconstruye al leerlo (DBManager.get_analysis).
+    """
+
+    # Archivos por transacción (equilibrio entre memoria y número de commits)
+    BATCH_SIZE = 200
+
+    def __init__(self, db: DBManager, analysis_id: int):
+        self.db = db
+        self.analysis_id = analysis_id
+        self._pending: List[tuple] = []
+
+    def write(self, metrics: Dict) -> None:
+        self._pending.append(
+            (self.analysis_id, metrics["path"], json.dumps(metrics, sort_keys=True, default=json_default), 0)
+        )
+        if len(self._pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        self.db._run_write(lambda conn: conn.executemany(
+            """
+            INSERT OR REPLACE INTO analysis_files (analysis_id, path, metrics_json, deleted)
+            VALUES (?, ?, ?, ?)
+            """,
+            rows
+        ))
+
+    def update_files(self, key: str, values: Dict[str, object]) -> None:
+        """
+        Cambia el valor de 'key' en archivos ya escritos (ej. el recuento de clones,
+        que solo se conoce al final). Solo se reescriben los archivos indicados.
+        """
+        self.flush()
+        if not values:
+            return
+
+        def write(conn: sqlite3.Connection) -> None:
+            for path, value in values.items():
+                row = conn.execute(
+                    "SELECT metrics_json FROM analysis_files WHERE analysis_id = ? AND path = ?",
+                    (self.analysis_id, path)
+                ).fetchone()
+                if row is None:
+                    continue
+                metrics = json.loads(row[0])
+                metrics[key] = value
+                conn.execute(
+                    "UPDATE analysis_files SET metrics_json = ? WHERE analysis_id = ? AND path = ?",
+                    (json.dumps(metrics, sort_keys=True, default=json_default), self.analysis_id, path)
+                )
+
+        self.db._run_write(write)
+
+    def finish(self, result: Dict) -> int:
+        """
+        Escribe la cabecera y el resumen definitivos y hace visible el análisis.
+        """
+        self.flush()
+        header = {k: v for k, v in result.items() if k != "files"}
+
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                """
+                UPDATE analyses
+                SET analyzed_at = ?, result_json = ?, repo_name = ?, summary_json = ?,
+                    partial = ?, status = NULL
+                WHERE id = ?
+                """,
+                (result.get("analyzed_at"), json.dumps(header), result.get("repo_name"),
+                 json.dumps(result.get("summary", {})), 1 if result.get("partial") else 0,
+                 self.analysis_id)
+            )
+            series = conn.execute(
+                "SELECT repo_url, metrics_key, options_key, ref FROM analyses WHERE id = ?",
+                (self.analysis_id,)
+            ).fetchone()
+            self.db._mark_deleted(conn, self.analysis_id, *series)
+
+        self.db._run_write(write)
+        return self.analysis_id
+
+    def abort(self) -> None:
+        """
+        Descarta el análisis (error o nada que guardar).
+        """
+        self._pending = []
+
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM analysis_files WHERE analysis_id = ?", (self.analysis_id,))
+            conn.execute("DELETE FROM analyses WHERE id = ?", (self.analysis_id,))
+
+        self.db._run_write(write)
@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+import operator
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+# Columnas de cada nivel de exportación (también el orden del CSV)
+CONTEXT_COLUMNS = ["analysis_id", "repo_url", "ref", "commit", "analyzed_at"]
+LEVELS: Dict[str, List[str]] = {
+    "analyses": ["analysis_id", "repo_url", "repo_name", "ref", "commit", "analyzed_at",
+                 "metrics_key", "options_key", "partial",
+                 "num_files", "total_lines", "avg_maintainability"],
+    "files": CONTEXT_COLUMNS + ["path", "loc", "todos", "num_imports", "num_dependencies",
+                                "duplication", "maintainability", "clones",
+                                "num_functions", "max_cc"],
+    "functions": CONTEXT_COLUMNS + ["path", "function", "loc", "params", "cc", "max_nesting"],
+}
+
+FORMATS = ("ndjson", "csv")
+
+_OPERATORS = {
+    ">=": operator.ge, "<=": operator.le, "!=": operator.ne,
+    ">": operator.gt, "<": operator.lt, "=": operator.eq,
+}
+_CONDITION = re.compile(r"^\s*([a-z_]+)\s*(>=|<=|!=|>|<|=)\s*(-?[0-9.]+)\s*$")
+
+def parse_condition(text: str) -> Tuple[str, str, float]:
+    """
+    "maintainability<50" -> ("maintainability", "<", 50.0).
+
+    Raises:
+        ValueError: si la condición no tiene la forma 'campo op número'.
+    """
+    match = _CONDITION.match(text)
+    if not match:
+        raise ValueError(f"Condición no válida: '{text}' (ej. 'cc>=10', 'maintainability<50')")
+    field, op, value = match.groups()
+    return field, op, float(value)
+
+def check_conditions(level: str, conditions: Iterable[Tuple[str, str, float]]) -> None:
+    """
+    Raises:
+        ValueError: si el nivel no existe o una condición usa una columna que no tiene.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"Nivel desconocido '{level}' (válidos: {', '.join(LEVELS)})")
+    for field, _, _ in conditions:
+        if field not in LEVELS[level]:
+            raise ValueError(f"El nivel '{level}' no tiene la columna '{field}'")
+
+def matches(row: Dict[str, Any], conditions: Iterable[Tuple[str, str, float]]) -> bool:
+    """
+    La fila cumple todas las condiciones (un valor ausente o no numérico no cumple).
+    """
+    for field, op, value in conditions:
+        current = row.get(field)
+        if isinstance(current, bool) or not isinstance(current, (int, float)):
+            return False
+        if not _OPERATORS[op](current, value):
+            return False
+    return True
+
+def analysis_row(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    summary = analysis.get("summary") or {}
+    return {
+        "analysis_id": analysis["id"],
+        "repo_url": analysis["repo_url"],
+        "repo_name": analysis.get("repo_name"),
+        "ref": analysis.get("ref"),
+        "commit": analysis.get("commit"),
+        "analyzed_at": analysis.get("analyzed_at"),
+        "metrics_key": analysis.get("metrics_key"),
+        "options_key": analysis.get("options_key"),
+        "partial": bool(analysis.get("partial")),
+        "num_files": summary.get("num_files"),
+        "total_lines": summary.get("total_lines"),
+        "avg_maintainability": summary.get("avg_maintainability"),
+    }
+
+def _context(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "analysis_id": analysis["id"],
+        "repo_url": analysis["repo_url"],
+        "ref": analysis.get("ref"),
+        "commit": analysis.get("commit"),
+        "analyzed_at": analysis.get("analyzed_at"),
+    }
+
+def file_row(analysis: Dict[str, Any], metrics) -> Dict[str, Any]:
+    row = _context(analysis)
+    row["path"] = metrics.get("path")
+    for key in ("loc", "todos", "num_imports", "duplication", "maintainability", "clones"):
+        row[key] = metrics.get(key)
+    dependencies = metrics.get("dependencies")
+    row["num_dependencies"] = len(dependencies) if dependencies is not None else None
+    functions = metrics.get("functions")
+    row["num_functions"] = len(functions) if functions is not None else None
+    row["max_cc"] = max((f["cc"] for f in functions.values()), default=0) if functions is not None else None
+    return row
+
+def function_rows(analysis: Dict[str, Any], metrics) -> Iterator[Dict[str, Any]]:
+    context = _context(analysis)
+    for name, func in (metrics.get("functions") or {}).items():
+        yield dict(context, path=metrics.get("path"), function=name, loc=func["loc"],
+                   params=func["params"], cc=func["cc"], max_nesting=func["max_nesting"])
+
+def export_rows(level: str, source: Iterable[Tuple[Dict[str, Any], Any]],
+                conditions: Iterable[Tuple[str, str, float]] = ()) -> Iterator[Dict[str, Any]]:
+    """
+    Filas planas de un nivel a partir de DBManager.iter_export, filtradas por
+    las condiciones. Se generan de una en una (memoria constante).
+
+    Args:
+        level (str): "analyses", "files" o "functions".
+        source: Pares (análisis, métricas del archivo o None) en orden.
+        conditions: Umbrales [(columna, operador, valor)] (ver parse_condition).
+    """
+    conditions = list(conditions)
+    check_conditions(level, conditions)
+    for analysis, metrics in source:
+        if level == "analyses":
+            rows = [analysis_row(analysis)]
+        elif level == "files":
+            rows = [file_row(analysis, metrics)]
+        else:
+            rows = function_rows(analysis, metrics)
+        for row in rows:
+            if matches(row, conditions):
+                yield row
+
+def to_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+def to_csv(rows: Iterable[Dict[str, Any]], level: str) -> Iterator[str]:
+    """
+    CSV con cabecera; cada fila se escribe en cuanto llega.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=LEVELS[level], extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def render(rows: Iterable[Dict[str, Any]], level: str, fmt: str) -> Iterator[str]:
+    """
+    Texto de la exportación en el formato pedido ("ndjson" o "csv").
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido '{fmt}' (válidos: {', '.join(FORMATS)})")
+    return to_ndjson(rows) if fmt == "ndjson" else to_csv(rows, level)
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import fcntl  # POSIX
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+class LockTimeout(RuntimeError):
+    """
+    No se pudo adquirir el lock dentro del tiempo indicado.
+    """
+
+class FileLock:
+    """
+    Lock exclusivo entre procesos basado en un fichero (flock en POSIX,
+    msvcrt.locking en Windows).
+
+    Es reentrante dentro del mismo hilo: si un hilo ya posee el lock de una ruta,
+    volver a adquirirlo solo incrementa un contador. Entre hilos distintos del
+    mismo proceso también bloquea, porque cada adquisición abre su propio descriptor.
+    """
+
+    # Registro por ruta: (id del hilo dueño, profundidad, descriptor)
+    _held: Dict[str, tuple] = {}
+    _held_guard = threading.Lock()
+
+    def __init__(self, path: Path, timeout: Optional[float] = None, poll_interval: float = 0.05):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._key = str(self.path.resolve())
+
+    def acquire(self) -> None:
+        me = threading.get_ident()
+        with FileLock._held_guard:
+            owner = FileLock._held.get(self._key)
+            if owner and owner[0] == me:
+                FileLock._held[self._key] = (me, owner[1] + 1, owner[2])
+                return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            if self._try_lock(fd):
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise LockTimeout(f"Timeout esperando el lock {self.path}")
+            time.sleep(self.poll_interval)
+
+        with FileLock._held_guard:
+            FileLock._held[self._key] = (me, 1, fd)
+
+    def release(self) -> None:
+        with FileLock._held_guard:
+            owner = FileLock._held.get(self._key)
+            if not owner or owner[0] != threading.get_ident():
+                raise RuntimeError(f"Lock {self.path} no pertenece a este hilo")
+            if owner[1] > 1:
+                FileLock._held[self._key] = (owner[0], owner[1] - 1, owner[2])
+                return
+            del FileLock._held[self._key]
+        fd = owner[2]
+        self._unlock(fd)
+        os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    @staticmethod
+    def _try_lock(fd: int) -> bool:
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:  # pragma: no cover - Windows
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _unlock(fd: int) -> None:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:  # pragma: no cover - Windows
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
@@ -1,34 +1,259 @@
+import datetime
+import hashlib
 import shutil
 import stat
 import subprocess
 import os
 from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
 from config import ConfigSingleton
+from deadline import Deadline, DeadlineExceeded
+from .locks import FileLock
 
 class RepoManager:
     """
     Gestor de repositorios robusto para Windows/Linux.
     """
     
+    # Refs que se traen del remoto al mirror (ramas y tags, sin las de PRs/MRs)
+    FETCH_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+
     def __init__(self):
         self.config = ConfigSingleton.get_instance()
 
-    def ensure_repo(self, repo_url: str) -> Path:
-        repo_name = self._extract_repo_name(repo_url)
-        destination = self.config.repo_cache_dir / repo_name
+    def repo_lock(self, repo_url: str, deadline: Optional[Deadline] = None) -> FileLock:
+        """
+        Lock exclusivo (entre procesos e hilos) sobre el directorio de un repo.
+        Quien clona, borra o analiza el repo debe tenerlo. Es reentrante por hilo.
+        Con 'deadline' la espera no supera el tiempo que le queda al análisis.
+        """
+        lock_path = self.config.repo_cache_dir / ".locks" / f"{self._cache_key(repo_url)}.lock"
+        timeout = self.config.repo_lock_timeout
+        if deadline is not None and deadline.remaining() is not None:
+            timeout = min(timeout, deadline.remaining())
+        return FileLock(lock_path, timeout=timeout)
+
+    def mirror_path(self, repo_url: str) -> Path:
+        """
+        Ruta del mirror bare del remoto: todas las ramas, tags y commits de un
+        repo comparten el mismo almacén de objetos (y las mismas descargas).
+        Va por remoto completo: alice/utils y bob/utils no comparten mirror.
+        """
+        return self.config.repo_cache_dir / f"{self._cache_key(repo_url)}.git"
+
+    def ensure_repo(self, repo_url: str, deadline: Optional[Deadline] = None) -> Path:
+        """
+        Devuelve el mirror bare del repo, clonándolo si no existe.
+        """
+        destination = self.mirror_path(repo_url)
+
+        with self.repo_lock(repo_url):
+            # Doble verificación: un mirror sin HEAD u objetos quedó a medias
+            if destination.exists():
+                if (destination / "HEAD").exists() and (destination / "objects").is_dir():
+                    return destination
+                print(f"[RepoManager] Mirror corrupto detectado en {destination}. Re-clonando...")
+                self.remove_repo(destination)
+
+            self._clone_repo(repo_url, destination, deadline)
+            return destination
 
-        # Doble verificación: Si existe pero está vacía (solo .git), la tratamos como inválida
-        if destination.exists():
-            # Si solo tiene la carpeta .git y nada más, asumimos que está corrupta y re-clonamos
-            items = list(destination.iterdir())
-            if len(items) <= 1 and any(x.name == '.git' for x in items):
-                print(f"[RepoManager] Carpeta corrupta detectada en {destination}. Re-clonando...")
+    def refresh_repo(self, repo_url: str, deadline: Optional[Deadline] = None) -> Path:
+        """
+        Actualiza el mirror (análisis forzado) con un fetch: solo se descargan
+        los objetos nuevos. Si el fetch falla, se borra y se vuelve a clonar.
+        Es atómico respecto a otros hilos/procesos que usen el mismo repo.
+        """
+        with self.repo_lock(repo_url):
+            destination = self.local_repo_path(repo_url)
+            if destination is None:
+                return self.ensure_repo(repo_url, deadline)
+            try:
+                self.fetch(repo_url, deadline)
+            except RuntimeError as e:
+                print(f"[RepoManager] {e}. Re-clonando...")
                 self.remove_repo(destination)
-            else:
-                return destination
+                return self.ensure_repo(repo_url, deadline)
+            return destination
 
-        self._clone_repo(repo_url, destination)
-        return destination
+    def fetch(self, repo_url: str, deadline: Optional[Deadline] = None, ref: Optional[str] = None) -> None:
+        """
+        Trae las novedades del remoto al mirror. Con 'ref' se pide además ese
+        commit o ref concreto (ej. un SHA que ya no cuelga de ninguna rama).
+
+        Raises:
+            DeadlineExceeded: si el fetch no termina a tiempo (lo ya traído se conserva).
+            RuntimeError: si git falla.
+        """
+        destination = self.mirror_path(repo_url)
+        command = ["git", "-C", str(destination), "fetch", "--prune", "--quiet", "origin"]
+        if ref:
+            command.append(ref)
+        print(f"[RepoManager] Actualizando mirror {destination}...")
+        with self.repo_lock(repo_url):
+            try:
+                subprocess.run(
+                    command,
+                    check=True,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    timeout=deadline.remaining() if deadline is not None else None
+                )
+            except subprocess.TimeoutExpired:
+                raise DeadlineExceeded("clone")
+            except subprocess.CalledProcessError as e:
+                raise RuntimeError(f"Error actualizando repo: {e.stderr.decode().strip()}")
+
+    def remote_commit(self, repo_url: str, ref: Optional[str] = None,
+                      timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Commit al que apunta 'ref' (por defecto HEAD) en el remoto, con
+        'git ls-remote': no descarga objetos ni toca el mirror.
+        Devuelve None si la ref no existe en el remoto o no se puede consultar.
+        """
+        try:
+            out = subprocess.run(
+                # Una tag anotada solo aparece "pelada" (^{}) si se pide explícitamente
+                ["git", "ls-remote", repo_url] + ([ref, f"{ref}^{{}}"] if ref else ["HEAD"]),
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=timeout
+            )
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+            return None
+
+        found = {}
+        for line in out.stdout.decode(errors="replace").splitlines():
+            sha, _, name = line.partition("\t")
+            found[name] = sha
+        if not ref:
+            return found.get("HEAD")
+        # El patrón también casa con sufijos (ej. "x/dev"): primero el nombre exacto.
+        # De una tag anotada interesa la pelada: ese es su commit
+        for name in (f"refs/heads/{ref}", f"refs/tags/{ref}^{{}}", f"refs/tags/{ref}"):
+            if name in found:
+                return found[name]
+        return None
+
+    def local_repo_path(self, repo_url: str):
+        """
+        Devuelve la ruta del mirror local si ya existe (sin clonar), o None.
+        """
+        destination = self.mirror_path(repo_url)
+        if (destination / "HEAD").exists():
+            return destination
+        return None
+
+    def mirror_size(self, repo_url: str) -> Optional[int]:
+        """
+        Bytes de los packs del mirror local (estimación del tamaño del repo para
+        el planificador), o None si aún no se ha clonado. Solo se listan los
+        .pack de objects/pack: los objetos sueltos son pocos y recorrerlos
+        costaría un stat por objeto.
+        """
+        mirror = self.local_repo_path(repo_url)
+        if mirror is None:
+            return None
+        total = 0
+        try:
+            with os.scandir(mirror / "objects" / "pack") as entries:
+                for entry in entries:
+                    if entry.name.endswith(".pack"):
+                        try:
+                            total += entry.stat().st_size
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+        return total
+
+    def resolve_ref(self, repo_path: Path, ref: Optional[str] = None):
+        """
+        SHA del commit al que apunta 'ref' (rama, tag o commit) en el repo local,
+        o None si no existe ahí. Sin 'ref', el HEAD (rama por defecto del remoto).
+        """
+        try:
+            out = subprocess.run(
+                ["git", "-C", str(repo_path), "rev-parse", "--verify", "--quiet",
+                 f"{ref or 'HEAD'}^{{commit}}"],
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        except (subprocess.CalledProcessError, OSError):
+            return None
+        return out.stdout.decode().strip() or None
+
+    def list_commits(self, repo_path: Path, revision: Optional[str] = None, every: int = 1,
+                     tags: bool = False, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Commits a recorrer en un barrido del historial, del más antiguo al más reciente.
+
+        Args:
+            revision (str): Rango o ref (ej. "v1.0..main"); por defecto HEAD. Se sigue
+                solo el primer padre (la historia de la rama, no la de cada merge).
+            every (int): Uno de cada N commits (siempre se incluye el más reciente).
+            tags (bool): En lugar de commits, cada tag (por fecha de creación).
+            limit (int): Como mucho los N más recientes.
+
+        Returns:
+            List[dict]: {"commit", "label", "date"} (fecha ISO del commit o de la tag).
+        """
+        if tags:
+            command = ["for-each-ref", "--sort=creatordate",
+                       "--format=%(objectname)%00%(*objectname)%00%(refname:short)%00%(creatordate:unix)",
+                       "refs/tags"]
+        else:
+            command = ["log", "--first-parent", "--reverse", "--format=%H%x00%x00%x00%ct",
+                       revision or "HEAD", "--"]
+        try:
+            out = subprocess.run(
+                ["git", "-C", str(repo_path), *command],
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        except subprocess.CalledProcessError as e:
+            raise ValueError(f"No se pudo leer el historial: {e.stderr.decode().strip()}")
+
+        commits = []
+        for line in out.stdout.decode(errors="replace").splitlines():
+            sha, peeled, label, timestamp = line.split("\0")
+            # En una tag anotada el commit es el objeto al que apunta
+            sha = peeled or sha
+            commits.append({
+                "commit": sha,
+                "label": label or sha[:12],
+                "date": datetime.datetime.fromtimestamp(int(timestamp)).isoformat(),
+            })
+
+        every = max(every or 1, 1)
+        last = len(commits) - 1
+        commits = [c for i, c in enumerate(commits) if (last - i) % every == 0]
+        if limit:
+            commits = commits[-limit:]
+        return commits
+
+    def get_head_commit(self, repo_path: Path):
+        """
+        SHA del commit actual (HEAD) de un repo local, o None si no se puede leer.
+        """
+        return self.resolve_ref(repo_path)
+
+    def open_tree(self, repo_path: Path, commit: str, repo_url: str, ref: Optional[str] = None):
+        """
+        Fuente de archivos (repo.sources.GitTreeSource) que lee el árbol de
+        'commit' directamente del mirror, sin crear un worktree en disco.
+        El nombre lleva la ref pedida (ej. "repo@v1.2") para distinguirla en el historial.
+        """
+        from .sources import GitTreeSource
+        return GitTreeSource(repo_path, commit, self.display_name(repo_url, ref))
+
+    def display_name(self, repo_url: str, ref: Optional[str] = None) -> str:
+        name = self._extract_repo_name(repo_url)
+        return f"{name}@{ref}" if ref else name
 
     def remove_repo(self, path: Path):
         """
@@ -59,18 +284,60 @@ class RepoManager:
             name = name[:-4]
         return name
 
-    def _clone_repo(self, url: str, destination: Path):
-        print(f"[RepoManager] Clonando {url} en {destination}...")
+    def _cache_key(self, url: str) -> str:
+        """
+        Nombre del mirror y del lock de un remoto: "<nombre>-<hash corto>", con el
+        hash de la URL normalizada (host/propietario/nombre), para que dos repos
+        con el mismo nombre no se pisen y las variantes de una misma URL
+        (https, ssh, ".git", "/" final) compartan mirror.
+        """
+        return f"{self._extract_repo_name(url)}-{hashlib.sha1(self._normalize_url(url).encode()).hexdigest()[:12]}"
+
+    @staticmethod
+    def _normalize_url(url: str) -> str:
+        url = url.strip().rstrip("/")
+        if url.endswith(".git"):
+            url = url[:-4]
+        if "://" in url:
+            parts = urlsplit(url)
+            # Sin esquema, usuario ni puerto: https://x/a/b y ssh://git@x/a/b son el mismo remoto
+            if parts.scheme != "file":
+                return f"{(parts.hostname or '').lower()}/{parts.path.strip('/')}"
+            url = parts.path
+        elif ":" in url.split("/")[0] and not os.path.isabs(url) and len(url.split(":")[0]) > 1:
+            # Sintaxis scp de git: git@github.com:alice/utils
+            host, _, path = url.partition(":")
+            return f"{host.rpartition('@')[2].lower()}/{path.strip('/')}"
+        # Repo local: la ruta absoluta
+        return str(Path(url).expanduser().resolve())
+
+    def _clone_repo(self, url: str, destination: Path, deadline: Optional[Deadline] = None):
+        print(f"[RepoManager] Clonando (mirror) {url} en {destination}...")
         try:
-            # Aseguramos que la carpeta padre existe
+            # Aseguramos que la carpeta de caché (y la padre) existen
+            self.config.ensure_directories()
             destination.parent.mkdir(parents=True, exist_ok=True)
             
-            subprocess.run(
-                ["git", "clone", url, str(destination)],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
+            # Bare y no --mirror: --mirror copia refs/* (refs/pull/*, refs/merge-requests/*...)
+            # y las sigue trayendo en cada fetch. Solo interesan ramas y tags; un commit
+            # suelto se pide aparte (fetch con 'ref')
+            commands = [["git", "clone", "--bare", "--quiet", url, str(destination)]]
+            for position, refspec in enumerate(self.FETCH_REFSPECS):
+                commands.append(["git", "-C", str(destination), "config",
+                                 "--replace-all" if position == 0 else "--add",
+                                 "remote.origin.fetch", refspec])
+            for command in commands:
+                subprocess.run(
+                    command,
+                    check=True,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    # Un clon que no termina a tiempo se mata y se descarta
+                    timeout=deadline.remaining() if deadline is not None else None
+                )
+        except subprocess.TimeoutExpired:
+            self.remove_repo(destination)
+            raise DeadlineExceeded("clone")
         except subprocess.CalledProcessError as e:
             error_msg = e.stderr.decode().strip()
             # Si falla, limpiamos para no dejar carpetas zombies
@@ -0,0 +1,388 @@
+import hashlib
+import subprocess
+import tarfile
+import threading
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from deadline import Deadline, DeadlineExceeded
+
+# Extensiones de archivo que se analizan sin extraer
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+ZIP_SUFFIXES = (".zip", ".whl")
+
+# Carpetas que nunca se analizan (entornos virtuales y bytecode)
+IGNORED_PARTS = {".venv", "__pycache__"}
+
+def _ignored(parts) -> bool:
+    return any(part in IGNORED_PARTS for part in parts)
+
+
+class SourceFile:
+    """
+    Un archivo .py a analizar, venga de un directorio o de un archivo comprimido.
+    'path' es la ruta relativa que aparece en el informe; el contenido se lee bajo demanda.
+    """
+
+    def __init__(self, path: str, size: Union[int, Callable[[], int]], loader: Callable[[], bytes],
+                 disk_path: Optional[Path] = None, sha: Optional[str] = None):
+        self.path = path
+        self.name = PurePosixPath(path.replace("\\", "/")).name
+        # En disco el tamaño (stat) solo se consulta si alguien lo pide (muestreo)
+        self._size = size
+        # Ruta real en disco (solo en directorios)
+        self.disk_path = disk_path
+        # sha del blob si ya se conoce (árbol git); si no, se calcula al leer
+        self.sha = sha
+        self._loader = loader
+
+    @property
+    def size(self) -> int:
+        return self._size() if callable(self._size) else self._size
+
+    def read_bytes(self) -> bytes:
+        return self._loader()
+
+    def read_text(self) -> str:
+        return self.read_bytes().decode("utf-8", errors="ignore")
+
+
+class DirectorySource:
+    """
+    Código en un directorio local (un clon de repo_cache o un checkout de CI).
+    """
+    random_access = True
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.name = self.root.name
+        # Identidad del repositorio en la BD (la misma ruta escrita de otra forma es el mismo)
+        self.location = str(self.root.resolve())
+
+    def list_files(self, deadline: Optional[Deadline] = None) -> List[SourceFile]:
+        """
+        Archivos .py en orden determinista.
+
+        Raises:
+            DeadlineExceeded: si el tiempo se agota durante la búsqueda.
+        """
+        paths = []
+        for i, file_path in enumerate(self.root.rglob("*.py")):
+            # Comprobar el reloj en cada entrada sería caro en repos enormes
+            if deadline is not None and i % 256 == 0:
+                deadline.check("discovery")
+            if _ignored(file_path.relative_to(self.root).parts):
+                continue
+            paths.append(file_path)
+        return [self._file(p) for p in sorted(paths)]
+
+    def iter_files(self, deadline: Optional[Deadline] = None) -> Iterator[SourceFile]:
+        return iter(self.list_files(deadline))
+
+    def get(self, path: str) -> SourceFile:
+        return self._file(self.root / path)
+
+    def digest(self) -> str:
+        """
+        Huella barata del contenido: rutas, tamaños y fechas de los .py.
+        """
+        h = hashlib.sha256()
+        for source_file in self.list_files():
+            stat = source_file.disk_path.stat()
+            h.update(f"{source_file.path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+        return "dir-sha256:" + h.hexdigest()
+
+    def size_hint(self) -> Optional[int]:
+        """
+        Tamaño estimado para el planificador (recorrer el árbol costaría lo
+        mismo que la búsqueda de archivos, así que no se estima).
+        """
+        return None
+
+    def close(self) -> None:
+        pass
+
+    def _file(self, file_path: Path) -> SourceFile:
+        def size() -> int:
+            try:
+                return file_path.stat().st_size
+            except OSError:
+                return 0
+        return SourceFile(str(file_path.relative_to(self.root)), size,
+                          file_path.read_bytes, disk_path=file_path)
+
+
+class ArchiveSource:
+    """
+    Base de las fuentes comprimidas: el nombre y la clave de caché salen del archivo.
+    """
+
+    def __init__(self, archive: Path):
+        self.archive = Path(archive)
+        self.name = _strip_archive_suffix(self.archive.name)
+        self.location = str(self.archive.resolve())
+
+    def digest(self) -> str:
+        """
+        SHA-256 del archivo comprimido (leído por bloques).
+        """
+        h = hashlib.sha256()
+        with self.archive.open("rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        return "sha256:" + h.hexdigest()
+
+    def size_hint(self) -> Optional[int]:
+        """
+        Bytes del archivo comprimido (tamaño estimado para el planificador).
+        """
+        return self.archive.stat().st_size
+
+    def close(self) -> None:
+        pass
+
+
+class ZipSource(ArchiveSource):
+    """
+    Archivo .zip (o .whl): acceso aleatorio a cada miembro, sin extraer a disco.
+    El zip se abre una vez (el directorio central se lee una sola vez) hasta close().
+    """
+    random_access = True
+
+    def __init__(self, archive: Path):
+        super().__init__(archive)
+        self._zip: Optional[zipfile.ZipFile] = None
+
+    @property
+    def zip(self) -> zipfile.ZipFile:
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.archive)
+        return self._zip
+
+    def list_files(self, deadline: Optional[Deadline] = None) -> List[SourceFile]:
+        infos = [
+            info for info in self.zip.infolist()
+            if not info.is_dir() and info.filename.endswith(".py")
+            and not _ignored(PurePosixPath(info.filename).parts)
+        ]
+        if deadline is not None:
+            deadline.check("discovery")
+        infos.sort(key=lambda info: PurePosixPath(info.filename).parts)
+        return [self._file(info.filename, info.file_size) for info in infos]
+
+    def iter_files(self, deadline: Optional[Deadline] = None) -> Iterator[SourceFile]:
+        return iter(self.list_files(deadline))
+
+    def get(self, path: str) -> SourceFile:
+        return self._file(path, self.zip.getinfo(path).file_size)
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def _file(self, name: str, size: int) -> SourceFile:
+        return SourceFile(name, size, lambda: self.zip.read(name))
+
+
+class TarSource(ArchiveSource):
+    """
+    Archivo tar (comprimido o no) leído como flujo: una sola pasada, sin extraer
+    a disco. Cada archivo se debe leer antes de pedir el siguiente, y no hay
+    acceso aleatorio (ni muestreo ni recálculo parcial).
+    """
+    random_access = False
+
+    def iter_files(self, deadline: Optional[Deadline] = None) -> Iterator[SourceFile]:
+        # "r|*": modo flujo, detecta la compresión y nunca retrocede
+        with tarfile.open(self.archive, mode="r|*") as tar:
+            for member in tar:
+                if (not member.isfile() or not member.name.endswith(".py")
+                        or _ignored(PurePosixPath(member.name).parts)):
+                    continue
+                # El contenido solo es legible mientras el flujo está en este miembro
+                fileobj = tar.extractfile(member)
+                yield SourceFile(member.name, member.size, _once(fileobj))
+
+    def list_files(self, deadline: Optional[Deadline] = None) -> List[SourceFile]:
+        raise ValueError("Un archivo tar se lee en una sola pasada: no admite acceso aleatorio")
+
+    def get(self, path: str) -> SourceFile:
+        raise ValueError("Un archivo tar se lee en una sola pasada: no admite acceso aleatorio")
+
+
+class GitBlobReader:
+    """
+    Lee blobs de un repo git a través de un único 'git cat-file --batch'
+    (un proceso para todos los archivos en vez de uno por archivo).
+    """
+
+    def __init__(self, git_dir: Path):
+        self.git_dir = Path(git_dir)
+        self._batch: Optional[subprocess.Popen] = None
+        # El proceso cat-file atiende una petición cada vez
+        self._lock = threading.Lock()
+
+    def read(self, sha: str) -> bytes:
+        with self._lock:
+            if self._batch is None:
+                self._batch = subprocess.Popen(
+                    ["git", "-C", str(self.git_dir), "cat-file", "--batch"],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+                )
+            self._batch.stdin.write(sha.encode() + b"\n")
+            self._batch.stdin.flush()
+            # Respuesta: "<sha> <tipo> <tamaño>\n<contenido>\n" (o "<sha> missing\n")
+            header = self._batch.stdout.readline().split()
+            if len(header) < 3:
+                return b""
+            data = self._batch.stdout.read(int(header[2]))
+            self._batch.stdout.read(1)
+            return data
+
+    def close(self) -> None:
+        with self._lock:
+            if self._batch is not None:
+                self._batch.stdin.close()
+                try:
+                    self._batch.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self._batch.kill()
+                self._batch.stdout.close()
+                self._batch = None
+
+
+class GitTreeSource:
+    """
+    Árbol de un commit leído directamente del almacén de objetos de un repo git
+    (el mirror bare de repo_cache), sin worktree en disco: 'git ls-tree' da las
+    rutas y tamaños, y un GitBlobReader sirve el contenido de cada blob.
+    Así varias ramas, tags o commits del mismo repo comparten objetos y descargas.
+    """
+    random_access = True
+
+    def __init__(self, git_dir: Path, commit: str, name: str, reader: Optional[GitBlobReader] = None):
+        self.git_dir = Path(git_dir)
+        self.commit = commit
+        self.name = name
+        # ruta -> (sha del blob, tamaño); se lee una vez
+        self._entries: Optional[Dict[str, Tuple[str, int]]] = None
+        # Un lector compartido (ej. barrido del historial) lo cierra su dueño
+        self._owns_reader = reader is None
+        self.reader = reader or GitBlobReader(git_dir)
+
+    def list_files(self, deadline: Optional[Deadline] = None) -> List[SourceFile]:
+        """
+        Archivos .py del commit en orden determinista.
+
+        Raises:
+            DeadlineExceeded: si el tiempo se agota durante la búsqueda.
+        """
+        entries = self.entries(deadline)
+        paths = sorted(entries, key=lambda p: PurePosixPath(p).parts)
+        return [self._file(path, *entries[path]) for path in paths]
+
+    def iter_files(self, deadline: Optional[Deadline] = None) -> Iterator[SourceFile]:
+        return iter(self.list_files(deadline))
+
+    def get(self, path: str) -> SourceFile:
+        return self._file(path, *self.entries()[path.replace("\\", "/")])
+
+    def digest(self) -> str:
+        return self.commit
+
+    def close(self) -> None:
+        if self._owns_reader:
+            self.reader.close()
+
+    def entries(self, deadline: Optional[Deadline] = None) -> Dict[str, Tuple[str, int]]:
+        """
+        {ruta: (sha del blob, tamaño)} de los .py del commit (sin leer su contenido).
+        """
+        if self._entries is not None:
+            return self._entries
+        try:
+            out = subprocess.run(
+                ["git", "-C", str(self.git_dir), "ls-tree", "-r", "-l", "-z", self.commit],
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=deadline.remaining() if deadline is not None else None
+            )
+        except subprocess.TimeoutExpired:
+            raise DeadlineExceeded("discovery")
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Error leyendo el árbol de {self.commit}: {e.stderr.decode().strip()}")
+
+        entries = {}
+        # Cada registro: "<modo> <tipo> <sha> <tamaño>\t<ruta>" terminado en NUL
+        for record in out.stdout.split(b"\0"):
+            if not record:
+                continue
+            meta, raw_path = record.split(b"\t", 1)
+            _, kind, sha, size = meta.split()
+            path = raw_path.decode("utf-8", errors="replace")
+            # Los submódulos (commit) y enlaces simbólicos no son código del repo
+            if kind != b"blob" or not path.endswith(".py") or meta.startswith(b"120000"):
+                continue
+            if _ignored(PurePosixPath(path).parts):
+                continue
+            entries[path] = (sha.decode(), int(size))
+        self._entries = entries
+        return entries
+
+    def _file(self, path: str, sha: str, size: int) -> SourceFile:
+        return SourceFile(path, size, lambda: self.reader.read(sha), sha=sha)
+
+
+def _once(fileobj) -> Callable[[], bytes]:
+    """
+    Cargador que lee el miembro del tar la primera vez y guarda el resultado.
+    """
+    cache: List[bytes] = []
+
+    def load() -> bytes:
+        if not cache:
+            cache.append(fileobj.read() if fileobj is not None else b"")
+        return cache[0]
+    return load
+
+
+def _strip_archive_suffix(name: str) -> str:
+    lowered = name.lower()
+    for suffix in TAR_SUFFIXES + ZIP_SUFFIXES:
+        if lowered.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def as_source(source):
+    """
+    Acepta una fuente ya construida o la ruta de un directorio (ej. un clon de repo_cache).
+    """
+    if hasattr(source, "iter_files"):
+        return source
+    return DirectorySource(Path(source))
+
+
+def open_local_source(location: str):
+    """
+    Devuelve la fuente para una ruta local (directorio, tar o zip), o None si
+    'location' no es una ruta local (ej. una URL de git que hay que clonar).
+    Un directorio con .git se sigue tratando como repositorio git (None).
+    """
+    if "://" in location or location.startswith("git@"):
+        return None
+    path = Path(location).expanduser()
+    if path.is_dir():
+        if (path / ".git").exists():
+            return None
+        return DirectorySource(path)
+    if path.is_file():
+        lowered = path.name.lower()
+        if lowered.endswith(ZIP_SUFFIXES):
+            return ZipSource(path)
+        if lowered.endswith(TAR_SUFFIXES):
+            return TarSource(path)
+    return None
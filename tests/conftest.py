@@ -14,4 +14,63 @@ def hello(name):
 
 @pytest.fixture
 def simple_ast(simple_code):
-    return ast.parse(simple_code)
\ No newline at end of file
+    return ast.parse(simple_code)
+
+@pytest.fixture
+def spaghetti_code():
+    return """
+import os
+import sys
+import math
+
+def complex_logic(x, y, z):
+    a = x + y * z
+    b = a / 2
+    if a > 10:
+        for i in range(10):
+            while b < 100:
+                if i % 2 == 0:
+                    print(i)
+                b += 1
+    elif a < 5:
+        print("Low")
+    else:
+        print("Medium")
+    return b
+"""
+
+@pytest.fixture
+def isolated_config(tmp_path, monkeypatch):
+    """
+    Redirige la caché de repos, la BD y los perfiles de la configuración global a tmp_path
+    para que los tests no toquen los ficheros reales del proyecto.
+    """
+    from config import ConfigSingleton
+    config = ConfigSingleton.get_instance()
+    monkeypatch.setattr(config, "repo_cache_dir", tmp_path / "repo_cache")
+    monkeypatch.setattr(config, "db_path", tmp_path / "analysis_test.db")
+    monkeypatch.setattr(config, "profiles_dir", tmp_path / "profiles")
+    config.repo_cache_dir.mkdir(exist_ok=True)
+    return config
+
+def _git(cwd, *args):
+    import subprocess
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+
+@pytest.fixture
+def local_git_repo(tmp_path, spaghetti_code):
+    """
+    Repositorio git local (clonable por ruta) con un par de ficheros .py,
+    para probar el flujo completo sin red.
+    """
+    origin = tmp_path / "origin" / "sample"
+    (origin / "pkg").mkdir(parents=True)
+    (origin / "main.py").write_text(spaghetti_code * 2)
+    (origin / "pkg" / "util.py").write_text("import os\n\ndef f(x):\n    return x + 1\n")
+    _git(origin, "init", "-q")
+    _git(origin, "add", ".")
+    _git(origin, "commit", "-q", "-m", "inicial")
+    return origin
@@ -0,0 +1,62 @@
+import pytest
+from metrics.aggregation import RepoStatsAggregator
+from metrics.facade import MetricsFacade
+from repo.db_manager import DBManager
+
+
+def _file(path, mi, loc, dup, functions):
+    return {"path": path, "maintainability": mi, "loc": loc,
+            "duplication": dup, "functions": functions}
+
+
+def test_percentiles_and_histogram():
+    agg = RepoStatsAggregator(bins=4)
+    for i in range(1, 101):
+        agg.add_file(_file(f"f{i}.py", float(i), i, 0.0, {}))
+
+    files = agg.result()["distributions"]["files"]
+    assert files["loc"]["count"] == 100
+    assert files["loc"]["p50"] == pytest.approx(50.5)
+    assert files["loc"]["p99"] == pytest.approx(99.01)
+    # MI usa el rango fijo 0-100: 4 bins de 25 puntos
+    assert files["maintainability"]["histogram"]["edges"] == [0.0, 25.0, 50.0, 75.0, 100.0]
+    assert sum(files["maintainability"]["histogram"]["counts"]) == 100
+
+
+def test_hotspots_bounded_heap():
+    agg = RepoStatsAggregator(top_n=3)
+    for i in range(10):
+        funcs = {f"fn{i}": {"cc": i, "max_nesting": 0, "loc": 5, "params": 0}}
+        agg.add_file(_file(f"m{i}.py", 50.0, 10, 0.0, funcs))
+
+    hotspots = agg.result()["hotspots"]
+    assert [h["cc"] for h in hotspots] == [9, 8, 7]
+    assert hotspots[0]["function"] == "fn9"
+    assert hotspots[0]["path"] == "m9.py"
+
+
+def test_empty_repo_distributions():
+    result = RepoStatsAggregator().result()
+    assert result["distributions"]["functions"]["cc"] == {"count": 0}
+    assert result["hotspots"] == []
+
+
+def test_summary_stored_without_files(tmp_path, isolated_config, simple_code, spaghetti_code):
+    repo = tmp_path / "demo"
+    repo.mkdir()
+    (repo / "clean.py").write_text(simple_code, encoding="utf-8")
+    (repo / "dirty.py").write_text(spaghetti_code, encoding="utf-8")
+
+    result = MetricsFacade().compute_all(repo)
+    summary = result["summary"]
+    assert summary["distributions"]["files"]["loc"]["count"] == 2
+    assert summary["hotspots"][0]["function"] == "complex_logic"
+
+    result["repo"] = "https://example.com/demo.git"
+    db = DBManager()
+    db.save_analysis(result)
+
+    stored = db.get_latest_summary("https://example.com/demo.git")
+    assert stored["summary"] == summary
+    assert "files" not in stored
+    assert db.list_analyses()[0]["repo_name"] == "demo"
@@ -0,0 +1,85 @@
+import ast
+
+from metrics.clones import CloneIndex, CloneStrategy
+from metrics.facade import MetricsFacade
+
+ORIGINAL = """
+def total_price(items, tax):
+    total = 0
+    for item in items:
+        if item.price > 0:
+            total += item.price * item.quantity
+        else:
+            print("precio no valido")
+    return total * (1 + tax)
+"""
+
+# Misma estructura con identificadores y literales distintos
+RENAMED = """
+def suma_pedido(lineas, iva):
+    acc = 0
+    for linea in lineas:
+        if linea.coste > 10:
+            acc += linea.coste * linea.unidades
+        else:
+            print("otro mensaje")
+    return acc * (2 + iva)
+"""
+
+DIFFERENT = """
+def total_price(items, tax):
+    total = 0
+    while items:
+        total += items.pop().price
+    return total
+"""
+
+
+def fingerprints(code, min_nodes=5):
+    return CloneStrategy().compute(ast.parse(code), min_nodes=min_nodes)
+
+
+def test_renamed_copy_has_same_hash():
+    original = {f[2]: f[0] for f in fingerprints(ORIGINAL)}
+    renamed = {f[2]: f[0] for f in fingerprints(RENAMED)}
+    different = {f[2]: f[0] for f in fingerprints(DIFFERENT)}
+
+    assert original["function"] == renamed["function"]
+    assert original["function"] != different["function"]
+
+
+def test_small_fragments_ignored():
+    assert fingerprints(DIFFERENT, min_nodes=1000) == []
+    assert CloneStrategy().compute(None) == []
+
+
+def test_index_reports_maximal_classes_only():
+    index = CloneIndex(top_n=5)
+    index.add("a.py", fingerprints(ORIGINAL))
+    index.add("b.py", fingerprints(RENAMED))
+    index.add("c.py", fingerprints(DIFFERENT))
+
+    summary, per_file = index.result()
+
+    # La función clonada contiene un 'for' y un 'if' también clonados: solo cuenta la función
+    assert summary["classes"] == 1
+    assert summary["fragments"] == 2
+    clone = summary["top"][0]
+    assert clone["kind"] == "function"
+    assert clone["count"] == 2
+    assert [loc["path"] for loc in clone["locations"]] == ["a.py", "b.py"]
+    assert per_file == {"a.py": 1, "b.py": 1}
+
+
+def test_facade_reports_clones(tmp_path, isolated_config, monkeypatch):
+    monkeypatch.setattr(isolated_config, "clone_min_nodes", 5)
+    repo = tmp_path / "demo"
+    repo.mkdir()
+    (repo / "a.py").write_text(ORIGINAL)
+    (repo / "b.py").write_text(RENAMED)
+    (repo / "c.py").write_text(DIFFERENT)
+
+    result = MetricsFacade().compute_all(repo, options={"metrics": ["clones"]})
+
+    assert result["summary"]["clones"]["classes"] == 1
+    assert {f["path"]: f["clones"] for f in result["files"]} == {"a.py": 1, "b.py": 1, "c.py": 0}
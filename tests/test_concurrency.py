@@ -0,0 +1,97 @@
+import threading
+
+from config import ConfigSingleton
+from repo.db_manager import DBManager
+from repo.locks import FileLock, LockTimeout
+from repo.repo_manager import RepoManager
+
+
+def test_config_singleton_is_thread_safe(monkeypatch):
+    monkeypatch.setattr(ConfigSingleton, "_instance", None)
+    seen = []
+    barrier = threading.Barrier(8)
+
+    def grab():
+        barrier.wait()
+        seen.append(ConfigSingleton.get_instance())
+
+    threads = [threading.Thread(target=grab) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(c) for c in seen}) == 1
+
+
+def test_file_lock_is_exclusive_and_reentrant(tmp_path):
+    lock_path = tmp_path / "repo.lock"
+    holder = FileLock(lock_path)
+    with holder:
+        # Reentrante en el mismo hilo
+        with FileLock(lock_path):
+            pass
+
+        # Otro hilo no puede adquirirlo mientras lo tenemos
+        errors = []
+
+        def contender():
+            try:
+                FileLock(lock_path, timeout=0.1).acquire()
+            except LockTimeout as e:
+                errors.append(e)
+
+        t = threading.Thread(target=contender)
+        t.start()
+        t.join()
+        assert len(errors) == 1
+
+    # Liberado: ahora sí se puede adquirir
+    with FileLock(lock_path, timeout=0.1):
+        pass
+
+
+def test_repo_lock_path_per_repo(isolated_config):
+    rm = RepoManager()
+    a = rm.repo_lock("https://github.com/user/alpha.git")
+    b = rm.repo_lock("https://github.com/user/beta")
+    assert a.path.name.startswith("alpha-") and a.path.name.endswith(".lock")
+    assert b.path.name.startswith("beta-")
+
+
+def test_same_name_remotes_get_their_own_mirror(isolated_config):
+    rm = RepoManager()
+    alice = rm.mirror_path("https://github.com/alice/utils")
+    assert alice != rm.mirror_path("https://github.com/bob/utils")
+    assert rm.repo_lock("https://github.com/alice/utils").path != rm.repo_lock("https://github.com/bob/utils").path
+    # Distintas formas de escribir el mismo remoto comparten mirror
+    for same in ("https://github.com/alice/utils.git/", "git@github.com:alice/utils.git",
+                 "ssh://git@GitHub.com/alice/utils"):
+        assert rm.mirror_path(same) == alice
+
+
+def test_concurrent_saves_keep_delta_chain_consistent(isolated_config):
+    db = DBManager()
+    repo = "https://example.com/demo.git"
+
+    def save(i):
+        files = [{"path": f"f{j}.py", "loc": i} for j in range(i % 3 + 1)]
+        db.save_analysis({"repo": repo, "repo_name": "demo",
+                          "analyzed_at": f"2026-01-01T00:00:{i:02d}",
+                          "summary": {}, "files": files})
+
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(db.get_summary_trend(repo)) == 12
+    latest = db.get_latest_analysis(repo)
+    i = int(latest["analyzed_at"][-2:])
+    assert [f["path"] for f in latest["files"]] == [f"f{j}.py" for j in range(i % 3 + 1)]
+    assert all(f["loc"] == i for f in latest["files"])
+
+    # Cada escritura cuenta su espera por el lock (lo lee bench/loadtest.py)
+    stats = db.contention_stats()
+    assert stats["writes"] >= 12
+    assert stats["write_wait_ms_max"] <= stats["write_wait_ms_total"]
@@ -0,0 +1,167 @@
+import sqlite3
+from repo.db_manager import DBManager
+
+REPO = "https://example.com/demo.git"
+
+
+def _report(stamp, files):
+    return {
+        "repo": REPO,
+        "repo_name": "demo",
+        "analyzed_at": stamp,
+        "summary": {"num_files": len(files), "total_lines": sum(f["loc"] for f in files)},
+        "files": files,
+    }
+
+
+def _f(path, loc):
+    return {"path": path, "name": path, "loc": loc, "functions": {}}
+
+
+def test_delta_encoding_stores_only_changes(isolated_config):
+    db = DBManager()
+    db.save_analysis(_report("2026-01-01T00:00:00", [_f("a.py", 10), _f("b.py", 20), _f("c.py", 5)]))
+    second = db.save_analysis(_report("2026-01-02T00:00:00", [_f("a.py", 10), _f("b.py", 25), _f("d.py", 1)]))
+
+    with sqlite3.connect(isolated_config.db_path) as conn:
+        kind, = conn.execute("SELECT kind FROM analyses WHERE id = ?", (second,)).fetchone()
+        rows = conn.execute(
+            "SELECT path, deleted FROM analysis_files WHERE analysis_id = ? ORDER BY path", (second,)
+        ).fetchall()
+
+    assert kind == "delta"
+    # a.py no cambió: no se guarda; c.py se marca como borrado
+    assert rows == [("b.py", 0), ("c.py", 1), ("d.py", 0)]
+
+    latest = db.get_latest_analysis(REPO)
+    assert [(f["path"], f["loc"]) for f in latest["files"]] == [("a.py", 10), ("b.py", 25), ("d.py", 1)]
+
+
+def test_keyframe_interval(isolated_config, monkeypatch):
+    monkeypatch.setattr(isolated_config, "trend_keyframe_interval", 2)
+    db = DBManager()
+    ids = [db.save_analysis(_report(f"2026-01-0{i}T00:00:00", [_f("a.py", i)])) for i in range(1, 4)]
+
+    with sqlite3.connect(isolated_config.db_path) as conn:
+        kinds = [conn.execute("SELECT kind FROM analyses WHERE id = ?", (i,)).fetchone()[0] for i in ids]
+    assert kinds == ["keyframe", "delta", "keyframe"]
+    assert db.get_latest_analysis(REPO)["files"][0]["loc"] == 3
+
+
+def test_keyframe_marks_files_deleted_since_previous_analysis(isolated_config, monkeypatch):
+    monkeypatch.setattr(isolated_config, "trend_keyframe_interval", 2)
+    db = DBManager()
+    db.save_analysis(_report("2026-01-01T00:00:00", [_f("a.py", 1), _f("b.py", 1)]))
+    db.save_analysis(_report("2026-01-02T00:00:00", [_f("a.py", 2), _f("b.py", 1)]))
+    # Tercero: keyframe, y b.py ya no existe
+    third = db.save_analysis(_report("2026-01-03T00:00:00", [_f("a.py", 3)]))
+
+    with sqlite3.connect(isolated_config.db_path) as conn:
+        rows = conn.execute(
+            "SELECT path, deleted FROM analysis_files WHERE analysis_id = ? ORDER BY path", (third,)
+        ).fetchall()
+    assert rows == [("a.py", 0), ("b.py", 1)]
+    assert [p["metrics"] and p["metrics"]["loc"] for p in db.get_file_trend(REPO, "b.py")] == [1, None]
+    assert [f["path"] for f in db.get_analysis(third)["files"]] == ["a.py"]
+    assert db.get_analysis_file(third, "b.py") is None
+
+    # Lo mismo con un keyframe escrito en streaming
+    stream = db.begin_stream(REPO, None, None, None)
+    stream.write(_f("c.py", 1))
+    stream.finish(_report("2026-01-04T00:00:00", []))
+    assert db.get_file_trend(REPO, "a.py")[-1]["metrics"] is None
+
+
+def test_trends(isolated_config):
+    db = DBManager()
+    db.save_analysis(_report("2026-01-01T00:00:00", [_f("a.py", 10), _f("b.py", 1)]))
+    db.save_analysis(_report("2026-01-02T00:00:00", [_f("a.py", 10), _f("b.py", 2)]))
+    db.save_analysis(_report("2026-01-03T00:00:00", [_f("a.py", 12)]))
+
+    summary = db.get_summary_trend(REPO)
+    assert [p["summary"]["total_lines"] for p in summary] == [11, 12, 12]
+
+    a_points = db.get_file_trend(REPO, "a.py")
+    assert [p["metrics"]["loc"] for p in a_points] == [10, 12]
+
+    b_points = db.get_file_trend(REPO, "b.py")
+    assert [p["metrics"] and p["metrics"]["loc"] for p in b_points] == [1, 2, None]
+
+
+def test_legacy_rows_still_readable(isolated_config):
+    db = DBManager()
+    db.init_db()
+    legacy = '{"repo": "%s", "repo_name": "demo", "summary": {"num_files": 1}, "files": [{"path": "x.py"}]}' % REPO
+    with sqlite3.connect(isolated_config.db_path) as conn:
+        conn.execute(
+            "INSERT INTO analyses (repo_url, analyzed_at, result_json) VALUES (?, ?, ?)",
+            (REPO, "2025-01-01T00:00:00", legacy)
+        )
+
+    assert db.get_latest_analysis(REPO)["files"] == [{"path": "x.py"}]
+    # El siguiente análisis no puede ser delta de una fila antigua
+    new_id = db.save_analysis(_report("2026-01-01T00:00:00", [_f("x.py", 3)]))
+    assert db.get_latest_analysis(REPO)["files"][0]["loc"] == 3
+    assert new_id is not None
+
+
+def test_stream_is_invisible_until_finished(isolated_config, monkeypatch):
+    from repo.db_manager import AnalysisStream
+    monkeypatch.setattr(AnalysisStream, "BATCH_SIZE", 2)
+    db = DBManager()
+    stream = db.begin_stream(REPO, None, None, None)
+    for f in [_f("b.py", 2), _f("a.py", 1), _f("c.py", 3)]:
+        stream.write(f)
+
+    # Mientras escribe, el análisis no es caché ni aparece en el historial
+    assert db.get_latest_analysis(REPO) is None
+    assert db.list_analyses() == []
+
+    stream.update_files("loc", {"c.py": 30})
+    analysis_id = stream.finish(_report("2026-01-01T00:00:00", []))
+
+    report = db.get_analysis(analysis_id)
+    assert [(f["path"], f["loc"]) for f in report["files"]] == [("a.py", 1), ("b.py", 2), ("c.py", 30)]
+    assert db.get_latest_analysis(REPO)["id"] == analysis_id
+
+    # El siguiente análisis normal se codifica como delta del keyframe en streaming
+    second = db.save_analysis(_report("2026-01-02T00:00:00", [_f("a.py", 1), _f("b.py", 2), _f("c.py", 31)]))
+    with sqlite3.connect(isolated_config.db_path) as conn:
+        rows = conn.execute("SELECT path FROM analysis_files WHERE analysis_id = ?", (second,)).fetchall()
+    assert rows == [("c.py",)]
+
+
+def test_aborted_stream_leaves_nothing(isolated_config):
+    db = DBManager()
+    stream = db.begin_stream(REPO, None, None, None)
+    stream.write(_f("a.py", 1))
+    stream.flush()
+    stream.abort()
+
+    with sqlite3.connect(isolated_config.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM analysis_files").fetchone()[0] == 0
+
+
+def test_stale_running_streams_are_purged(isolated_config, monkeypatch):
+    monkeypatch.setattr(isolated_config, "analysis_deadline", 60)
+    db = DBManager()
+    # Worker muerto a mitad de stream: la fila 'running' y sus archivos se quedan
+    dead = db.begin_stream(REPO, None, None, None)
+    dead.write(_f("a.py", 1))
+    dead.flush()
+    alive = db.begin_stream(REPO, None, None, None)
+    alive.write(_f("b.py", 1))
+    alive.flush()
+    with sqlite3.connect(isolated_config.db_path) as conn:
+        conn.execute("UPDATE analyses SET analyzed_at = datetime('now', '-2 hours') WHERE id = ?",
+                     (dead.analysis_id,))
+
+    db.begin_stream(REPO, None, None, None)
+    with sqlite3.connect(isolated_config.db_path) as conn:
+        ids = {row[0] for row in conn.execute("SELECT id FROM analyses")}
+        orphans = conn.execute("SELECT COUNT(*) FROM analysis_files WHERE analysis_id = ?",
+                               (dead.analysis_id,)).fetchone()[0]
+    assert dead.analysis_id not in ids and orphans == 0
+    # El stream reciente (otro worker vivo) no se toca
+    assert alive.analysis_id in ids
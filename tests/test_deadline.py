@@ -0,0 +1,107 @@
+import pytest
+
+from deadline import Deadline, DeadlineExceeded
+from metrics.facade import MetricsFacade
+from proxy import proxy_subject
+from proxy.proxy_subject import ProxySubject
+from repo.repo_manager import RepoManager
+
+
+class FileBudget(Deadline):
+    """
+    Deadline que se agota tras calcular 'files' archivos (determinista).
+    """
+
+    def __init__(self, files):
+        super().__init__(60)
+        self.left = files
+
+    def check(self, stage):
+        pass
+
+    def expired(self):
+        self.left -= 1
+        return self.left < 0
+
+
+@pytest.fixture
+def three_files(tmp_path, simple_code):
+    repo = tmp_path / "demo"
+    repo.mkdir()
+    for name in ("a.py", "b.py", "c.py"):
+        (repo / name).write_text(simple_code)
+    return repo
+
+
+def test_partial_report_lists_covered_files(three_files, isolated_config):
+    result = MetricsFacade().compute_all(three_files, {"metrics": ["lines"]}, deadline=FileBudget(1))
+
+    assert result["partial"] is True
+    assert [f["path"] for f in result["files"]] == ["a.py"]
+    assert result["coverage"]["stage"] == "metrics"
+    assert result["coverage"]["files_total"] == 3
+
+
+def test_resume_skips_finished_files(three_files, isolated_config, monkeypatch):
+    facade = MetricsFacade()
+    options = {"metrics": ["lines", "clones"]}
+    partial = facade.compute_all(three_files, options, deadline=FileBudget(2))
+
+    computed = []
+    original = facade.compute_file
+    def spy(source_file, selected, strategy_options, *args, **kwargs):
+        computed.append((source_file.name, tuple(selected)))
+        return original(source_file, selected, strategy_options, *args, **kwargs)
+    monkeypatch.setattr(facade, "compute_file", spy)
+
+    result = facade.compute_all(three_files, options, resume_from=partial)
+
+    assert "partial" not in result
+    assert len(result["files"]) == 3
+    # Los archivos ya calculados solo repiten la métrica de todo el repo (clones)
+    assert computed == [("a.py", ("clones",)), ("b.py", ("clones",)), ("c.py", ("lines", "clones"))]
+
+
+def test_discovery_respects_deadline(three_files, isolated_config):
+    result = MetricsFacade().compute_all(three_files, deadline=Deadline(1e-9))
+
+    assert result["partial"] is True
+    assert result["coverage"]["stage"] == "discovery"
+    assert result["files"] == []
+
+
+def test_clone_is_killed_and_cleaned_up(isolated_config, local_git_repo):
+    manager = RepoManager()
+    with pytest.raises(DeadlineExceeded):
+        manager.ensure_repo(str(local_git_repo), Deadline(1e-9))
+    assert manager.local_repo_path(str(local_git_repo)) is None
+
+
+def test_proxy_stores_partial_and_resumes(isolated_config, local_git_repo, monkeypatch):
+    subject = ProxySubject()
+    url = str(local_git_repo)
+
+    with monkeypatch.context() as m:
+        m.setattr(proxy_subject, "Deadline", lambda seconds: FileBudget(1))
+        partial = subject.peticion(url, metrics=["lines"])
+
+    assert partial["partial"] is True
+    assert partial["id"] is not None
+    assert len(partial["files"]) == 1
+
+    resumed = subject.peticion(url, metrics=["lines"])
+    assert resumed["resumed_from"] == partial["id"]
+    assert resumed.get("partial") is None
+    assert len(resumed["files"]) == 2
+    # Los parciales no cuentan en las tendencias
+    assert [p["id"] for p in subject.trend(url)] == [resumed["id"]]
+
+    assert subject.peticion(url, metrics=["lines"])["_from_cache"] is True
+
+
+def test_proxy_deadline_during_clone(isolated_config, local_git_repo):
+    result = ProxySubject().peticion(str(local_git_repo), options={"deadline": 1e-9})
+
+    assert result["partial"] is True
+    assert result["coverage"]["stage"] == "clone"
+    assert result["id"] is None
@@ -0,0 +1,76 @@
+import ast
+
+from metrics.dependencies import DependenciesStrategy, DependencyGraph
+from metrics.facade import MetricsFacade
+
+
+def targets(code):
+    return DependenciesStrategy().compute(ast.parse(code))
+
+
+def test_targets_keep_relative_levels():
+    code = (
+        "import os, pkg.util\n"
+        "from . import a\n"
+        "from ..core import b as c\n"
+        "from .mod import *\n"
+        "def f():\n"
+        "    from json import loads\n"
+    )
+    assert targets(code) == ["..core.b", ".a", ".mod", "json.loads", "os", "pkg.util"]
+    assert DependenciesStrategy().compute(None) == []
+
+
+def test_graph_resolves_in_repo_modules_and_finds_cycles():
+    graph = DependencyGraph(top_n=5)
+    graph.add("src/pkg/__init__.py", [])
+    graph.add("src/pkg/a.py", [".b.helper", "os"])
+    graph.add("src/pkg/b.py", ["pkg.a"])
+    graph.add("src/pkg/sub/__init__.py", [])
+    graph.add("src/pkg/sub/c.py", ["..a", "pkg.sub"])
+    graph.add("main.py", ["pkg.a.Clase", "src.pkg.sub.c", "requests"])
+
+    result = graph.result()
+    paths = result["graph"]["paths"]
+    edges = {(paths[i], paths[j]) for i, out in enumerate(result["graph"]["adjacency"]) for j in out}
+
+    # Lo externo (os, requests) se descarta; "pkg.a.Clase" cae a "pkg.a"
+    assert edges == {
+        ("src/pkg/a.py", "src/pkg/b.py"),
+        ("src/pkg/b.py", "src/pkg/a.py"),
+        ("src/pkg/sub/c.py", "src/pkg/a.py"),
+        ("src/pkg/sub/c.py", "src/pkg/sub/__init__.py"),
+        ("main.py", "src/pkg/a.py"),
+        ("main.py", "src/pkg/sub/c.py"),
+    }
+    assert result["fan_in"][0] == {"path": "src/pkg/a.py", "count": 3}
+    assert result["fan_out"][0]["path"] == "main.py"
+    assert result["cycles"] == 1
+    assert result["top_cycles"] == [{"size": 2, "paths": ["src/pkg/a.py", "src/pkg/b.py"]}]
+
+
+def test_tarjan_is_iterative_and_linear():
+    # Un ciclo enorme y una cadena colgando: sin recursión no hay RecursionError
+    n = 20000
+    adjacency = [[(i + 1) % n] for i in range(n)] + [[n + i + 1] for i in range(n - 1)] + [[0]]
+    components = DependencyGraph.strongly_connected(adjacency)
+    sizes = sorted(len(c) for c in components)
+    assert sizes[-1] == n
+    assert len(components) == n + 1
+
+
+def test_graph_in_report_and_updated_on_resume(tmp_path, isolated_config):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "pkg" / "a.py").write_text("from pkg import b\n")
+    (tmp_path / "pkg" / "b.py").write_text("import os\n")
+    facade = MetricsFacade()
+
+    first = facade.compute_all(tmp_path, {"metrics": ["dependencies"]})
+    assert first["summary"]["dependencies"]["cycles"] == 0
+
+    # Solo cambia b.py: el resto de archivos se reutiliza y el grafo se rehace entero
+    (tmp_path / "pkg" / "b.py").write_text("from . import a\n")
+    reused = dict(first, files=[f for f in first["files"] if f["path"] != "pkg/b.py"])
+    second = facade.compute_all(tmp_path, {"metrics": ["dependencies"]}, resume_from=reused)
+    assert second["summary"]["dependencies"]["cycles"] == 1
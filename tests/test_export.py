@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+
+import pytest
+
+import app as app_module
+import cli
+from proxy.proxy_subject import ProxySubject
+from repo.export import render
+from ui.mediator import UIMediator
+
+REPO = "https://example.com/demo.git"
+
+
+def _file(path, loc, cc):
+    return {"path": path, "name": path.rsplit("/", 1)[-1], "loc": loc, "maintainability": 90.0 - loc,
+            "functions": {"f": {"loc": loc, "params": 1, "cc": cc, "max_nesting": 0},
+                          "g": {"loc": 2, "params": 0, "cc": 1, "max_nesting": 0}}}
+
+
+@pytest.fixture
+def subject(isolated_config):
+    subject = ProxySubject()
+    db = subject.db_manager
+    base = {"repo": REPO, "repo_name": "demo", "metrics": ["functions", "lines"]}
+    db.save_analysis(dict(base, analyzed_at="2026-01-10T09:00:00", commit="c1",
+                          summary={"num_files": 2, "total_lines": 30},
+                          files=[_file("a.py", 10, 3), _file("b.py", 20, 12)]))
+    # Delta: cambia a.py, desaparece b.py y aparece c.py
+    db.save_analysis(dict(base, analyzed_at="2026-02-10T09:00:00", commit="c2",
+                          summary={"num_files": 2, "total_lines": 45},
+                          files=[_file("a.py", 15, 4), _file("c.py", 30, 15)]))
+    db.save_analysis({"repo": "https://example.com/otro.git", "repo_name": "otro",
+                      "analyzed_at": "2026-02-11T09:00:00", "metrics": ["lines"],
+                      "summary": {"num_files": 0}, "files": []})
+    return subject
+
+
+def test_files_follow_keyframe_and_deltas(subject):
+    rows = list(subject.export("files", repo_url=REPO))
+    assert [(r["commit"], r["path"], r["loc"]) for r in rows] == [
+        ("c1", "a.py", 10), ("c1", "b.py", 20), ("c2", "a.py", 15), ("c2", "c.py", 30),
+    ]
+    assert rows[0]["num_functions"] == 2 and rows[1]["max_cc"] == 12
+
+
+def test_filters_by_date_and_thresholds(subject):
+    analyses = list(subject.export("analyses", since="2026-02"))
+    assert [a["repo_name"] for a in analyses] == ["demo", "otro"]
+    # La fecha final es inclusiva a la precisión indicada
+    assert [a["commit"] for a in subject.export("analyses", until="2026-01")] == ["c1"]
+
+    hot = list(subject.export("functions", repo_url=REPO, where=["cc>=10"]))
+    assert [(r["commit"], r["path"], r["function"]) for r in hot] == [("c1", "b.py", "f"), ("c2", "c.py", "f")]
+
+    with pytest.raises(ValueError):
+        subject.export("functions", where=["maintainability<50"])
+    with pytest.raises(ValueError):
+        subject.export("files", where=["loc ~ 3"])
+
+
+def test_csv_and_ndjson(subject):
+    text = "".join(render(subject.export("files", repo_url=REPO), "files", "csv"))
+    table = list(csv.DictReader(io.StringIO(text)))
+    assert [r["path"] for r in table] == ["a.py", "b.py", "a.py", "c.py"]
+    assert table[0]["max_cc"] == "3"
+    assert "".join(render(iter([]), "files", "csv")).startswith("analysis_id,repo_url")
+
+    lines = "".join(render(subject.export("analyses"), "analyses", "ndjson")).splitlines()
+    assert [json.loads(line)["total_lines"] for line in lines] == [30, 45, None]
+
+
+def test_endpoint_and_cli_stream(subject, monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(app_module, "mediator", UIMediator(subject))
+    http = app_module.app.test_client()
+    resp = http.get("/export?level=functions&format=csv&where=cc>=10")
+    assert resp.status_code == 200 and resp.mimetype == "text/csv"
+    assert len(resp.get_data(as_text=True).splitlines()) == 3
+    assert http.get("/export?level=nope").status_code == 400
+
+    output = tmp_path / "files.ndjson"
+    assert cli.main(["export", "--level", "files", "--repo", REPO, "--output", str(output)]) == 0
+    assert len(output.read_text().splitlines()) == 4
+    assert cli.main(["export", "--where", "num_files>1"]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 2
@@ -0,0 +1,89 @@
+import ast
+
+from metrics import facade as facade_module
+from metrics.facade import MetricsFacade
+from metrics.fallback import python_version, scan_tokens
+from repo.db_manager import DBManager
+from repo.sources import SourceFile
+
+PY2 = '''import os, sys
+from .. import util as u
+# TODO: migrar a Python 3
+
+def main(argv, verbose=False):
+    if len(argv) > 1 and verbose:
+        for arg in argv:
+            print "arg", arg
+    elif verbose or argv:
+        print >>sys.stderr, "vacío"
+    try:
+        os.remove(argv[0])
+    except OSError, e:
+        pass
+
+class K:
+    def m(self, *args): return 1
+'''
+
+
+def test_scan_approximates_without_ast():
+    scan = scan_tokens(PY2)
+    assert scan["imports"] == [[None, ["os", "sys"]], ["..", ["util"]]]
+    # if + and + for + elif + or + except; el elif anida un nivel más que el if
+    assert scan["functions"] == [["main", 10, 2, 7, 2], ["m", 1, 1, 1, 0]]
+    assert scan["code_lines"] == 15 and scan["volume"] > 0
+
+    # Con código válido coincide con las métricas del AST
+    facade = MetricsFacade()
+    valid = "def f(a, b=1, *c):\n    while a:\n        if b or c:\n            return 1\n"
+    direct = facade.strategies["functions"].compute(ast.parse(valid))
+    from_tokens = facade.strategies["functions"].compute_tokens(scan_tokens(valid))
+    assert from_tokens == direct
+
+
+def test_broken_file_is_read_once_and_approximated():
+    reads = []
+    data = PY2.encode()
+    source_file = SourceFile("legacy.py", len(data), lambda: reads.append(1) or data)
+
+    metrics = MetricsFacade().compute_file(source_file, ["lines", "todos", "imports", "dependencies",
+                                                         "functions", "duplication", "maintainability"],
+                                           MetricsFacade().strategy_options({}))
+    assert len(reads) == 1
+    assert metrics["degraded"] is True
+    assert metrics["loc"] == 17 and metrics["todos"] == 1 and metrics["num_imports"] == 2
+    assert metrics["dependencies"] == ["..util", "os", "sys"]
+    assert metrics["functions"]["main"]["cc"] == 7
+    assert 0 < metrics["maintainability"] < 100
+
+
+def test_parse_failures_are_remembered(isolated_config, tmp_path, monkeypatch, simple_code):
+    repo = tmp_path / "legacy"
+    repo.mkdir()
+    (repo / "old.py").write_text(PY2)
+    (repo / "new.py").write_text(simple_code)
+    db = DBManager()
+
+    first = MetricsFacade().compute_all(repo, failure_store=db)
+    assert first["summary"]["degraded_files"] == 1
+    assert len(db.known_parse_failures(None, python_version())) == 1
+
+    parsed = []
+    original = ast.parse
+    monkeypatch.setattr(facade_module.ast, "parse", lambda text: parsed.append(text) or original(text))
+    second = MetricsFacade().compute_all(repo, failure_store=db)
+    # Solo se parsea el archivo válido; el otro va directo a los tokens
+    assert parsed == [simple_code]
+    assert second["files"] == first["files"]
+
+
+def test_recursion_error_is_approximated_but_not_remembered(isolated_config, tmp_path):
+    repo = tmp_path / "deep"
+    repo.mkdir()
+    # Válido, pero demasiado anidado para el límite de recursión del AST
+    (repo / "deep.py").write_text("x = 1" + " + 1" * 20000 + "\n")
+    db = DBManager()
+
+    result = MetricsFacade().compute_all(repo, failure_store=db)
+    assert result["files"][0]["degraded"] is True
+    assert db.known_parse_failures(None, python_version()) == set()
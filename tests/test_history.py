@@ -0,0 +1,84 @@
+import pytest
+
+from metrics import history
+from metrics.facade import MetricsFacade
+from proxy.proxy_subject import ProxySubject
+from repo.repo_manager import RepoManager
+from tests.conftest import _git
+
+
+@pytest.fixture
+def repo_with_history(local_git_repo):
+    """
+    Cuatro commits: cada uno cambia un solo archivo y el resto se mantiene.
+    """
+    for i in range(3):
+        (local_git_repo / "pkg" / f"mod{i}.py").write_text(f"def g{i}(x):\n    return x * {i}\n")
+        _git(local_git_repo, "add", ".")
+        _git(local_git_repo, "commit", "-q", "-m", f"cambio {i}")
+    _git(local_git_repo, "tag", "v1")
+    return local_git_repo
+
+
+def _without_volatile(result):
+    return {k: v for k, v in result.items() if k != "analyzed_at"}
+
+
+def test_sweep_reuses_unchanged_blobs(isolated_config, repo_with_history):
+    subject = ProxySubject()
+    url = str(repo_with_history)
+
+    sweep = subject.sweep(url, options={"workers": 1})
+
+    assert len(sweep["commits"]) == 4
+    # 2 archivos iniciales + 1 nuevo por commit: cada blob se calcula una vez
+    assert sweep["blobs_computed"] == 5
+    # La serie queda guardada: la tendencia no calcula nada
+    trend = subject.trend(url)
+    assert [p["id"] for p in trend] == [c["id"] for c in sweep["commits"]]
+    assert [p["summary"]["num_files"] for p in trend] == [2, 3, 4, 5]
+
+    # El último punto es idéntico a analizar ese commit directamente
+    last = subject.get_analysis(sweep["commits"][-1]["id"])
+    direct = subject.peticion(url, force=True)
+    assert direct["commit"] == last["commit"]
+    assert [f["path"] for f in direct["files"]] == [f["path"] for f in last["files"]]
+    assert direct["files"] == last["files"]
+    assert direct["summary"] == last["summary"]
+
+    # Un segundo barrido no recalcula nada
+    again = subject.sweep(url)
+    assert all(c["reused"] for c in again["commits"])
+    assert again["blobs_computed"] == 0
+
+
+def test_sweep_pool_matches_inline(isolated_config, repo_with_history, monkeypatch):
+    manager = RepoManager()
+    mirror = manager.ensure_repo(str(repo_with_history))
+    commits = [c["commit"] for c in manager.list_commits(mirror)]
+    options = {"metrics": ["lines", "functions", "clones"]}
+    facade = MetricsFacade()
+
+    inline = list(history.HistorySweep(facade, workers=1).run(mirror, commits, "sample", options))
+    # Un blob por tarea: el cálculo se reparte de verdad entre los procesos
+    monkeypatch.setattr(history, "CHUNK_SIZE", 1)
+    pool = history.HistorySweep(facade, workers=2)
+    pooled = list(pool.run(mirror, commits, "sample", options))
+
+    assert pool.blobs_computed == 5
+    for a, b in zip(inline, pooled):
+        assert _without_volatile(a) == _without_volatile(b)
+
+
+def test_sweep_every_and_tags(isolated_config, repo_with_history):
+    subject = ProxySubject()
+    url = str(repo_with_history)
+
+    every = subject.sweep(url, every=2, options={"workers": 1})
+    tags = subject.sweep(url, tags=True, options={"workers": 1})
+
+    # Uno de cada dos, contando desde el más reciente
+    assert len(every["commits"]) == 2
+    assert tags["commits"][0]["label"] == "v1"
+    assert tags["commits"][0]["commit"] == every["commits"][-1]["commit"]
+    assert tags["commits"][0]["reused"] is True
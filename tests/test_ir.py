@@ -0,0 +1,83 @@
+import ast
+import shutil
+
+import pytest
+
+from metrics.facade import MetricsFacade
+from metrics.ir import build_ir, decode_ir, encode_ir, load_tree
+from metrics.registry import available_metrics
+from proxy.proxy_subject import ProxySubject
+from repo.sources import SourceFile
+
+IR_METRICS = [name for name, cls in available_metrics().items() if cls.supports_ir]
+
+def _source_file(code):
+    data = code.encode()
+    return SourceFile("pkg/mod.py", len(data), lambda: data)
+
+def _ir(code):
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        tree = None
+    # Ida y vuelta por el formato guardado
+    return decode_ir(encode_ir(build_ir(code, tree)))
+
+
+@pytest.mark.parametrize("code", [
+    "spaghetti",
+    "from . import a\nfrom ..core import b as c\nimport os, pkg.util\n\n"
+    "async def g(x, y):\n    # TODO: revisar\n    async with x:\n        return x and y or not x\n\n"
+    "class K:\n    def m(self):\n        try:\n            pass\n        except ValueError:\n            assert 1\n"
+    "        s = '" + "x" * 100 + "'\n        return s + 'x' * 100\n",
+    "def roto(:\n    pass\n# FIXME\n",
+    "",
+])
+def test_ir_metrics_match_direct_computation(code, spaghetti_code):
+    if code == "spaghetti":
+        code = spaghetti_code * 3
+    facade = MetricsFacade()
+    options = facade.strategy_options({"dup_window": 2})
+
+    for names in ([name] for name in IR_METRICS):
+        direct = facade.compute_file(_source_file(code), names, options)
+        from_ir = facade.compute_ir(_ir(code), names, options)
+        assert from_ir == {k: v for k, v in direct.items() if k not in ("path", "name")}, names
+    # Juntas (un archivo que no compila sale aproximado por tokens en ambos casos)
+    direct = facade.compute_file(_source_file(code), IR_METRICS, options)
+    assert facade.compute_ir(_ir(code), IR_METRICS, options) == \
+        {k: v for k, v in direct.items() if k not in ("path", "name")}
+
+
+def test_light_tree_walks_like_ast(spaghetti_code):
+    tree = ast.parse(spaghetti_code)
+    light = load_tree(_ir(spaghetti_code))
+    expected = [type(n).__name__ for n in ast.walk(tree) if not isinstance(n, ast.expr_context)]
+    assert [n.type for n in light.walk()] == expected
+    assert load_tree(_ir("def roto(:")) is None
+
+
+def test_rollout_adds_metric_without_repository(isolated_config, local_git_repo):
+    subject = ProxySubject()
+    url = str(local_git_repo)
+    first = subject.peticion(url, metrics=["lines", "functions"])
+    assert all(f["blob"] for f in first["files"])
+
+    # Sin mirror ni origen: la métrica nueva solo puede salir del IR guardado
+    expected = MetricsFacade().compute_all(local_git_repo, {"metrics": ["lines", "functions", "duplication"]})
+    shutil.rmtree(subject.repo_manager.local_repo_path(url))
+    shutil.rmtree(local_git_repo)
+
+    with pytest.raises(ValueError):
+        subject.rollout(["clones"])
+    report = subject.rollout(["duplication"])
+    assert [u["added"] for u in report["updated"]] == [["duplication"]]
+    assert report["skipped"] == []
+    # Ya desplegada: una segunda ejecución no repite nada
+    assert subject.rollout(["duplication"])["updated"] == []
+
+    cached = subject.peticion(url, metrics=["lines", "functions", "duplication"])
+    assert cached["_from_cache"] and cached["commit"] == first["commit"]
+    assert cached["summary"]["total_lines"] == expected["summary"]["total_lines"]
+    strip = lambda files: [{k: v for k, v in f.items() if k != "blob"} for f in files]
+    assert strip(cached["files"]) == strip(expected["files"])
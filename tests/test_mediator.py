@@ -0,0 +1,109 @@
+import pytest
+
+import app as app_module
+from proxy.proxy_subject import ProxySubject
+from ui.mediator import OutputComponent, UIMediator
+
+REPO = "https://example.com/big.git"
+
+
+def _files(n):
+    return [
+        {"path": f"pkg/mod_{i:03d}.py", "name": f"mod_{i:03d}.py", "loc": i, "todos": 0,
+         "num_imports": 1, "duplication": 0.0, "maintainability": 100.0 - i / 10,
+         "functions": {f"fn_{i}": {"loc": 3, "params": 0, "cc": i % 7, "max_nesting": 1}}}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def client(isolated_config, monkeypatch):
+    subject = ProxySubject()
+    monkeypatch.setattr(app_module, "mediator", UIMediator(subject))
+    analysis_id = subject.db_manager.save_analysis({
+        "repo": REPO, "repo_name": "big", "analyzed_at": "2026-01-01T00:00:00",
+        "summary": {"num_files": 120, "total_lines": 7140, "avg_maintainability": 94.05},
+        "files": _files(120),
+    })
+    return app_module.app.test_client(), analysis_id
+
+
+def test_paginate_sort_and_filter():
+    out = OutputComponent()
+    ctx = out.prepare({"files": _files(120)}, {"per_page": "25", "page": "2", "sort": "loc", "order": "desc"})
+    assert [r["loc"] for r in ctx["files_page"]][:2] == [94, 93]
+    assert ctx["pagination"]["pages"] == 5
+    # Las filas no llevan el detalle de funciones, solo el resumen
+    assert "functions" not in ctx["files_page"][0]
+    assert ctx["files_page"][0]["num_functions"] == 1
+
+    ctx = out.prepare({"files": _files(120)}, {"q": "mod_01", "page": "99"})
+    assert ctx["pagination"]["total"] == 10
+    assert ctx["pagination"]["page"] == 1
+
+
+def test_paginate_missing_metric_sorted_last():
+    files = [{"path": "a.py", "loc": 5}, {"path": "b.py"}, {"path": "c.py", "loc": 1}]
+    ctx = OutputComponent().prepare({"files": files}, {"sort": "loc", "order": "desc"})
+    assert [r["path"] for r in ctx["files_page"]] == ["a.py", "c.py", "b.py"]
+
+
+def test_analysis_page_renders_only_one_page(client):
+    http, analysis_id = client
+    resp = http.get(f"/analysis/{analysis_id}?per_page=10&sort=path&order=asc")
+    html = resp.get_data(as_text=True)
+    assert resp.status_code == 200
+    assert "pkg/mod_009.py" in html
+    assert "pkg/mod_010.py" not in html
+    assert "Página 1 de 12" in html
+
+
+def test_database_page_matches_in_memory_page(client, monkeypatch):
+    http, analysis_id = client
+    subject = app_module.mediator.subject
+    out = OutputComponent()
+    files = _files(120)
+    files[5].pop("maintainability")
+    files[7]["functions"] = {}
+    subject.db_manager.save_analysis({"repo": REPO, "repo_name": "big", "files": files,
+                                      "analyzed_at": "2026-01-02T00:00:00", "summary": {}})
+    latest = subject.db_manager.get_latest_analysis(REPO)["id"]
+
+    for args in ({"sort": "maintainability", "order": "asc", "per_page": "7", "page": "18"},
+                 {"sort": "max_cc", "order": "desc", "per_page": "10", "page": "2"},
+                 {"sort": "num_functions", "per_page": "10"},
+                 {"sort": "loc", "order": "desc", "q": "MOD_1", "page": "99"}):
+        table = out.table_args(args)
+        page = subject.get_analysis_page(latest, table["page"], table["per_page"], table["sort"],
+                                         table["order"] == "desc", table["q"])
+        from_db = out.prepare(page, args)
+        in_memory = out.prepare({"files": files}, args)
+        assert from_db["pagination"] == in_memory["pagination"]
+        assert [r[table["sort"]] if table["sort"] in r else None for r in from_db["files_page"]] == \
+            [r[table["sort"]] if table["sort"] in r else None for r in in_memory["files_page"]]
+
+    # La página no reconstruye el informe completo
+    monkeypatch.setattr(subject.db_manager, "get_analysis", None)
+    assert http.get(f"/analysis/{latest}?sort=max_cc&order=desc").status_code == 200
+
+
+def test_file_detail_on_demand(client):
+    http, analysis_id = client
+    resp = http.get(f"/analysis/{analysis_id}/file?path=pkg/mod_008.py")
+    assert resp.status_code == 200
+    assert resp.get_json()["functions"]["fn_8"]["cc"] == 1
+
+    assert http.get(f"/analysis/{analysis_id}/file?path=nope.py").status_code == 404
+
+
+def test_streamed_analysis_page_comes_from_database(isolated_config, local_git_repo, monkeypatch):
+    subject = ProxySubject()
+    streamed = subject.peticion(str(local_git_repo), options={"stream": True})
+    monkeypatch.setattr(subject, "peticion", lambda *args, **kwargs: dict(streamed))
+    monkeypatch.setattr(subject.db_manager, "get_analysis", None)
+    monkeypatch.setattr(app_module, "mediator", UIMediator(subject))
+
+    resp = app_module.app.test_client().post("/analyze", data={"repo_url": "https://example.com/sample"})
+    html = resp.get_data(as_text=True)
+    assert resp.status_code == 200
+    assert "pkg/util.py" in html and f"/analysis/{streamed['id']}" in html
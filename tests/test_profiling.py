@@ -0,0 +1,87 @@
+import json
+import pstats
+import threading
+import tracemalloc
+
+import app as app_module
+from metrics.profiling import AnalysisProfiler
+from proxy.proxy_subject import ProxySubject
+from ui.mediator import UIMediator
+
+
+def test_profiled_analysis_stores_artifacts(isolated_config, local_git_repo):
+    subject = ProxySubject()
+    url = str(local_git_repo)
+    plain_run = subject.peticion(url)
+    assert "profile" not in plain_run and not plain_run.get("profiled")
+
+    # Aunque haya caché, un análisis perfilado se vuelve a calcular
+    result = subject.peticion(url, options={"profile": True})
+    assert result["_from_cache"] is False and result["id"] != plain_run["id"]
+    assert not tracemalloc.is_tracing()
+
+    profile = result["profile"]
+    assert [s["stage"] for s in profile["stages"]] == ["clone", "discovery", "metrics", "report", "db_write"]
+    steps = {s["step"]: s for s in profile["steps"]}
+    assert steps["parse"]["calls"] == 2 and steps["strategy:functions"]["calls"] == 2
+    assert {f["path"] for f in profile["slowest_files"]} == {"main.py", "pkg/util.py"}
+    assert set(profile["artifacts"]) == {"summary.json", "cpu.pstats", "cpu.txt", "memory.txt"}
+
+    directory = isolated_config.profiles_dir / str(result["id"])
+    stats = pstats.Stats(str(directory / "cpu.pstats"))
+    assert any(name == "compute_all" for _, _, name in stats.stats)
+    assert "== metrics ==" in (directory / "memory.txt").read_text()
+    assert subject.get_analysis(result["id"])["profiled"] is True
+    assert subject.get_profile(plain_run["id"]) is None
+
+
+def test_profile_endpoints(isolated_config, local_git_repo, monkeypatch):
+    subject = ProxySubject()
+    analysis_id = subject.peticion(str(local_git_repo), options={"profile": True})["id"]
+    monkeypatch.setattr(app_module, "mediator", UIMediator(subject))
+    http = app_module.app.test_client()
+
+    resp = http.get(f"/analysis/{analysis_id}/profile")
+    assert resp.status_code == 200
+    assert f"/analysis/{analysis_id}/profile/cpu.pstats" in resp.get_json()["downloads"]
+
+    resp = http.get(f"/analysis/{analysis_id}/profile/summary.json")
+    assert resp.status_code == 200 and "attachment" in resp.headers["Content-Disposition"]
+    assert json.loads(resp.data)["files_profiled"] == 2
+    # Solo los artefactos conocidos (el nombre viene de la URL)
+    assert http.get(f"/analysis/{analysis_id}/profile/..%2F..%2Fanalysis_test.db").status_code == 404
+    assert http.get(f"/analysis/{analysis_id + 1}/profile").status_code == 404
+
+
+def test_overlapping_profilers_share_tracemalloc():
+    first_done = threading.Event()
+    second_in_stage = threading.Event()
+    errors = []
+
+    def first():
+        profiler = AnalysisProfiler().start()
+        second_in_stage.wait(5)
+        profiler.stop()
+        first_done.set()
+
+    def second():
+        try:
+            profiler = AnalysisProfiler().start()
+            # La fase empieza con el primero activo y termina cuando ya ha parado
+            with profiler.stage("metrics"):
+                second_in_stage.set()
+                first_done.wait(5)
+                assert tracemalloc.is_tracing()
+            profiler.stop()
+            assert "allocated" in profiler.stages[0]
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    # El último en terminar lo para
+    assert not tracemalloc.is_tracing()
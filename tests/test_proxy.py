@@ -0,0 +1,164 @@
+import subprocess
+
+import pytest
+
+from proxy.proxy_subject import ProxySubject
+from repo.repo_manager import RepoManager
+from tests.conftest import _git
+
+
+def test_same_options_hit_cache(isolated_config, local_git_repo):
+    subject = ProxySubject()
+    url = str(local_git_repo)
+
+    first = subject.peticion(url)
+    second = subject.peticion(url)
+
+    assert first["_from_cache"] is False
+    assert first["commit"]
+    assert first["options_key"] == (f"clone_min_nodes={isolated_config.clone_min_nodes},"
+                                    f"dup_window={isolated_config.duplication_window}")
+    assert second["_from_cache"] is True
+    assert second["id"] == first["id"]
+
+
+def test_other_dup_window_recomputes_only_duplication(isolated_config, local_git_repo, monkeypatch):
+    subject = ProxySubject()
+    url = str(local_git_repo)
+    base = subject.peticion(url, options={"dup_window": 4})
+
+    # Si se recalculara una métrica que no depende de la ventana, fallaría
+    for name, strategy in subject.facade.strategies.items():
+        if name != "duplication":
+            monkeypatch.setattr(strategy, "compute", lambda *a, **k: 1 / 0)
+
+    variant = subject.peticion(url, options={"dup_window": 2})
+
+    assert variant["_recomputed"] == ["duplication"]
+    assert variant["options"]["dup_window"] == 2
+    assert variant["commit"] == base["commit"]
+    assert variant["id"] != base["id"]
+    base_files = {f["path"]: f for f in base["files"]}
+    for f in variant["files"]:
+        assert f["loc"] == base_files[f["path"]]["loc"]
+        assert f["maintainability"] == base_files[f["path"]]["maintainability"]
+
+    # Ambas variantes conviven en la caché
+    assert subject.peticion(url, options={"dup_window": 4})["id"] == base["id"]
+    assert subject.peticion(url, options={"dup_window": 2})["id"] == variant["id"]
+
+
+def test_options_unused_by_selection_share_cache(isolated_config, local_git_repo):
+    subject = ProxySubject()
+    url = str(local_git_repo)
+
+    first = subject.peticion(url, metrics=["lines"], options={"dup_window": 4})
+    second = subject.peticion(url, metrics=["lines"], options={"dup_window": 9})
+
+    assert first["options_key"] == ""
+    assert second["_from_cache"] is True
+    assert second["id"] == first["id"]
+
+
+def test_approximate_results_not_cached(isolated_config, local_git_repo):
+    subject = ProxySubject()
+    url = str(local_git_repo)
+
+    approx = subject.peticion(url, options={"approximate": True, "sample_fraction": 0.5})
+    assert approx["id"] is None
+    assert approx["sampling"]["files_total"] == 2
+    assert subject.list_analyses() == []
+
+    # Un análisis exacto posterior no reutiliza el aproximado
+    exact = subject.peticion(url)
+    assert exact["_from_cache"] is False
+    assert "sampling" not in exact
+
+
+def test_streaming_matches_in_memory_report(isolated_config, local_git_repo):
+    subject = ProxySubject()
+    url = str(local_git_repo)
+
+    streamed = subject.peticion(url, options={"stream": True})
+    in_memory = subject.peticion(url, force=True)
+
+    assert streamed["streamed"] is True
+    assert streamed["id"] is not None
+    # Los archivos no vuelven a memoria: se leen de la BD paginados o de uno en uno
+    assert "files" not in streamed
+    page = subject.get_analysis_page(streamed["id"], per_page=1)
+    assert page["files_page"]["total"] == 2 and len(page["files"]) == 1
+    assert subject.get_analysis(streamed["id"])["files"] == in_memory["files"]
+    assert streamed["summary"]["num_files"] == in_memory["summary"]["num_files"]
+    assert streamed["summary"]["total_lines"] == in_memory["summary"]["total_lines"]
+
+
+def test_refs_share_one_mirror(isolated_config, local_git_repo):
+    subject = ProxySubject()
+    url = str(local_git_repo)
+    _git(local_git_repo, "tag", "v1")
+
+    main = subject.peticion(url, metrics=["lines"])
+    # La tag apunta al mismo commit: se reutiliza el análisis sin recalcular
+    tagged = subject.peticion(url, metrics=["lines"], options={"ref": "v1"})
+    assert tagged["_from_cache"] is True
+    assert tagged["commit"] == main["commit"]
+    assert tagged["ref"] == "v1"
+
+    # Rama creada después del mirror: se trae con un fetch al pedirla
+    _git(local_git_repo, "checkout", "-q", "-b", "dev")
+    (local_git_repo / "nuevo.py").write_text("x = 1\n")
+    _git(local_git_repo, "add", ".")
+    _git(local_git_repo, "commit", "-q", "-m", "dev")
+    dev = subject.peticion(url, metrics=["lines"], options={"ref": "dev"})
+    by_commit = subject.peticion(url, metrics=["lines"], options={"ref": dev["commit"][:12]})
+
+    assert dev["_from_cache"] is False
+    assert dev["commit"] != main["commit"]
+    assert dev["repo_name"] == "sample@dev"
+    assert "nuevo.py" in {f["path"] for f in dev["files"]}
+    assert by_commit["_from_cache"] is True
+    # Un único mirror bare para todas las refs, sin worktrees
+    mirrors = sorted(p.name for p in isolated_config.repo_cache_dir.iterdir())
+    assert mirrors == [".locks", RepoManager().mirror_path(url).name]
+    # Cada ref tiene su serie en las tendencias
+    assert [p["id"] for p in subject.trend(url, metrics=["lines"])] == [main["id"]]
+    assert [p["id"] for p in subject.trend(url, metrics=["lines"], ref="dev")] == [dev["id"]]
+
+
+def test_unknown_ref_is_an_error(isolated_config, local_git_repo):
+    with pytest.raises(ValueError):
+        ProxySubject().peticion(str(local_git_repo), options={"ref": "no-existe"})
+
+
+def test_cache_hit_does_not_measure_the_mirror(isolated_config, local_git_repo, monkeypatch):
+    subject = ProxySubject()
+    url = str(local_git_repo)
+    sizes = []
+    original = subject.repo_manager.mirror_size
+    monkeypatch.setattr(subject.repo_manager, "mirror_size", lambda u: sizes.append(u) or original(u))
+
+    subject.peticion(url)
+    assert sizes == [url]
+    assert subject.peticion(url)["_from_cache"] is True
+    # El tamaño solo sirve para pedir turno en el planificador
+    assert sizes == [url]
+
+
+def test_mirror_skips_pull_request_refs(isolated_config, local_git_repo):
+    # Como GitHub: cada PR deja una ref fuera de ramas y tags
+    (local_git_repo / "pr.py").write_text("y = 2\n")
+    _git(local_git_repo, "add", ".")
+    _git(local_git_repo, "commit", "-q", "-m", "pr")
+    _git(local_git_repo, "update-ref", "refs/pull/1/head", "HEAD")
+    _git(local_git_repo, "reset", "-q", "--hard", "HEAD~1")
+    _git(local_git_repo, "tag", "v1")
+
+    manager = RepoManager()
+    url = str(local_git_repo)
+    mirror = manager.ensure_repo(url)
+    manager.fetch(url)
+    refs = subprocess.run(["git", "-C", str(mirror), "for-each-ref", "--format=%(refname)"],
+                          check=True, stdout=subprocess.PIPE).stdout.decode().split()
+    assert not [r for r in refs if r.startswith("refs/pull/")]
+    assert "refs/tags/v1" in refs and any(r.startswith("refs/heads/") for r in refs)
@@ -0,0 +1,59 @@
+import json
+import pickle
+
+import pytest
+
+from metrics.functions import FunctionsStrategy
+from metrics.records import FileRecord, FunctionTable, json_default, plain
+from repo.db_manager import DBManager
+
+
+def test_function_table_behaves_like_the_old_dicts(simple_ast):
+    table = FunctionsStrategy().compute(simple_ast)
+    assert isinstance(table, FunctionTable)
+    assert table == {"hello": {"loc": 5, "params": 1, "cc": 2, "max_nesting": 1}}
+    assert table["hello"]["params"] == 1
+    assert [name for name, _ in table.items()] == ["hello"]
+    with pytest.raises(KeyError):
+        table["adios"]
+
+    # Un nombre repetido conserva su posición y se queda con las últimas métricas
+    repeated = FunctionTable([("a", {"loc": 1, "params": 0, "cc": 1, "max_nesting": 0}),
+                              ("b", {"loc": 2, "params": 0, "cc": 1, "max_nesting": 0}),
+                              ("a", {"loc": 3, "params": 0, "cc": 1, "max_nesting": 0})])
+    assert list(repeated) == ["a", "b"] and repeated["a"]["loc"] == 3
+    assert pickle.loads(pickle.dumps(repeated)) == repeated
+
+
+def test_file_record_slots_extra_keys_and_json():
+    record = FileRecord(path="a.py", name="a.py", loc=3,
+                        functions={"f": {"loc": 2, "params": 1, "cc": 1, "max_nesting": 0}})
+    record["custom_metric"] = 0.5
+    assert not hasattr(record, "__dict__")
+    assert isinstance(record["functions"], FunctionTable)
+    assert record.get("maintainability") is None and "maintainability" not in record
+
+    del record["loc"]
+    copy = record.copy()
+    copy["clones"] = 2
+    assert "clones" not in record
+    expected = {"path": "a.py", "name": "a.py", "custom_metric": 0.5,
+                "functions": {"f": {"loc": 2, "params": 1, "cc": 1, "max_nesting": 0}}}
+    assert record == expected and plain(record) == expected
+    assert type(plain([record])[0]["functions"]) is dict
+
+    text = json.dumps(record, sort_keys=True, default=json_default)
+    assert FileRecord.from_json(text) == record
+    assert pickle.loads(pickle.dumps(record)) == record
+
+
+def test_db_returns_records(isolated_config, simple_ast):
+    db = DBManager()
+    functions = FunctionsStrategy().compute(simple_ast)
+    files = [FileRecord(path="pkg/a.py", name="a.py", loc=6, functions=functions)]
+    analysis_id = db.save_analysis({"repo": "r", "repo_name": "r", "metrics": ["functions", "lines"],
+                                    "summary": {}, "files": files})
+
+    stored = db.get_analysis(analysis_id)["files"][0]
+    assert isinstance(stored, FileRecord) and stored == files[0]
+    assert db.get_analysis_file(analysis_id, "pkg/a.py")["functions"]["hello"]["cc"] == 2
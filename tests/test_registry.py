@@ -0,0 +1,53 @@
+import pytest
+
+from metrics import facade as facade_module
+from metrics.facade import MetricsFacade
+from metrics.registry import available_metrics, metrics_cache_key, resolve_metrics
+from repo.db_manager import DBManager
+
+
+def test_builtin_strategies_registered():
+    registry = available_metrics()
+    assert list(registry) == ["lines", "todos", "dependencies", "imports", "functions", "clones", "duplication", "maintainability"]
+    assert registry["duplication"].options == {"window": "dup_window"}
+
+
+def test_resolve_metrics_canonical_order():
+    assert resolve_metrics(["imports", "lines"]) == ["lines", "imports"]
+    assert resolve_metrics(None) == list(available_metrics())
+    assert metrics_cache_key(["imports", "lines"]) == metrics_cache_key(["lines", "imports"])
+
+
+def test_resolve_metrics_unknown():
+    with pytest.raises(ValueError):
+        resolve_metrics(["lines", "halstead"])
+
+
+def test_subset_skips_unneeded_inputs(tmp_path, monkeypatch, simple_code):
+    repo = tmp_path / "demo"
+    repo.mkdir()
+    (repo / "a.py").write_text(simple_code, encoding="utf-8")
+
+    # Con solo 'lines' y 'todos' no debe parsearse ningún AST
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("ast.parse no debería llamarse")
+    monkeypatch.setattr(facade_module.ast, "parse", fail_parse)
+
+    result = MetricsFacade().compute_all(repo, options={"metrics": ["todos", "lines"]})
+    file_metrics = result["files"][0]
+    assert result["metrics"] == ["lines", "todos"]
+    assert set(file_metrics) == {"path", "name", "loc", "todos"}
+    assert result["summary"]["total_lines"] == file_metrics["loc"]
+    assert result["summary"]["avg_maintainability"] is None
+
+
+def test_cache_key_includes_metric_set(isolated_config):
+    db = DBManager()
+    repo = "https://example.com/demo.git"
+    base = {"repo": repo, "repo_name": "demo", "summary": {}, "files": []}
+    db.save_analysis(dict(base, analyzed_at="2026-01-01", metrics=["lines"]))
+    db.save_analysis(dict(base, analyzed_at="2026-01-02", metrics=["lines", "imports"]))
+
+    assert db.get_latest_analysis(repo, "lines")["metrics"] == ["lines"]
+    assert db.get_latest_analysis(repo, "imports,lines")["analyzed_at"] == "2026-01-02"
+    assert db.get_latest_analysis(repo, "duplication") is None
@@ -0,0 +1,82 @@
+import pytest
+
+from proxy.proxy_subject import ProxySubject
+from proxy.revalidator import Revalidator
+from repo.repo_manager import RepoManager
+from tests.conftest import _git
+
+
+def _push_commit(origin, name="nuevo.py"):
+    (origin / name).write_text("def nuevo():\n    return 1\n")
+    _git(origin, "add", ".")
+    _git(origin, "commit", "-q", "-m", f"añade {name}")
+
+
+@pytest.fixture
+def subject(isolated_config):
+    subject = ProxySubject()
+    subject.revalidator = Revalidator(subject, interval=0, ttl=0)
+    yield subject
+    subject.revalidator.stop()
+
+
+def test_remote_commit_uses_ls_remote(isolated_config, local_git_repo):
+    manager = RepoManager()
+    url = str(local_git_repo)
+    _git(local_git_repo, "tag", "-a", "v1", "-m", "release")
+
+    head = manager.remote_commit(url)
+    assert head == manager.resolve_ref(local_git_repo)
+    # La tag anotada se resuelve a su commit, no al objeto tag
+    assert manager.remote_commit(url, "v1") == head
+    assert manager.remote_commit(url, "no-existe") is None
+    # ls-remote no clona nada
+    assert list(isolated_config.repo_cache_dir.iterdir()) == []
+
+
+def test_hit_is_served_and_revalidated_in_background(subject, local_git_repo):
+    url = str(local_git_repo)
+    first = subject.peticion(url, metrics=["lines"])
+    _push_commit(local_git_repo)
+
+    # Se sirve lo que hay y la comprobación va a segundo plano
+    stale = subject.peticion(url, metrics=["lines"])
+    assert stale["_from_cache"] is True
+    assert stale["_revalidating"] is True
+    assert stale["id"] == first["id"]
+    subject.revalidator.join()
+
+    fresh = subject.peticion(url, metrics=["lines"])
+    assert fresh["_from_cache"] is True
+    assert fresh["commit"] != first["commit"]
+    assert fresh["summary"]["num_files"] == 3
+
+
+def test_unchanged_remote_is_not_reanalyzed(subject, local_git_repo):
+    url = str(local_git_repo)
+    subject.peticion(url, metrics=["lines"])
+
+    # Una instancia nueva (otro worker) encuentra en la BD lo que hay que vigilar
+    revalidator = Revalidator(subject, interval=0, ttl=0)
+    assert revalidator.run_once() == []
+
+    _push_commit(local_git_repo)
+    refreshed = revalidator.run_once()
+    assert len(refreshed) == 1
+    assert refreshed[0]["forced"] is True
+    assert revalidator.run_once() == []
+
+
+def test_requests_during_revalidation_get_previous_analysis(subject, local_git_repo):
+    url = str(local_git_repo)
+    first = subject.peticion(url, metrics=["lines"])
+    _push_commit(local_git_repo)
+
+    # El re-análisis ya actualizó el mirror pero aún no ha guardado nada
+    RepoManager().fetch(url)
+    entry = subject.db_manager.list_tracked()[0]
+    subject.revalidator._running.add((url, None, entry["metrics_key"], entry["options_key"]))
+
+    result = subject.peticion(url, metrics=["lines"])
+    assert result["_stale"] is True
+    assert result["id"] == first["id"]
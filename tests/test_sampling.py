@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from metrics.facade import MetricsFacade
+from metrics.sampling import StratifiedEstimator, StratifiedSampler
+from repo.sources import DirectorySource
+
+
+@pytest.fixture
+def big_repo(tmp_path):
+    """
+    Repo sintético con directorios de tamaños muy distintos.
+    """
+    rng = random.Random(7)
+    repo = tmp_path / "mono"
+    for directory, count, max_lines in [("core", 120, 80), ("tests", 60, 20), ("tools", 20, 300)]:
+        (repo / directory).mkdir(parents=True)
+        for i in range(count):
+            body = "".join(f"x{j} = {j}\n" for j in range(rng.randint(1, max_lines)))
+            (repo / directory / f"m{i}.py").write_text(body)
+    (repo / "setup.py").write_text("x = 1\n")
+    return repo
+
+
+def test_sampler_prefix_covers_every_stratum(big_repo):
+    files = DirectorySource(big_repo).list_files()
+    sampler = StratifiedSampler(files, seed=1)
+
+    assert sorted(f.path for _, f in sampler.order) == sorted(f.path for f in files)
+    first_round = {stratum for stratum, _ in sampler.order[:len(sampler.strata_sizes)]}
+    assert first_round == set(sampler.strata_sizes)
+    # Misma semilla, mismo orden
+    again = StratifiedSampler(DirectorySource(big_repo).list_files(), seed=1)
+    assert [f.path for _, f in again.order] == [f.path for _, f in sampler.order]
+
+
+def test_estimator_is_exact_with_full_sample():
+    estimator = StratifiedEstimator({"a": 2, "b": 1})
+    estimator.add("a", {"loc": 10})
+    estimator.add("a", {"loc": 30})
+    estimator.add("b", {"loc": 5})
+
+    loc = estimator.estimate("loc")
+    assert loc["total"] == 45
+    assert loc["total_ci"] == [45, 45]
+    assert estimator.estimate("maintainability") is None
+
+
+def test_approximate_report_brackets_exact_total(big_repo, isolated_config):
+    facade = MetricsFacade()
+    options = {"metrics": ["lines"], "seed": 3, "sample_batch": 20}
+    exact = facade.compute_all(big_repo, options={"metrics": ["lines"]})["summary"]["total_lines"]
+
+    reports = list(facade.iter_approximate(big_repo, options))
+    partial = reports[2]
+    low, high = partial["summary"]["estimates"]["loc"]["total_ci"]
+
+    assert partial["approximate"] is True
+    assert partial["sampling"]["files_sampled"] == 60
+    assert partial["sampling"]["files_total"] == 201
+    assert partial["summary"]["num_files"] == 201
+    assert low <= exact <= high
+    # Con la muestra completa la estimación es el valor exacto
+    assert reports[-1]["approximate"] is False
+    assert reports[-1]["summary"]["total_lines"] == exact
+
+
+def test_compute_approximate_stops_at_fraction(big_repo, isolated_config):
+    options = {"metrics": ["lines"], "seed": 3, "sample_batch": 20, "sample_fraction": 0.25}
+    result = MetricsFacade().compute_approximate(big_repo, options)
+
+    assert result["approximate"] is True
+    assert 0.25 * 201 <= result["sampling"]["files_sampled"] < 0.25 * 201 + 20
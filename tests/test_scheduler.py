@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+from deadline import Deadline
+from proxy.proxy_subject import ProxySubject
+from proxy.scheduler import PriorityPool, QueueTimeout, Scheduler
+
+
+def _hold(pool, release, **job):
+    """
+    Ocupa un slot desde otro hilo hasta que se activa 'release'.
+    """
+    taken = threading.Event()
+
+    def run():
+        with pool.slot(**job):
+            taken.set()
+            release.wait()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    taken.wait()
+    return thread
+
+
+def _enqueue(pool, order, label, **job):
+    queued = pool.stats()["queued"]
+
+    def run():
+        with pool.slot(**job):
+            order.append(label)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    # Se encolan de uno en uno para que el orden de llegada sea conocido
+    while pool.stats()["queued"] == queued:
+        time.sleep(0.001)
+    return thread
+
+
+def test_interactive_and_small_repos_first():
+    pool = PriorityPool("cpu", 1)
+    release = threading.Event()
+    holder = _hold(pool, release, requester="x")
+
+    order = []
+    threads = [
+        _enqueue(pool, order, "batch", priority="batch", requester="a", size=1),
+        _enqueue(pool, order, "unknown", requester="b", size=None),
+        _enqueue(pool, order, "big", requester="c", size=10_000),
+        _enqueue(pool, order, "small", requester="d", size=10),
+    ]
+    assert pool.stats()["queued_by_priority"] == {"interactive": 3, "batch": 1}
+    release.set()
+    for thread in [holder] + threads:
+        thread.join()
+
+    assert order == ["small", "big", "unknown", "batch"]
+    stats = pool.stats()
+    assert stats["granted"] == 5
+    assert stats["max_queue_depth"] == 4
+    assert stats["running"] == stats["queued"] == 0
+
+
+def test_requester_with_running_jobs_waits_its_turn():
+    pool = PriorityPool("io", 2)
+    release_heavy, release_other = threading.Event(), threading.Event()
+    heavy = _hold(pool, release_heavy, requester="heavy")
+    other = _hold(pool, release_other, requester="other")
+
+    order = []
+    threads = [
+        _enqueue(pool, order, "heavy-2", requester="heavy", size=1),
+        _enqueue(pool, order, "light", requester="light", size=10_000),
+    ]
+    assert pool.stats()["running_by_requester"] == {"heavy": 1, "other": 1}
+    # Se libera un slot: entra quien no tiene nada en marcha aunque su repo sea mayor
+    release_other.set()
+    other.join()
+    threads[1].join()
+    release_heavy.set()
+    for thread in [heavy] + threads:
+        thread.join()
+
+    assert order == ["light", "heavy-2"]
+
+
+def test_wait_is_bounded_by_deadline():
+    pool = PriorityPool("cpu", 1)
+    release = threading.Event()
+    holder = _hold(pool, release)
+
+    with pytest.raises(QueueTimeout):
+        with pool.slot(deadline=Deadline(0.05)):
+            pass
+    release.set()
+    holder.join()
+
+    assert pool.stats()["timeouts"] == 1
+    with pytest.raises(ValueError):
+        with pool.slot(priority="urgente"):
+            pass
+
+
+def test_request_out_of_time_in_queue_is_partial(isolated_config, local_git_repo):
+    subject = ProxySubject()
+    subject._scheduler = Scheduler(io_slots=1, cpu_slots=1)
+    url = str(local_git_repo)
+
+    release = threading.Event()
+    holder = _hold(subject.scheduler.cpu, release, requester="otro")
+    try:
+        result = subject.peticion(url, options={"deadline": 0.2, "requester": "yo"})
+    finally:
+        release.set()
+        holder.join()
+
+    assert result["partial"] is True
+    assert result["coverage"]["stage"] == "queue"
+    # El clonado sí tuvo turno en el pool de E/S
+    assert subject.scheduler_stats()["io"]["granted"] == 1
+
+    with pytest.raises(ValueError):
+        subject.peticion(url, options={"priority": "urgente"})
+    assert subject.peticion(url)["summary"]["num_files"] == 2
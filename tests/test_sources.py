@@ -0,0 +1,103 @@
+import tarfile
+import zipfile
+
+import pytest
+
+from metrics.facade import MetricsFacade
+from proxy.proxy_subject import ProxySubject
+from repo.sources import DirectorySource, TarSource, ZipSource, open_local_source
+
+
+@pytest.fixture
+def project(tmp_path, spaghetti_code):
+    """
+    Proyecto sin .git (ej. un checkout de CI) con un fichero roto y un .venv ignorado.
+    """
+    root = tmp_path / "proyecto"
+    (root / "pkg").mkdir(parents=True)
+    (root / ".venv").mkdir()
+    (root / "main.py").write_text(spaghetti_code * 2)
+    (root / "pkg" / "util.py").write_text("import os\n\ndef f(x):\n    return x + 1\n")
+    (root / "pkg" / "roto.py").write_text("def f(:\n    pass\n")
+    (root / ".venv" / "lib.py").write_text("x = 1\n")
+    return root
+
+
+@pytest.fixture
+def archives(tmp_path, project):
+    tar_path = tmp_path / "proyecto-1.0.tar.gz"
+    zip_path = tmp_path / "proyecto-1.0.zip"
+    with tarfile.open(tar_path, "w:gz") as tar:
+        for path in sorted(project.rglob("*")):
+            tar.add(path, arcname=str(path.relative_to(project)), recursive=False)
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for path in sorted(project.rglob("*.py")):
+            zf.write(path, arcname=path.relative_to(project).as_posix())
+    return tar_path, zip_path
+
+
+def _by_path(result):
+    return {f["path"].replace("\\", "/"): f for f in result["files"]}
+
+
+def test_open_local_source_by_kind(project, archives, local_git_repo):
+    tar_path, zip_path = archives
+    assert isinstance(open_local_source(str(project)), DirectorySource)
+    assert isinstance(open_local_source(str(tar_path)), TarSource)
+    assert isinstance(open_local_source(str(zip_path)), ZipSource)
+    # URLs y repos git se siguen clonando
+    assert open_local_source("https://github.com/usuario/repo.git") is None
+    assert open_local_source(str(local_git_repo)) is None
+
+
+def test_archives_match_directory_analysis(project, archives, isolated_config):
+    facade = MetricsFacade()
+    expected = _by_path(facade.compute_all(project))
+    assert set(expected) == {"main.py", "pkg/util.py", "pkg/roto.py"}
+
+    for archive in archives:
+        source = open_local_source(str(archive))
+        try:
+            result = facade.compute_all(source)
+        finally:
+            source.close()
+        assert result["repo_name"] == "proyecto-1.0"
+        files = _by_path(result)
+        assert set(files) == set(expected)
+        for path, metrics in files.items():
+            for key in ("loc", "maintainability", "duplication", "num_imports", "clones"):
+                assert metrics[key] == expected[path][key], (archive.name, path, key)
+
+
+def test_archive_cached_by_digest_without_cloning(tmp_path, archives, isolated_config):
+    tar_path, _ = archives
+    subject = ProxySubject()
+
+    first = subject.peticion(str(tar_path))
+    assert first["commit"].startswith("sha256:")
+    assert first["summary"]["num_files"] == 3
+    assert list(isolated_config.repo_cache_dir.iterdir()) == []
+
+    # Mismo contenido: acierto de caché por la huella, sin releer los miembros
+    assert subject.peticion(str(tar_path))["_from_cache"] is True
+
+    # Otro contenido en la misma ruta: otra huella, se recalcula
+    with tarfile.open(tar_path, "w:gz") as tar:
+        extra = tmp_path / "solo.py"
+        extra.write_text("x = 1\n")
+        tar.add(extra, arcname="solo.py")
+    second = subject.peticion(str(tar_path))
+    assert second["_from_cache"] is False
+    assert second["commit"] != first["commit"]
+    assert second["summary"]["num_files"] == 1
+
+
+def test_zip_recomputes_only_affected_metric(archives, isolated_config):
+    _, zip_path = archives
+    subject = ProxySubject()
+    base = subject.peticion(str(zip_path), options={"dup_window": 4})
+
+    variant = subject.peticion(str(zip_path), options={"dup_window": 2})
+
+    assert variant["_recomputed"] == ["duplication"]
+    assert variant["commit"] == base["commit"]
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _run(code, cwd, **env_vars):
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT), **env_vars)
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def test_import_has_no_side_effects(tmp_path):
+    out = _run("import app, cli", tmp_path, REPO_ANALYZER_HOME=str(tmp_path))
+    # Ni carpetas, ni BD, ni mensajes por consola
+    assert list(tmp_path.iterdir()) == []
+    assert out.stdout == ""
+
+
+def test_config_from_environment(tmp_path):
+    code = (
+        "from config import ConfigSingleton as C; c = C.get_instance(); "
+        "print(c.db_path); print(c.repo_cache_dir); print(c.duplication_window)"
+    )
+    out = _run(code, PROJECT_ROOT,
+               REPO_ANALYZER_DB_PATH=str(tmp_path / "x.db"),
+               REPO_ANALYZER_HOME=str(tmp_path),
+               REPO_ANALYZER_DUP_WINDOW="7")
+    db_path, cache_dir, window = out.stdout.split()
+    assert db_path == str(tmp_path / "x.db")
+    assert cache_dir == str(tmp_path / "repo_cache")
+    assert window == "7"
+
+
+def test_db_schema_created_lazily(isolated_config):
+    from repo.db_manager import DBManager
+    db = DBManager()
+    assert not isolated_config.db_path.exists()
+    assert db.list_analyses() == []
+    assert isolated_config.db_path.exists()
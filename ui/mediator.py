@@ -1,8 +1,9 @@
-from typing import Dict, Any, Tuple, Optional
-from flask import render_template
+from typing import Dict, Any, List, Tuple, Optional
+from flask import Response, render_template, jsonify, send_file
 
 from proxy.subject_interface import SubjectInterface
 from config import ConfigSingleton
+from metrics.records import plain
 
 class InputComponent:
     """
@@ -30,7 +31,7 @@ class InputComponent:
 
 class OptionsComponent:
     """
-    Responsabilidad: Gestionar opciones de configuración (Force, Window).
+    Responsabilidad: Gestionar opciones de configuración (Force, Window, Métricas).
     """
     def parse(self, form: Dict) -> Dict[str, Any]:
         """
@@ -45,40 +46,155 @@ class OptionsComponent:
             dup_window = int(form.get("dup_window", str(default_window)))
         except ValueError:
             dup_window = default_window
+
+        # Métricas seleccionadas (checkboxes con el mismo name). Vacío = todas.
+        if hasattr(form, "getlist"):
+            metrics = form.getlist("metrics")
+        else:
+            metrics = form.get("metrics") or []
+            if isinstance(metrics, str):
+                metrics = metrics.split(",")
+        metrics = [m for m in metrics if m] or None
         
-        return {"force": force, "dup_window": dup_window}
+        # Modo aproximado (muestreo estratificado) para repos enormes
+        approximate = form.get("approximate") == "on"
+
+        # Rama, tag o commit (vacío = rama principal)
+        ref = (form.get("ref") or "").strip() or None
+
+        # Perfil de CPU y memoria del análisis (implica recalcular)
+        profile = form.get("profile") == "on"
+
+        return {"force": force, "dup_window": dup_window, "metrics": metrics, "approximate": approximate,
+                "ref": ref, "profile": profile}
     
     def context(self, current_options: Optional[Dict] = None) -> Dict[str, Any]:
         """
         Devuelve estado actual para repoblar el formulario
         """
+        from metrics.registry import describe_metrics
+
+        available = describe_metrics()
         if not current_options:
             default_window = ConfigSingleton.get_instance().duplication_window
-            return {"options": {"force": False, "dup_window": default_window}}
-        return {"options": current_options}
+            current_options = {"force": False, "dup_window": default_window, "metrics": None,
+                               "approximate": False, "ref": None, "profile": False}
+        return {"options": current_options, "available_metrics": available}
 
 class OutputComponent:
     """
-    Responsabilidad: Preparar el resultado del análisis para la vista
+    Responsabilidad: Preparar el resultado del análisis para la vista.
+    La tabla de archivos se pagina, ordena y filtra en el servidor: la plantilla
+    solo recibe una página de filas (sin el detalle de funciones), así que el
+    peso de la página no depende del tamaño del repositorio.
     """
-    def prepare(self, result: Optional[Dict]) -> Dict[str, Any]:
+
+    # Columnas por las que se puede ordenar la tabla
+    SORT_KEYS = ("path", "loc", "todos", "num_imports", "duplication", "clones",
+                 "maintainability", "num_functions", "max_cc")
+    MAX_PER_PAGE = 500
+
+    def prepare(self, result: Optional[Dict], table_args: Optional[Dict] = None) -> Dict[str, Any]:
         """
         Transforma el JSON crudo del backend en variables para Jinja2.
+
+        Args:
+            result: Informe del backend.
+            table_args: Parámetros de la tabla (page, per_page, sort, order, q).
         """
         if not result:
             return {"show_output": False}
+
+        table = self.table_args(table_args or {})
+        if "files_page" in result:
+            # La BD ya ha filtrado, ordenado y paginado (DBManager.get_analysis_page)
+            rows = [self._row(f) for f in result.get("files", [])]
+            pagination = self._pagination(table, result["files_page"]["page"],
+                                          result["files_page"]["total"])
+        else:
+            rows, pagination = self._paginate(result.get("files", []), table)
         
         return {
             "show_output": True,
-            "result": result,  # Pasamos todo el objeto para iterar en HTML
+            "analysis_id": result.get("id"),
             # Helpers para cabecera rápida
             "repo_name": result.get("repo_name", "Desconocido"),
             "analyzed_at": result.get("analyzed_at", ""),
             "from_cache": result.get("_from_cache", False),
             "forced": result.get("forced", False),
-            "summary": result.get("summary", {})
+            "approximate": result.get("approximate", False),
+            "partial": result.get("partial", False),
+            "coverage": result.get("coverage"),
+            "sampling": result.get("sampling"),
+            "profiled": result.get("profiled", False),
+            "summary": result.get("summary", {}),
+            # Tabla paginada
+            "files_page": rows,
+            "pagination": pagination
         }
 
+    def table_args(self, args: Dict) -> Dict[str, Any]:
+        """
+        Normaliza los parámetros de la tabla (page, per_page, sort, order, q).
+        """
+        return {
+            "page": max(self._int(args.get("page"), 1), 1),
+            "per_page": min(max(self._int(args.get("per_page"), ConfigSingleton.get_instance().page_size), 1),
+                            self.MAX_PER_PAGE),
+            "sort": args.get("sort") if args.get("sort") in self.SORT_KEYS else "path",
+            "order": "desc" if args.get("order") == "desc" else "asc",
+            "q": (args.get("q") or "").strip(),
+        }
+
+    def _paginate(self, files: List[Dict], table: Dict[str, Any]) -> Tuple[List[Dict], Dict[str, Any]]:
+        """
+        Filtra por ruta (q), ordena y devuelve solo la página pedida, en memoria
+        (informes recién calculados y filas antiguas con todo el JSON).
+        """
+        sort = table["sort"]
+        if table["q"]:
+            needle = table["q"].lower()
+            files = [f for f in files if needle in f.get("path", "").lower()]
+
+        # Los valores ausentes (métrica no calculada) van siempre al final
+        rows = [self._row(f) for f in files]
+        present = [r for r in rows if r.get(sort) is not None]
+        missing = [r for r in rows if r.get(sort) is None]
+        present.sort(key=lambda r: r[sort], reverse=(table["order"] == "desc"))
+        rows = present + missing
+
+        pagination = self._pagination(table, table["page"], len(rows))
+        start = (pagination["page"] - 1) * table["per_page"]
+        return rows[start:start + table["per_page"]], pagination
+
+    @staticmethod
+    def _pagination(table: Dict[str, Any], page: int, total: int) -> Dict[str, Any]:
+        pages = max(1, -(-total // table["per_page"]))
+        return {
+            "page": min(page, pages), "pages": pages, "per_page": table["per_page"], "total": total,
+            "sort": table["sort"], "order": table["order"], "q": table["q"]
+        }
+
+    @staticmethod
+    def _row(file_metrics: Dict) -> Dict[str, Any]:
+        """
+        Fila de la tabla: métricas del archivo con las funciones resumidas
+        (número y CC máxima). El detalle se pide bajo demanda.
+        """
+        row = {k: v for k, v in file_metrics.items() if k != "functions"}
+        functions = file_metrics.get("functions")
+        if functions is not None:
+            row["num_functions"] = len(functions)
+            row["max_cc"] = max((m.get("cc", 0) for m in functions.values()), default=0)
+        return row
+
+    @staticmethod
+    def _int(value: Any, default: int) -> int:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return default
+
 class HistoryComponent:
     """
     Responsabilidad: Obtener y formatear el historial de análisis.
@@ -123,10 +239,11 @@ class UIMediator:
 
         return render_template("index.html", **ctx)
 
-    def handle_analyze(self, form: Dict):
+    def handle_analyze(self, form: Dict, requester: Optional[str] = None):
         """
         Maneja la petición POST /analyze.
         Coordina validación, llamada al backend y respuesta.
+        'requester' (la IP del cliente) reparte el turno de forma justa entre usuarios.
         """
         # 1. Parsear Input
         repo_url, error = self.input_c.parse(form)
@@ -146,8 +263,14 @@ class UIMediator:
         # 3. Llamada al Backend (A través del Proxy)
         # El proxy se encarga de Cache vs Real
         try:
-            # Nota: metrics/facade.py compute_all usa 'dup_window' si se le pasa en options
-            result = self.subject.peticion(repo_url, force=opts["force"])
+            # Las opciones de las métricas forman parte de la clave de caché
+            result = self.subject.peticion(repo_url, force=opts["force"], metrics=opts["metrics"],
+                                           options={"dup_window": opts["dup_window"],
+                                                    "approximate": opts["approximate"],
+                                                    "ref": opts["ref"],
+                                                    "profile": opts["profile"],
+                                                    "priority": "interactive",
+                                                    "requester": requester})
         except Exception as e:
             # Si falla el backend (ej: repo no existe, fallo git), lo tratamos como error de input
             ctx = {}
@@ -157,6 +280,11 @@ class UIMediator:
             ctx.update(self.history_c.get_entries(self.subject))
             return render_template("index.html", **ctx)
 
+        if result.get("id") is not None and "files" not in result:
+            # Streaming: los archivos están en la BD y solo se lee la primera página
+            page = self._analysis_page(result["id"], self.output_c.table_args({}))
+            result.update(files=page["files"], files_page=page["files_page"])
+
         # 4. Preparar contexto de éxito
         ctx = {}
         ctx.update(self.input_c.context()) # Limpiar error
@@ -164,4 +292,122 @@ class UIMediator:
         ctx.update(self.output_c.prepare(result)) # Mostrar métricas
         ctx.update(self.history_c.get_entries(self.subject)) # Historial actualizado
 
-        return render_template("index.html", **ctx)
\ No newline at end of file
+        return render_template("index.html", **ctx)
+
+    def show_analysis(self, analysis_id: int, args: Dict):
+        """
+        Maneja la petición GET /analysis/<id>.
+        Muestra un análisis guardado con la tabla paginada/ordenada según 'args'.
+        """
+        error = None
+        table = self.output_c.table_args(args)
+        try:
+            result = self._analysis_page(analysis_id, table)
+            if result is None:
+                error = f"No existe el análisis {analysis_id}"
+            else:
+                result["_from_cache"] = True
+        except Exception as e:
+            result = None
+            error = f"Error recuperando análisis: {str(e)}"
+
+        ctx = {}
+        ctx.update(self.input_c.context(error))
+        ctx.update(self.options_c.context())
+        ctx.update(self.output_c.prepare(result, args))
+        ctx.update(self.history_c.get_entries(self.subject))
+        return render_template("index.html", **ctx)
+
+    def _analysis_page(self, analysis_id: int, table: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Análisis guardado con solo la página de archivos que pide 'table'.
+        """
+        return self.subject.get_analysis_page(analysis_id, table["page"], table["per_page"],
+                                              table["sort"], table["order"] == "desc", table["q"])
+
+    def handle_file_detail(self, analysis_id: int, args: Dict):
+        """
+        Maneja la petición GET /analysis/<id>/file?path=...
+        Devuelve en JSON las métricas de un archivo, incluidas sus funciones.
+        """
+        path = args.get("path", "")
+        if not path:
+            return jsonify({"error": "Falta el parámetro path"}), 400
+        try:
+            file_metrics = self.subject.get_analysis_file(analysis_id, path)
+        except Exception as e:
+            return jsonify({"error": f"Error recuperando archivo: {str(e)}"}), 500
+        if file_metrics is None:
+            return jsonify({"error": "Archivo no encontrado"}), 404
+        return jsonify(plain(file_metrics))
+
+    def handle_profile(self, analysis_id: int, name: Optional[str] = None):
+        """
+        Maneja las peticiones GET /analysis/<id>/profile y /analysis/<id>/profile/<name>.
+        Sin nombre devuelve en JSON el resumen del perfil y sus artefactos;
+        con nombre, descarga ese artefacto (ej. cpu.pstats para pstats o snakeviz).
+        """
+        from metrics.profiling import ARTIFACTS
+
+        if name is None:
+            profile = self.subject.get_profile(analysis_id)
+            if profile is None:
+                return jsonify({"error": f"El análisis {analysis_id} no tiene perfil"}), 404
+            profile["downloads"] = [f"/analysis/{analysis_id}/profile/{artifact}"
+                                    for artifact in profile["artifacts"]]
+            return jsonify(profile)
+
+        path = self.subject.profile_artifact(analysis_id, name)
+        if path is None:
+            return jsonify({"error": "Artefacto no encontrado"}), 404
+        return send_file(path, mimetype=ARTIFACTS[name], as_attachment=True,
+                         download_name=f"analysis-{analysis_id}-{name}")
+
+    def handle_trend(self, args: Dict):
+        """
+        Maneja la petición GET /trend.
+        Devuelve en JSON la serie temporal del repo (o de un archivo con ?path=).
+        """
+        repo_url = args.get("repo_url", "").strip()
+        if not repo_url:
+            return jsonify({"error": "Falta el parámetro repo_url"}), 400
+
+        path = args.get("path") or None
+        metrics = [m for m in args.get("metrics", "").split(",") if m] or None
+        ref = args.get("ref") or None
+        try:
+            points = self.subject.trend(repo_url, path, metrics, ref)
+        except Exception as e:
+            return jsonify({"error": f"Error recuperando tendencia: {str(e)}"}), 500
+
+        return jsonify({"repo_url": repo_url, "path": path, "points": points})
+
+    def handle_export(self, args):
+        """
+        Maneja la petición GET /export.
+        Devuelve en streaming (NDJSON o CSV) los análisis, archivos o funciones
+        guardados. Parámetros: level, format, repo_url, since, until y where
+        (repetible, ej. where=cc>=10).
+        """
+        from repo.export import render
+
+        level = args.get("level", "analyses")
+        fmt = args.get("format", "ndjson")
+        try:
+            rows = self.subject.export(level, args.get("repo_url") or None, args.get("since") or None,
+                                       args.get("until") or None, args.getlist("where"))
+            body = render(rows, level, fmt)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        mimetype = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+        return Response(body, mimetype=mimetype, headers={
+            "Content-Disposition": f'attachment; filename="{level}.{fmt}"'
+        })
+
+    def handle_scheduler_stats(self):
+        """
+        Maneja la petición GET /scheduler.
+        Devuelve en JSON la profundidad de las colas y las esperas de cada pool.
+        """
+        return jsonify(self.subject.scheduler_stats())
@@ -0,0 +1,16 @@
+"""
+Punto de entrada WSGI para servir la aplicación con varios procesos e hilos.
+
+    # Linux / Mac
+    gunicorn -w 4 --threads 8 -b 0.0.0.0:5000 wsgi:app
+
+    # Windows
+    waitress-serve --threads 8 --listen 0.0.0.0:5000 wsgi:app
+
+Cada worker importa este módulo (arranque perezoso, sin efectos secundarios).
+El estado compartido entre workers vive en SQLite (modo WAL) y en repo_cache,
+protegido por locks de fichero por repositorio.
+"""
+from app import app
+
+__all__ = ["app"]